@@ -1,17 +1,80 @@
-import os
+import base64
+import hashlib
+import json
+import logging
+import time
+from typing import Optional
+
 import requests
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from rest_framework.authentication import BaseAuthentication
 from rest_framework.exceptions import AuthenticationFailed
-from nd.redis_client import RedisClient
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from core.clients.http_client import get_http_client
+from core.clients.redis_client import RedisClient
+from core.utils.cache import TTLCache
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+# Profile claims copied onto the local user
+SYNCED_CLAIMS = ('email', 'name', 'access_level')
+
+# Per-process tiers in front of Redis: token key -> cache entry, and
+# email -> (profile hash, database alias, field values) for users synced by
+# this process. Field values rather than the instance: every request gets its
+# own user object.
+_token_cache = TTLCache(maxsize=settings.SSO_LOCAL_CACHE_SIZE, ttl=settings.SSO_LOCAL_CACHE_TTL)
+_user_cache = TTLCache(maxsize=settings.SSO_LOCAL_CACHE_SIZE, ttl=settings.SSO_LOCAL_CACHE_TTL)
+
+
+def token_cache_key(token: str) -> str:
+    """Cache key for a token; the raw token is never stored."""
+    return f"sso_token_{hashlib.sha256(token.encode()).hexdigest()}"
+
+
+def token_expiry(token: str) -> Optional[float]:
+    """Return the ``exp`` claim of a JWT without verifying it, if there is one."""
+    parts = token.split('.')
+    if len(parts) != 3:
+        return None
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(parts[1] + '=' * (-len(parts[1]) % 4)))
+        return float(payload['exp'])
+    except (ValueError, TypeError, KeyError):
+        return None
+
+
+def token_ttl(token: str) -> int:
+    """Seconds a validated token may stay cached: its remaining lifetime, capped."""
+    expires_at = token_expiry(token)
+    if expires_at is None:
+        return settings.SSO_TOKEN_EXPIRY
+    return int(max(0, min(expires_at - time.time(), settings.SSO_TOKEN_EXPIRY)))
+
+
+def profile_hash(user_data: dict) -> str:
+    """Digest of the synced profile claims, to detect profile changes cheaply."""
+    claims = {claim: user_data.get(claim) for claim in SYNCED_CLAIMS}
+    return hashlib.sha256(json.dumps(claims, sort_keys=True).encode()).hexdigest()
+
+
+def clear_local_caches() -> None:
+    _token_cache.clear()
+    _user_cache.clear()
+
 
 class SSOAuthentication(BaseAuthentication):
     def authenticate(self, request):
         """
         Authenticate the user based on the SSO token provided in the Authorization header.
+
+        Token lookups go through the process cache, then Redis, then the SSO
+        server; the answer (valid or not) is written back to both cache tiers.
         """
         auth_header = request.headers.get("Authorization")
         if not auth_header or not auth_header.startswith("Bearer "):
@@ -21,56 +84,130 @@ class SSOAuthentication(BaseAuthentication):
         if not token:
             return None
 
-        # Try retrieving user data from Redis cache first
-        redis_client = RedisClient()
-        cache_key = f"sso_token_{token}"
-        user_data = redis_client.get_dict(cache_key)
+        cache_key = token_cache_key(token)
+        entry = self._get_cached(cache_key)
+        if entry is None:
+            entry = self._verify(token)
+            self._set_cached(cache_key, entry)
 
-        if not user_data:
-            # Verify the token with the SSO server
-            sso_verify_url = f'{os.environ.get("SSO_URL")}/api/users/me/'
-            response = requests.get(
-                sso_verify_url, headers={"Authorization": f"Bearer {token}"}
-            )
-            if response.status_code != 200:
-                raise AuthenticationFailed("SSO token is invalid or expired.")
-            user_data = response.json()
+        if not entry['valid']:
+            raise AuthenticationFailed("SSO token is invalid or expired.")
+
+        return (self._sync_user(entry['profile']), None)
+
+    def authenticate_header(self, request):
+        return "Bearer"
+
+    def _get_cached(self, cache_key: str) -> Optional[dict]:
+        entry = _token_cache.get(cache_key)
+        if entry is not None:
+            return entry
 
-        # Get or update the user information
         try:
-            user = User.objects.get(username=user_data["preferred_username"])
-            update_fields = []
+            entry = RedisClient().get_dict(cache_key)
+        except Exception as e:
+            logger.error(f"SSO token cache unavailable: {e}")
+            return None
+
+        if entry is not None:
+            _token_cache.set(cache_key, entry, ttl=entry['expires_at'] - time.time())
+        return entry
+
+    def _set_cached(self, cache_key: str, entry: dict) -> None:
+        ttl = int(entry['expires_at'] - time.time())
+        if ttl <= 0:
+            return
+        _token_cache.set(cache_key, entry, ttl=ttl)
+        try:
+            RedisClient().set_with_expiry(cache_key, json.dumps(entry), ttl)
+        except Exception as e:
+            logger.error(f"SSO token cache unavailable: {e}")
 
-            first_name = user_data["name"].split(" ")[0]
-            if user.first_name != first_name:
-                user.first_name = first_name
-                update_fields.append("first_name")
+    def _verify(self, token: str) -> dict:
+        """Validate a token with the SSO server and build its cache entry."""
+        try:
+            response = get_http_client('sso').get(
+                f"{settings.SSO_URL}/api/users/me/",
+                headers={"Authorization": f"Bearer {token}"},
+                timeout=settings.SSO_TIMEOUT,
+                endpoint='users-me',
+            )
+        except requests.RequestException as e:
+            logger.error(f"SSO server unavailable: {e}")
+            raise AuthenticationFailed("SSO server is unavailable.")
 
-            last_name = user_data["name"].split(" ")[1]
-            if user.last_name != last_name:
-                user.last_name = last_name
-                update_fields.append("last_name")
+        if response.status_code == 200:
+            ttl = token_ttl(token)
+            if ttl > 0:
+                return {'valid': True, 'profile': response.json(), 'expires_at': time.time() + ttl}
+        elif response.status_code not in (401, 403):
+            # Server-side errors say nothing about the token, so they are not cached
+            raise AuthenticationFailed("SSO token could not be verified.")
 
-            if user.access_level != user_data["access_level"]:
-                user.access_level = user_data["access_level"]
-                update_fields.append("access_level")
+        return {'valid': False, 'expires_at': time.time() + settings.SSO_NEGATIVE_CACHE_TTL}
 
+    def _sync_user(self, user_data: dict):
+        """Get or update the local user, skipped while the profile is unchanged."""
+        email = user_data["email"]
+        digest = profile_hash(user_data)
+        cached = _user_cache.get(email)
+        if cached is not None and cached[0] == digest:
+            _, db, values = cached
+            return User.from_db(db, [field.attname for field in User._meta.concrete_fields], values)
+
+        first_name, _, last_name = user_data["name"].partition(" ")
+        fields = {'first_name': first_name, 'last_name': last_name}
+        roles = dict(User.ROLE_CHOICES)
+        if user_data.get("access_level") in roles:
+            fields['role'] = user_data["access_level"]
+
+        try:
+            user = User.objects.get(email=email)
+            update_fields = [name for name, value in fields.items() if getattr(user, name) != value]
             if update_fields:
+                for name in update_fields:
+                    setattr(user, name, fields[name])
                 user.save(update_fields=update_fields)
 
         except User.DoesNotExist:
             try:
-                user = User.objects.create(
-                    username=user_data["preferred_username"],
-                    email=user_data["email"],
-                    first_name=user_data["name"].split(" ")[0],
-                    last_name=user_data["name"].split(" ")[1],
-                    access_level=user_data["access_level"],
-                )
+                user = User.objects.create_user(email=email, **fields)
             except Exception:
                 raise AuthenticationFailed("Error creating user.")
 
-        return (user, None)
+        if not user.is_active:
+            raise AuthenticationFailed("User is inactive.")
 
-    def authenticate_header(self, request):
-        return "Bearer"
+        values = [getattr(user, field.attname) for field in User._meta.concrete_fields]
+        _user_cache.set(email, (digest, user._state.db, values))
+        return user
+
+
+class StatelessJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that skips the user lookup on read requests.
+
+    With ``JWT_STATELESS_USERS`` enabled, safe-method requests whose access
+    token carries current authorization claims get a user rebuilt from those
+    claims (see ``users.tokens``); only the revocation version is read, from
+    Redis. Writes, tokens without claims and outdated claims use the regular
+    database lookup.
+    """
+
+    def authenticate(self, request):
+        if not settings.JWT_STATELESS_USERS or request.method not in SAFE_METHODS:
+            return super().authenticate(request)
+
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        from users.tokens import user_from_claims
+
+        validated_token = self.get_validated_token(raw_token)
+        user = user_from_claims(validated_token) or self.get_user(validated_token)
+        return user, validated_token
@@ -1,9 +1,14 @@
 import os
 from celery import Celery
-from celery.signals import task_failure, worker_ready
+from celery.schedules import crontab
+from celery.signals import (
+    before_task_publish, celeryd_init, task_failure, task_postrun, task_prerun, task_retry,
+    task_revoked, task_success, worker_process_shutdown, worker_ready, worker_shutdown,
+)
 from celery.result import AsyncResult
 from kombu import Exchange, Queue
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
 
 # Set the default Django settings module
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'core.settings')
@@ -23,24 +28,115 @@ task_queues = [
 
 app.conf.task_queues = task_queues
 
-# Task routing
+# Task routing: device control must never wait behind bulk work, so it gets
+# its own queue; logging and retention go to low_priority.
 app.conf.task_routes = {
+    'tasks.tasks.control_valve': {'queue': 'high_priority'},
+    'tasks.tasks.control_pump': {'queue': 'high_priority'},
+    'tasks.tasks.emergency_stop': {'queue': 'high_priority'},
+    'tasks.tasks.auto_close_valve': {'queue': 'high_priority'},
+    'tasks.tasks.run_schedule': {'queue': 'high_priority'},
+    'tasks.tasks.probe': {'queue': 'high_priority'},
+    'tasks.tasks.write_system_logs': {'queue': 'low_priority'},
+    'tasks.tasks.purge_system_logs': {'queue': 'low_priority'},
+    'tasks.tasks.sweep_batches': {'queue': 'low_priority'},
     'tasks.*': {'queue': 'default'},
 }
 
+# Fire-and-forget tasks don't write results to the result backend
+app.conf.task_annotations = {
+    task_name: {'ignore_result': True} for task_name in settings.CELERY_IGNORE_RESULT_TASKS
+}
+
 # Auto-discover tasks in all installed apps
 app.autodiscover_tasks()
 
-# Configure the Celery beat schedule (empty)
-app.conf.beat_schedule = {}
+# Configure the Celery beat schedule
+app.conf.beat_schedule = {
+    'purge-system-logs': {
+        'task': 'tasks.tasks.purge_system_logs',
+        'schedule': crontab(hour=3, minute=30),
+        'options': {'queue': 'low_priority'},
+    },
+    # Batch keys whose flush gave up and that get no new items
+    'sweep-batches': {
+        'task': 'tasks.tasks.sweep_batches',
+        'schedule': 60.0,
+        'options': {'queue': 'low_priority'},
+    },
+    # Replaces Celery's built-in result cleanup (one unbounded DELETE on the
+    # django-db backend) with a batched purge; also clears rows left behind
+    # after switching to the Redis result backend.
+    'celery.backend_cleanup': {
+        'task': 'tasks.tasks.purge_task_results',
+        'schedule': crontab(hour=4, minute=0),
+        'options': {'queue': 'low_priority'},
+    },
+}
+
+@celeryd_init.connect
+def configure_queue_worker(conf=None, **kwargs):
+    """
+    Size a dedicated queue worker from CELERY_QUEUE_WORKERS.
+
+    Start one worker per queue with CELERY_WORKER_QUEUE=<queue> and -Q <queue>;
+    explicit -c/--prefetch-multiplier flags still take precedence.
+    """
+    worker_queue = os.environ.get('CELERY_WORKER_QUEUE')
+    if worker_queue:
+        worker_options = settings.CELERY_QUEUE_WORKERS.get(worker_queue)
+        if worker_options is None:
+            raise ImproperlyConfigured(
+                f"CELERY_WORKER_QUEUE={worker_queue!r} is not one of "
+                f"{', '.join(sorted(settings.CELERY_QUEUE_WORKERS))}"
+            )
+        conf.worker_concurrency = worker_options['concurrency']
+        conf.worker_prefetch_multiplier = worker_options['prefetch_multiplier']
+
+def index_task_state(task_id, state, request=None):
+    """Record a task state in the Redis index; eager (in-process) runs are skipped."""
+    if task_id and not getattr(request, 'is_eager', False):
+        from core.utils.celery import record_task_state
+        record_task_state(task_id, state)
+
+@before_task_publish.connect
+def handle_task_published(headers=None, **kwargs):
+    """Index tasks as PENDING when they are sent to the broker."""
+    index_task_state((headers or {}).get('id'), 'PENDING')
+
+@task_prerun.connect
+def handle_task_started(task_id=None, task=None, **kwargs):
+    index_task_state(task_id, 'STARTED', task.request)
+    if not task.request.is_eager:
+        from core.metrics import task_started
+        task_started(task_id)
+
+@task_postrun.connect
+def handle_task_finished(task_id=None, task=None, state=None, **kwargs):
+    """Record the task runtime in ``celery_task_runtime_seconds``, by queue."""
+    from core.metrics import task_finished
+    task_finished(task_id, task, state)
+
+@task_retry.connect
+def handle_task_retry(request=None, **kwargs):
+    index_task_state(request.id, 'RETRY', request)
+
+@task_success.connect
+def handle_task_success(sender=None, **kwargs):
+    index_task_state(sender.request.id, 'SUCCESS', sender.request)
+
+@task_revoked.connect
+def handle_task_revoked(request=None, **kwargs):
+    index_task_state(request.id, 'REVOKED', request)
 
 @task_failure.connect
-def handle_task_failure(task_id, exception, args, kwargs, traceback, einfo, **kw):
+def handle_task_failure(task_id, exception, args, kwargs, traceback, einfo, sender=None, **kw):
     """Handle task failures by logging them."""
     import logging
     logger = logging.getLogger(__name__)
     error_msg = f"Task {task_id} failed: {str(exception)}"
     logger.error(error_msg)
+    index_task_state(task_id, 'FAILURE', getattr(sender, 'request', None))
 
 @worker_ready.connect
 def worker_ready_handler(**kwargs):
@@ -48,13 +144,35 @@ def worker_ready_handler(**kwargs):
     import logging
     logger = logging.getLogger(__name__)
     logger.info("Celery worker is ready and connected to RabbitMQ")
+    if settings.CELERY_METRICS_PORT:
+        from core.metrics import start_metrics_server
+        start_metrics_server(settings.CELERY_METRICS_PORT)
+        logger.info(f"Serving Prometheus metrics on port {settings.CELERY_METRICS_PORT}")
+
+@worker_process_shutdown.connect
+def worker_process_shutdown_handler(pid=None, **kwargs):
+    from core.metrics import mark_process_dead
+    mark_process_dead(pid)
+
+@worker_shutdown.connect
+def worker_shutdown_handler(**kwargs):
+    """Flush buffered SystemLog events before the worker exits."""
+    from garden.log_sink import shutdown_log_sink
+    shutdown_log_sink()
 
 def get_task_state(task_id):
     """Get the current state of a task."""
     try:
         result = AsyncResult(task_id)
+        state = result.state
+        if state == 'PENDING':
+            # Tasks that ignore their result never leave PENDING in the backend
+            from core.utils.celery import check_task_status
+            indexed_state = check_task_status(task_id)
+            if indexed_state != 'NOTEXIST':
+                state = indexed_state
         return {
-            'state': result.state,
+            'state': state,
             'info': result.info,
             'task_id': task_id,
             'result': result.result if result.ready() else None,
@@ -5,5 +5,6 @@ Core clients package for database and message queue connections.
 from .redis_client import RedisClient
 from .rabbit_client import RabbitMQClient
 from .influx_client import InfluxDBClient
+from .http_client import HTTPClient, get_http_client
 
-__all__ = ['RedisClient', 'RabbitMQClient', 'InfluxDBClient'] 
\ No newline at end of file
+__all__ = ['RedisClient', 'RabbitMQClient', 'InfluxDBClient', 'HTTPClient', 'get_http_client'] 
\ No newline at end of file
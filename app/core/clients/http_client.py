@@ -0,0 +1,207 @@
+"""
+Shared outbound HTTP client for third-party integrations (Supernova, SSO, RabbitMQ management).
+Provides pooled keep-alive sessions with timeouts, retries with backoff, a circuit breaker and
+per-endpoint latency metrics.
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from core.utils.benchmark import summarize
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(requests.RequestException):
+    """Raised instead of calling an upstream whose circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Stop calling an upstream after consecutive failures.
+
+    After ``failure_threshold`` failures in a row the circuit opens and calls
+    fail fast for ``reset_timeout`` seconds. Then a single trial call is let
+    through: success closes the circuit, failure opens it again.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return 'closed'
+        if time.monotonic() - self._opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._failures = 0
+            self._opened_at = None
+            self._trial_running = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self._failures += 1
+            self._trial_running = False
+            if self._opened_at is not None or self._failures >= self.failure_threshold:
+                self._opened_at = time.monotonic()
+
+
+class EndpointStats:
+    """Request count, error count and recent latencies of one endpoint."""
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.errors = 0
+        self.samples_ms = deque(maxlen=window)
+
+    def record(self, elapsed_ms: float, failed: bool) -> None:
+        self.count += 1
+        self.errors += failed
+        self.samples_ms.append(elapsed_ms)
+
+    def as_dict(self) -> Dict[str, float]:
+        return dict(summarize(list(self.samples_ms)), requests=self.count, errors=self.errors)
+
+
+class HTTPClient:
+    """Pooled HTTP session for one upstream service."""
+
+    def __init__(
+        self,
+        name: str,
+        timeout=(3.05, 10),
+        retries: int = 2,
+        backoff_factor: float = 0.3,
+        pool_maxsize: int = 10,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._stats: Dict[str, EndpointStats] = {}
+        self._stats_lock = threading.Lock()
+
+        # Only idempotent methods are retried (urllib3's default allowed_methods)
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(502, 503, 504),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_maxsize, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+
+    def request(self, method: str, url: str, endpoint: Optional[str] = None, **kwargs) -> requests.Response:
+        """
+        Send a request through the pooled session.
+
+        Args:
+            method: HTTP method
+            url: Full URL
+            endpoint: Metrics label (defaults to the method); use a stable name
+                rather than the URL when it contains ids or credentials
+            **kwargs: Passed to ``requests.Session.request``; ``timeout``
+                defaults to the client timeout
+
+        Raises:
+            CircuitOpenError: If the upstream has been failing
+            requests.RequestException: On connection errors and timeouts
+        """
+        endpoint = endpoint or method.upper()
+        if not self.breaker.allow():
+            self._record(endpoint, 0.0, failed=True)
+            raise CircuitOpenError(f"Circuit for '{self.name}' is open")
+
+        kwargs.setdefault('timeout', self.timeout)
+        start = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+        except BaseException:
+            # Not only RequestException: any error (bad arguments, decoding,
+            # interrupts) must end a half-open trial, or the circuit never closes
+            self.breaker.record_failure()
+            self._record(endpoint, (time.perf_counter() - start) * 1000, failed=True)
+            raise
+
+        failed = response.status_code >= 500
+        if failed:
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        self._record(endpoint, (time.perf_counter() - start) * 1000, failed=failed)
+        return response
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request('POST', url, **kwargs)
+
+    def delete(self, url: str, **kwargs) -> requests.Response:
+        return self.request('DELETE', url, **kwargs)
+
+    def metrics(self) -> Dict[str, Dict[str, float]]:
+        """Latency percentiles and error counts per endpoint."""
+        with self._stats_lock:
+            return {endpoint: stats.as_dict() for endpoint, stats in self._stats.items()}
+
+    def _record(self, endpoint: str, elapsed_ms: float, failed: bool) -> None:
+        with self._stats_lock:
+            stats = self._stats.get(endpoint)
+            if stats is None:
+                stats = self._stats[endpoint] = EndpointStats()
+            stats.record(elapsed_ms, failed)
+
+
+_clients: Dict[str, HTTPClient] = {}
+_clients_lock = threading.Lock()
+
+
+def get_http_client(name: str) -> HTTPClient:
+    """
+    Return the process-wide client for an upstream, configured from
+    ``HTTP_CLIENT_DEFAULTS`` overridden by ``HTTP_CLIENTS[name]``.
+    """
+    client = _clients.get(name)
+    if client is None:
+        with _clients_lock:
+            client = _clients.get(name)
+            if client is None:
+                options = dict(settings.HTTP_CLIENT_DEFAULTS, **settings.HTTP_CLIENTS.get(name, {}))
+                client = _clients[name] = HTTPClient(name, **options)
+    return client
+
+
+def get_http_metrics() -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Per-endpoint metrics of every client created in this process."""
+    return {name: client.metrics() for name, client in list(_clients.items())}
@@ -12,6 +12,8 @@ import logging
 from datetime import datetime, timedelta
 from functools import wraps
 
+from core.metrics import timed
+
 logger = logging.getLogger(__name__)
 
 def handle_influx_errors(func):
@@ -51,6 +53,7 @@ class InfluxDBClient:
         
         self.connect()
 
+    @timed('influxdb')
     def connect(self) -> None:
         """Establish connection to InfluxDB server."""
         try:
@@ -96,6 +99,7 @@ class InfluxDBClient:
             self._write_api = None
             self._query_api = None
 
+    @timed('influxdb')
     @handle_influx_errors
     def write_measurement(
         self,
@@ -127,6 +131,7 @@ class InfluxDBClient:
             record=point
         )
 
+    @timed('influxdb')
     @handle_influx_errors
     def write_batch(
         self,
@@ -140,6 +145,7 @@ class InfluxDBClient:
             record=points
         )
 
+    @timed('influxdb')
     @handle_influx_errors
     def query_range(
         self,
@@ -177,6 +183,7 @@ class InfluxDBClient:
         query = ' '.join(query_parts)
         return self._query_api.query(query=query)
 
+    @timed('influxdb')
     @handle_influx_errors
     def delete_data(
         self,
@@ -11,6 +11,8 @@ from django.conf import settings
 import logging
 from functools import wraps
 
+from core.metrics import timed
+
 logger = logging.getLogger(__name__)
 
 def ensure_connection(func):
@@ -55,6 +57,7 @@ class RabbitMQClient:
         self._channel: Optional[pika.channel.Channel] = None
         self.connect()
 
+    @timed('rabbitmq')
     def connect(self) -> None:
         """Establish connection to RabbitMQ server."""
         try:
@@ -88,6 +91,7 @@ class RabbitMQClient:
             self._channel = None
             self._connection = None
 
+    @timed('rabbitmq')
     @ensure_connection
     def send_message(self, routing_key: str, data: Dict[str, Any]) -> None:
         """Send a message to RabbitMQ with the specified routing key."""
@@ -139,6 +143,7 @@ class RabbitMQClient:
             logger.error(f"Error parsing message: {e}")
             raise
 
+    @timed('rabbitmq')
     @ensure_connection
     def publish_and_listen(
         self,
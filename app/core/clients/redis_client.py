@@ -4,8 +4,30 @@ from datetime import timedelta
 from django.conf import settings
 import logging
 
+from core.metrics import time_client
+
 logger = logging.getLogger(__name__)
 
+
+class InstrumentedPipeline(redis.client.Pipeline):
+    """Pipeline timed as a single ``pipeline`` operation when executed."""
+
+    def execute(self, raise_on_error=True):
+        with time_client('redis', 'pipeline'):
+            return super().execute(raise_on_error)
+
+
+class InstrumentedRedis(redis.StrictRedis):
+    """Connection recording every command in ``client_operation_seconds``, by command name."""
+
+    def execute_command(self, *args, **options):
+        with time_client('redis', str(args[0]).lower()):
+            return super().execute_command(*args, **options)
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return InstrumentedPipeline(self.connection_pool, self.response_callbacks, transaction, shard_hint)
+
+
 class RedisClient:
     _instances = {}
 
@@ -13,7 +35,7 @@ class RedisClient:
         if db not in cls._instances:
             cls._instances[db] = super().__new__(cls)
             try:
-                cls._instances[db]._redis_conn = redis.StrictRedis(
+                cls._instances[db]._redis_conn = InstrumentedRedis(
                     host=settings.REDIS_HOST,
                     port=settings.REDIS_PORT,
                     db=db,
@@ -28,6 +50,11 @@ class RedisClient:
                 raise
         return cls._instances[db]
 
+    @property
+    def connection(self) -> redis.StrictRedis:
+        """Underlying connection, for pipelines, pub/sub and multi-key commands."""
+        return self._redis_conn
+
     def set_with_expiry(self, key: str, value: str, expiry_seconds: int) -> bool:
         """Set a key with expiry time."""
         try:
@@ -103,6 +130,14 @@ class RedisClient:
             logger.error(f"Redis error in delete: {e}")
             return False
 
+    def publish(self, channel: str, message: dict) -> int:
+        """Publish a JSON serialized message on a pub/sub channel."""
+        try:
+            return self._redis_conn.publish(channel, json.dumps(message))
+        except (redis.RedisError, TypeError) as e:
+            logger.error(f"Redis error in publish: {e}")
+            return 0
+
     def flush_db(self) -> bool:
         """Clear all keys in the current database."""
         try:
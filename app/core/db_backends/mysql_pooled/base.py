@@ -0,0 +1,48 @@
+"""
+MySQL backend that returns connections to a process-wide pool instead of closing them.
+
+Django still opens and "closes" a connection per request (``CONN_MAX_AGE = 0``),
+but both are cheap: connections are checked out of and returned to a
+``ConnectionPool``. Unlike persistent connections, which stay bound to the
+thread that opened them, pooled connections are shared by all threads of the
+process, which suits ASGI where sync work runs on executor threads.
+
+Pool sizing comes from the ``POOL`` entry of the database settings::
+
+    'POOL': {'SIZE': 10, 'MAX_OVERFLOW': 10, 'TIMEOUT': 10, 'RECYCLE': 3600}
+"""
+
+from django.db.backends.mysql import base as mysql_base
+
+from core.db_backends.pool import ConnectionPool, PoolExhausted, get_pool
+
+Database = mysql_base.Database
+
+
+class DatabaseWrapper(mysql_base.DatabaseWrapper):
+    @property
+    def pool(self) -> ConnectionPool:
+        return get_pool(self.alias, self._create_pool)
+
+    def _create_pool(self) -> ConnectionPool:
+        options = self.settings_dict.get('POOL', {})
+        conn_params = self.get_connection_params()
+        return ConnectionPool(
+            connect=lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            size=options.get('SIZE', 10),
+            max_overflow=options.get('MAX_OVERFLOW', 10),
+            timeout=options.get('TIMEOUT', 10),
+            recycle=options.get('RECYCLE', 3600),
+            ping=lambda connection: connection.ping(),
+        )
+
+    def get_new_connection(self, conn_params):
+        try:
+            return self.pool.acquire()
+        except PoolExhausted as e:
+            raise Database.OperationalError(str(e)) from e
+
+    def _close(self):
+        if self.connection is not None:
+            # A connection closed mid-transaction is rolled back before reuse
+            self.pool.release(self.connection)
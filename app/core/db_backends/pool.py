@@ -0,0 +1,165 @@
+"""
+Process-wide pool of raw DB-API connections, used by the pooled database backends.
+"""
+
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolExhausted(RuntimeError):
+    """Raised when no connection becomes available within the pool timeout."""
+
+
+class ConnectionPool:
+    """
+    Thread-safe pool of connections created by ``connect``.
+
+    Up to ``size`` idle connections are kept; ``max_overflow`` more may be
+    opened under load and are closed when released. Idle connections are
+    health-checked with ``ping`` before being handed out, and recycled once
+    older than ``recycle`` seconds, so connections dropped by the server
+    (``wait_timeout``) are never returned.
+    """
+
+    def __init__(
+        self,
+        connect: Callable[[], Any],
+        size: int = 10,
+        max_overflow: int = 10,
+        timeout: float = 10,
+        recycle: float = 3600,
+        ping: Optional[Callable[[Any], None]] = None,
+    ):
+        self.connect = connect
+        self.size = size
+        self.max_overflow = max_overflow
+        self.timeout = timeout
+        self.recycle = recycle
+        self.ping = ping
+        self._idle: 'queue.LifoQueue' = queue.LifoQueue()
+        self._created_at: Dict[int, float] = {}
+        self._open = 0
+        self._lock = threading.Lock()
+
+    @property
+    def open_connections(self) -> int:
+        return self._open
+
+    @property
+    def idle_connections(self) -> int:
+        return self._idle.qsize()
+
+    def acquire(self):
+        """Return a healthy connection, opening one if none is idle."""
+        deadline = time.monotonic() + self.timeout
+        while True:
+            try:
+                connection = self._idle.get_nowait()
+            except queue.Empty:
+                connection = None
+
+            if connection is not None:
+                if self._is_usable(connection):
+                    return connection
+                self._discard(connection)
+                continue
+
+            with self._lock:
+                can_open = self._open < self.size + self.max_overflow
+                if can_open:
+                    self._open += 1
+            if can_open:
+                try:
+                    connection = self.connect()
+                except Exception:
+                    with self._lock:
+                        self._open -= 1
+                    raise
+                self._created_at[id(connection)] = time.monotonic()
+                return connection
+
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise PoolExhausted(
+                    f"No database connection available within {self.timeout}s "
+                    f"({self._open} open)"
+                )
+            try:
+                connection = self._idle.get(timeout=remaining)
+            except queue.Empty:
+                continue
+            if self._is_usable(connection):
+                return connection
+            self._discard(connection)
+
+    def release(self, connection, reusable: bool = True) -> None:
+        """Return a connection; overflow, expired and broken connections are closed."""
+        if reusable:
+            try:
+                connection.rollback()
+            except Exception:
+                reusable = False
+
+        if reusable and not self._expired(connection) and self._idle.qsize() < self.size:
+            self._idle.put(connection)
+        else:
+            self._discard(connection)
+
+    def close_all(self) -> None:
+        """Close every idle connection (e.g. after fork or in tests)."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+    def _is_usable(self, connection) -> bool:
+        if self._expired(connection):
+            return False
+        if self.ping is None:
+            return True
+        try:
+            self.ping(connection)
+            return True
+        except Exception as e:
+            logger.warning(f"Discarding broken pooled connection: {e}")
+            return False
+
+    def _expired(self, connection) -> bool:
+        created_at = self._created_at.get(id(connection), 0)
+        return self.recycle is not None and time.monotonic() - created_at > self.recycle
+
+    def _discard(self, connection) -> None:
+        self._created_at.pop(id(connection), None)
+        with self._lock:
+            self._open -= 1
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+
+_pools: Dict[tuple, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias: str, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """
+    Return this process's pool for a database alias, creating it with ``factory``.
+
+    Pools are keyed by pid so forked workers never share a parent's sockets.
+    """
+    key = (alias, os.getpid())
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = factory()
+    return pool
@@ -0,0 +1,119 @@
+"""
+Read-replica routing for heavy, read-only endpoints.
+
+Routing is opt-in: reads go to the ``replica`` alias only inside
+``replica_reads()`` (or views using ``ReplicaReadMixin``), everything else
+stays on the primary. Writes always go to the primary and switch the rest of
+the current context back to it, and ``PrimaryStickinessMiddleware`` pins a
+user's reads to the primary for ``DB_REPLICA_STICKY_SECONDS`` after any
+successful write, so users read their own writes despite replication lag.
+
+Without a ``replica`` database configured, every read uses the primary.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.permissions import SAFE_METHODS
+
+REPLICA_ALIAS = 'replica'
+STICKY_KEY = 'db:primary-pin:{}'
+
+_use_replica = ContextVar('use_replica', default=False)
+
+
+def replica_available() -> bool:
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+@contextmanager
+def replica_reads(enabled: bool = True):
+    """Send reads in this block to the replica (e.g. for reports and exports)."""
+    token = _use_replica.set(enabled and replica_available())
+    try:
+        yield
+    finally:
+        _use_replica.reset(token)
+
+
+def pin_to_primary(user_id) -> None:
+    """Read from the primary for this user until the replica has caught up."""
+    cache.set(STICKY_KEY.format(user_id), 1, settings.DB_REPLICA_STICKY_SECONDS)
+
+
+def is_pinned_to_primary(user_id) -> bool:
+    return cache.get(STICKY_KEY.format(user_id)) is not None
+
+
+class ReplicaRouter:
+    """Database router sending opted-in reads to the replica."""
+
+    def db_for_read(self, model, **hints):
+        if _use_replica.get():
+            return REPLICA_ALIAS
+        return None
+
+    def db_for_write(self, model, **hints):
+        # Read-your-writes: later reads in this context see the new rows
+        _use_replica.set(False)
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # The replica holds the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db != REPLICA_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    ViewSet mixin serving safe ``replica_actions`` from the replica, unless
+    the user is pinned to the primary after a recent write.
+
+    ``served_from_replica`` tells later response handling (e.g. response
+    caching) that the data may lag behind the primary.
+    """
+    replica_actions = ('list', 'retrieve')
+    served_from_replica = False
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        user = request.user
+        if (
+            request.method in SAFE_METHODS
+            and self.action in self.replica_actions
+            and replica_available()
+            and not (user.is_authenticated and is_pinned_to_primary(user.pk))
+        ):
+            self._replica_token = _use_replica.set(True)
+            self.served_from_replica = True
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        token = getattr(self, '_replica_token', None)
+        if token is not None:
+            _use_replica.reset(token)
+            self._replica_token = None
+        return super().finalize_response(request, response, *args, **kwargs)
+
+
+class PrimaryStickinessMiddleware:
+    """Pin users to the primary after successful unsafe requests."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        if (
+            replica_available()
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+            and user is not None
+            and user.is_authenticated
+        ):
+            pin_to_primary(user.pk)
+        return response
@@ -0,0 +1,183 @@
+"""
+Prometheus metrics, exposed on ``/metrics`` to ``METRICS_ALLOWED_NETWORKS``.
+
+django-prometheus (``django_prometheus`` middleware) already records request
+counts and per-view latency (``django_http_requests_latency_seconds_by_view_method``).
+This module adds what it doesn't know about:
+
+- ``django_request_db_queries`` / ``django_request_db_query_seconds``: queries
+  and database time of each request, by view (``RequestDBMetricsMiddleware``).
+- ``client_operation_seconds`` / ``client_operation_errors_total``: Redis,
+  RabbitMQ and InfluxDB operations, by client and operation (``timed``).
+- ``celery_task_runtime_seconds``: task runtimes by task, queue and final state.
+- ``websocket_connections``: open websockets, by consumer.
+
+Celery workers serve their metrics with ``start_metrics_server`` on
+``CELERY_METRICS_PORT``. When several processes serve the same metrics
+(Celery prefork children, several web workers), point
+``PROMETHEUS_MULTIPROC_DIR`` at an empty directory shared by them.
+"""
+
+import ipaddress
+import os
+import time
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections
+from django.http import Http404
+from django_prometheus.exports import ExportToDjangoView
+from prometheus_client import CollectorRegistry, Counter, Gauge, Histogram, start_http_server
+
+CLIENT_SECONDS = Histogram(
+    'client_operation_seconds', 'Latency of Redis, RabbitMQ and InfluxDB operations',
+    ['client', 'operation'],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+CLIENT_ERRORS = Counter(
+    'client_operation_errors_total', 'Redis, RabbitMQ and InfluxDB operations that raised',
+    ['client', 'operation'],
+)
+REQUEST_DB_QUERIES = Histogram(
+    'django_request_db_queries', 'Database queries per request', ['view'],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100, 200, 500),
+)
+REQUEST_DB_SECONDS = Histogram(
+    'django_request_db_query_seconds', 'Time spent in database queries per request', ['view'],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+CELERY_TASK_SECONDS = Histogram(
+    'celery_task_runtime_seconds', 'Celery task runtime', ['task', 'queue', 'state'],
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 900, 1800),
+)
+WEBSOCKET_CONNECTIONS = Gauge(
+    'websocket_connections', 'Open websocket connections', ['consumer'],
+    multiprocess_mode='livesum',
+)
+
+UNRESOLVED_VIEW = '<unresolved>'
+
+# List collecting the client operations of the current request while it is profiled
+client_calls = ContextVar('client_calls', default=None)
+
+
+@contextmanager
+def time_client(client, operation):
+    """Record the duration of the block, and whether it raised, for one client operation."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        CLIENT_ERRORS.labels(client, operation).inc()
+        raise
+    finally:
+        seconds = time.perf_counter() - start
+        CLIENT_SECONDS.labels(client, operation).observe(seconds)
+        calls = client_calls.get()
+        if calls is not None:
+            calls.append({'client': client, 'operation': operation, 'duration_ms': seconds * 1000})
+
+
+def timed(client, operation=None):
+    """Decorator timing a client method; the operation defaults to the method name."""
+    def decorator(func):
+        name = operation or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with time_client(client, name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def is_allowed_address(address, networks) -> bool:
+    """Whether ``address`` belongs to one of ``networks`` (addresses or CIDRs)."""
+    try:
+        ip = ipaddress.ip_address(address)
+    except ValueError:
+        return False
+    return any(ip in ipaddress.ip_network(network.strip(), strict=False) for network in networks if network.strip())
+
+
+def metrics_view(request):
+    """
+    Serve the metrics to scrapers in ``METRICS_ALLOWED_NETWORKS`` only.
+
+    Anyone else gets a 404: view names, query counts and client latencies
+    are not for the public.
+    """
+    if not is_allowed_address(request.META.get('REMOTE_ADDR'), settings.METRICS_ALLOWED_NETWORKS):
+        raise Http404
+    return ExportToDjangoView(request)
+
+
+class RequestDBMetricsMiddleware:
+    """
+    Record the number of queries and the database time of each request, by view.
+
+    Queries are counted on every database alias (replicas included) through
+    ``execute_wrapper``, so it works with ``DEBUG`` off.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        stats = {'queries': 0, 'seconds': 0.0}
+
+        def count_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                stats['queries'] += 1
+                stats['seconds'] += time.perf_counter() - start
+
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(count_query))
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else UNRESOLVED_VIEW
+        REQUEST_DB_QUERIES.labels(view).observe(stats['queries'])
+        REQUEST_DB_SECONDS.labels(view).observe(stats['seconds'])
+        return response
+
+
+_task_starts = {}
+
+
+def task_started(task_id):
+    _task_starts[task_id] = time.perf_counter()
+
+
+def task_finished(task_id, task, state):
+    """Observe the runtime of a task started in this process, by its delivery queue."""
+    start = _task_starts.pop(task_id, None)
+    if start is None:
+        return
+    delivery_info = getattr(task.request, 'delivery_info', None) or {}
+    queue = delivery_info.get('routing_key') or 'unknown'
+    CELERY_TASK_SECONDS.labels(task.name, queue, state or 'unknown').observe(time.perf_counter() - start)
+
+
+def start_metrics_server(port):
+    """Serve this process' metrics (all processes' in multiprocess mode) on ``port``."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        start_http_server(port, registry=registry)
+    else:
+        start_http_server(port)
+
+
+def mark_process_dead(pid):
+    """Drop the live gauges of a finished process in multiprocess mode."""
+    if os.environ.get('PROMETHEUS_MULTIPROC_DIR'):
+        from prometheus_client import multiprocess
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,156 @@
+"""
+Default pagination for the API.
+
+Every list is paginated and no page holds more than ``API_MAX_PAGE_SIZE``
+rows, whatever the client asks for:
+
+- ``BoundedLimitOffsetPagination`` (the default, ``?limit=&offset=``) for
+  small tables. ``count`` is only queried when the page doesn't already tell
+  it, and stops at ``API_COUNT_LIMIT`` rows (``null`` beyond), so big tables
+  are never fully counted.
+- ``TimeSeriesCursorPagination`` (``?cursor=&limit=``) for time series. Pages
+  are keyset queries on the view's ``cursor_ordering`` column, so deep pages
+  cost the same as the first one and no count is needed.
+
+Rows and rendered bytes per page are recorded as Prometheus metrics, by view.
+"""
+
+from collections import OrderedDict
+
+from django.conf import settings
+from prometheus_client import Counter, Histogram
+from rest_framework import pagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+PAGE_ROWS = Histogram(
+    'api_page_rows', 'Rows returned per paginated API response', ['view'],
+    buckets=(0, 1, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000),
+)
+PAGE_BYTES = Histogram(
+    'api_page_bytes', 'Rendered size of paginated API responses', ['view'],
+    buckets=(1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216),
+)
+PAGE_SIZE_CLAMPED = Counter(
+    'api_page_size_clamped_total', 'Page size requests above API_MAX_PAGE_SIZE', ['view'],
+)
+
+
+class PageMetricsMixin:
+    """Record rows and rendered bytes of each paginated response."""
+    limit_query_param = 'limit'
+
+    def clamp_page_size(self, request, default):
+        """Requested page size, at most ``API_MAX_PAGE_SIZE``."""
+        try:
+            size = int(request.query_params[self.limit_query_param])
+        except (KeyError, ValueError):
+            return default
+        if size <= 0:
+            return default
+        if size > settings.API_MAX_PAGE_SIZE:
+            PAGE_SIZE_CLAMPED.labels(self.view_name).inc()
+            return settings.API_MAX_PAGE_SIZE
+        return size
+
+    def metrics_response(self, data, rows):
+        PAGE_ROWS.labels(self.view_name).observe(rows)
+        response = Response(data)
+        response.add_post_render_callback(
+            lambda rendered: PAGE_BYTES.labels(self.view_name).observe(len(rendered.content))
+        )
+        return response
+
+
+class BoundedLimitOffsetPagination(PageMetricsMixin, pagination.LimitOffsetPagination):
+    """
+    Limit/offset pagination with a hard maximum page size and a lazy, capped count.
+    """
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view_name = type(view).__name__
+        self.request = request
+        self.limit = self.clamp_page_size(request, settings.API_PAGE_SIZE)
+        self.offset = self.get_offset(request)
+
+        # Offsets need a stable order
+        if not queryset.ordered:
+            queryset = queryset.order_by('pk')
+
+        # One extra row tells whether there is a next page without counting
+        rows = list(queryset[self.offset:self.offset + self.limit + 1])
+        self.has_next = len(rows) > self.limit
+        page = rows[:self.limit]
+
+        if not self.has_next and (page or self.offset == 0):
+            self.count = self.offset + len(page)
+        else:
+            self.count = self.get_count(queryset)
+
+        if (self.has_next or self.offset) and self.template is not None:
+            self.display_page_controls = True
+        return page
+
+    def get_count(self, queryset):
+        """Number of rows up to ``API_COUNT_LIMIT``, or None above it."""
+        count = queryset[:settings.API_COUNT_LIMIT + 1].count()
+        return count if count <= settings.API_COUNT_LIMIT else None
+
+    def get_paginated_response(self, data):
+        return self.metrics_response(OrderedDict([
+            ('count', self.count),
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]), len(data))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['nullable'] = True
+        return response_schema
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.limit_query_param, self.limit)
+        return replace_query_param(url, self.offset_query_param, self.offset + self.limit)
+
+    def get_previous_link(self):
+        if self.offset <= 0:
+            return None
+        url = replace_query_param(self.request.build_absolute_uri(), self.limit_query_param, self.limit)
+        if self.offset - self.limit <= 0:
+            return remove_query_param(url, self.offset_query_param)
+        return replace_query_param(url, self.offset_query_param, self.offset - self.limit)
+
+    def get_html_context(self):
+        return {
+            'previous_url': self.get_previous_link(),
+            'next_url': self.get_next_link(),
+            'page_links': [],
+        }
+
+
+class TimeSeriesCursorPagination(PageMetricsMixin, pagination.CursorPagination):
+    """
+    Keyset pagination ordered by the view's ``cursor_ordering`` (e.g. ``'-timestamp'``).
+    """
+    page_size_query_param = PageMetricsMixin.limit_query_param
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.view_name = type(view).__name__
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_page_size(self, request):
+        return self.clamp_page_size(request, settings.API_PAGE_SIZE)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', None) or self.ordering
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
+
+    def get_paginated_response(self, data):
+        return self.metrics_response(OrderedDict([
+            ('next', self.get_next_link()),
+            ('previous', self.get_previous_link()),
+            ('results', data)
+        ]), len(data))
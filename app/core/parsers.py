@@ -0,0 +1,24 @@
+"""
+orjson-backed JSON parser for request bodies.
+
+Selected with ``API_JSON_BACKEND`` (see ``REST_FRAMEWORK`` in settings).
+"""
+
+import orjson
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+
+class ORJSONParser(JSONParser):
+    """
+    Drop-in replacement for DRF's ``JSONParser`` built on orjson.
+
+    Bodies must be UTF-8, as JSON requires; NaN and Infinity are rejected
+    like with DRF's strict parsing.
+    """
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
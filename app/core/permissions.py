@@ -31,3 +31,8 @@ class HasViewerPermission(BasePermission):
             request.user.is_authenticated
             and request.user.access_level >= AccessLevels.VIEWER.value
         )
+
+
+class IsSuperuser(BasePermission):
+    def has_permission(self, request, view):
+        return request.user.is_authenticated and request.user.is_superuser
@@ -0,0 +1,285 @@
+"""
+Opt-in request profiling.
+
+With ``PROFILING_ENABLED``, ``RequestProfilingMiddleware`` profiles a random
+``PROFILING_SAMPLE_RATE`` share of requests, plus every request a superuser
+sends with the ``PROFILING_HEADER`` header. A trace holds:
+
+- the profiler output: a cumulative-time summary, and the full profile for
+  download (a pstats file with cProfile, a speedscope flamegraph with
+  pyinstrument, see ``PROFILING_BACKEND``);
+- every SQL query with its database alias and duration;
+- every Redis, RabbitMQ and InfluxDB operation (``core.metrics.time_client``).
+
+Only the ``PROFILING_TOP_N`` slowest traces of each view are kept in Redis,
+for ``PROFILING_TTL`` seconds. ``ProfileTraceViewSet`` lists and downloads them.
+"""
+
+import base64
+import cProfile
+import io
+import json
+import logging
+import marshal
+import pstats
+import random
+import time
+import uuid
+from contextlib import ExitStack
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core.metrics import UNRESOLVED_VIEW, client_calls
+
+logger = logging.getLogger(__name__)
+
+VIEWS_KEY = 'profiling:views'
+VIEW_KEY = 'profiling:view:{}'
+TRACE_KEY = 'profiling:trace:{}'
+PROFILE_KEY = 'profiling:profile:{}'
+
+# Lines of the cumulative-time summary stored with each trace
+SUMMARY_LINES = 40
+
+
+def _redis():
+    from core.clients.redis_client import RedisClient
+    return RedisClient().connection
+
+
+class CProfileProfiler:
+    """Deterministic profiler from the standard library; exports a pstats file."""
+    format = 'pstats'
+
+    def __init__(self):
+        self._profile = cProfile.Profile()
+
+    def start(self):
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+
+    def summary(self) -> str:
+        stream = io.StringIO()
+        pstats.Stats(self._profile, stream=stream).sort_stats('cumulative').print_stats(SUMMARY_LINES)
+        return stream.getvalue()
+
+    def export(self) -> bytes:
+        # Same content as Profile.dump_stats(), readable by pstats, snakeviz or flameprof
+        self._profile.create_stats()
+        return marshal.dumps(self._profile.stats)
+
+
+class PyinstrumentProfiler:
+    """Sampling profiler with low overhead; exports a speedscope flamegraph."""
+    format = 'speedscope'
+
+    def __init__(self):
+        from pyinstrument import Profiler
+        self._profiler = Profiler(interval=settings.PROFILING_INTERVAL, async_mode='disabled')
+
+    def start(self):
+        self._profiler.start()
+
+    def stop(self):
+        self._profiler.stop()
+
+    def summary(self) -> str:
+        return self._profiler.output_text(unicode=True, color=False)
+
+    def export(self) -> bytes:
+        from pyinstrument.renderers import SpeedscopeRenderer
+        return self._profiler.output(renderer=SpeedscopeRenderer()).encode()
+
+
+PROFILERS = {
+    'cprofile': CProfileProfiler,
+    'pyinstrument': PyinstrumentProfiler,
+}
+
+# Download file extension and content type of each profile format
+PROFILE_FORMATS = {
+    CProfileProfiler.format: ('prof', 'application/octet-stream'),
+    PyinstrumentProfiler.format: ('speedscope.json', 'application/json'),
+}
+
+
+def _is_superuser(request) -> bool:
+    """Whether the request is authenticated as a superuser, the way the API authenticates it."""
+    authenticators = [authentication() for authentication in api_settings.DEFAULT_AUTHENTICATION_CLASSES]
+    try:
+        user = Request(request, authenticators=authenticators).user
+    except APIException:
+        return False
+    return bool(user and user.is_superuser)
+
+
+class RequestProfilingMiddleware:
+    """
+    Profile sampled or explicitly requested requests and keep the slowest traces per view.
+
+    Storing a trace never fails the request: Redis errors are logged.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        trigger = self.get_trigger(request)
+        if trigger is None:
+            return self.get_response(request)
+        return self.profile(request, trigger)
+
+    def get_trigger(self, request) -> Optional[str]:
+        if not settings.PROFILING_ENABLED:
+            return None
+        if settings.PROFILING_HEADER in request.headers:
+            return 'header' if _is_superuser(request) else None
+        if settings.PROFILING_SAMPLE_RATE and random.random() < settings.PROFILING_SAMPLE_RATE:
+            return 'sample'
+        return None
+
+    def profile(self, request, trigger):
+        queries = []
+
+        def record_query(execute, sql, params, many, context):
+            start = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries.append({
+                    'alias': context['connection'].alias,
+                    'sql': sql,
+                    'many': many,
+                    'duration_ms': (time.perf_counter() - start) * 1000,
+                })
+
+        profiler = PROFILERS[settings.PROFILING_BACKEND]()
+        calls_token = client_calls.set([])
+        started_at = timezone.now()
+        start = time.perf_counter()
+        try:
+            profiler.start()
+        except (ValueError, RuntimeError) as e:
+            # Another profiler is already running in this thread
+            logger.warning(f"Request profiling skipped: {e}")
+            client_calls.reset(calls_token)
+            return self.get_response(request)
+
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(record_query))
+                response = self.get_response(request)
+        finally:
+            profiler.stop()
+            duration_ms = (time.perf_counter() - start) * 1000
+            calls = client_calls.get()
+            client_calls.reset(calls_token)
+
+        match = getattr(request, 'resolver_match', None)
+        user = getattr(request, 'user', None)
+        trace = {
+            'id': uuid.uuid4().hex,
+            'view': match.view_name if match else UNRESOLVED_VIEW,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'trigger': trigger,
+            'user_id': user.pk if user is not None and user.is_authenticated else None,
+            'started_at': started_at.isoformat(),
+            'duration_ms': duration_ms,
+            'sql_count': len(queries),
+            'sql_ms': sum(query['duration_ms'] for query in queries),
+            'sql': queries[:settings.PROFILING_MAX_QUERIES],
+            'client_ms': sum(call['duration_ms'] for call in calls),
+            'clients': calls,
+            'profile_format': profiler.format,
+            'profile_summary': profiler.summary(),
+        }
+        store_trace(trace, profiler.export())
+        return response
+
+
+def store_trace(trace: Dict, profile: bytes) -> bool:
+    """
+    Keep a trace if it is among the ``PROFILING_TOP_N`` slowest of its view.
+
+    Each view has a sorted set of trace ids scored by duration; the trace and
+    its (larger) profile are stored under separate keys, so listing traces
+    never loads profiles.
+    """
+    view_key = VIEW_KEY.format(trace['view'])
+    top_n = settings.PROFILING_TOP_N
+    ttl = settings.PROFILING_TTL
+    try:
+        conn = _redis()
+        if conn.zcard(view_key) >= top_n:
+            fastest = conn.zrange(view_key, 0, 0, withscores=True)
+            if fastest and fastest[0][1] >= trace['duration_ms']:
+                return False
+
+        pipe = conn.pipeline()
+        pipe.set(TRACE_KEY.format(trace['id']), json.dumps(trace), ex=ttl)
+        pipe.set(PROFILE_KEY.format(trace['id']), base64.b64encode(profile).decode(), ex=ttl)
+        pipe.zadd(view_key, {trace['id']: trace['duration_ms']})
+        pipe.expire(view_key, ttl)
+        pipe.sadd(VIEWS_KEY, trace['view'])
+        pipe.expire(VIEWS_KEY, ttl)
+        pipe.execute()
+
+        evicted = conn.zrange(view_key, 0, -(top_n + 1))
+        if evicted:
+            _delete_traces(conn, view_key, evicted)
+        return True
+    except Exception as e:
+        logger.error(f"Error storing profile trace for {trace['view']}: {e}")
+        return False
+
+
+def _delete_traces(conn, view_key, trace_ids):
+    pipe = conn.pipeline()
+    pipe.zrem(view_key, *trace_ids)
+    pipe.delete(*[TRACE_KEY.format(trace_id) for trace_id in trace_ids])
+    pipe.delete(*[PROFILE_KEY.format(trace_id) for trace_id in trace_ids])
+    pipe.execute()
+
+
+def list_traces(view: Optional[str] = None) -> List[Dict]:
+    """Stored traces, slowest first, without their SQL, client calls and profile summary."""
+    conn = _redis()
+    views = [view] if view else sorted(conn.smembers(VIEWS_KEY))
+    traces = []
+    for view_name in views:
+        view_key = VIEW_KEY.format(view_name)
+        trace_ids = conn.zrange(view_key, 0, -1, desc=True)
+        if not trace_ids:
+            continue
+        values = conn.mget([TRACE_KEY.format(trace_id) for trace_id in trace_ids])
+        expired = [trace_id for trace_id, value in zip(trace_ids, values) if value is None]
+        if expired:
+            conn.zrem(view_key, *expired)
+        for value in values:
+            if value is not None:
+                trace = json.loads(value)
+                for field in ('sql', 'clients', 'profile_summary'):
+                    trace.pop(field)
+                traces.append(trace)
+    return sorted(traces, key=lambda trace: trace['duration_ms'], reverse=True)
+
+
+def get_trace(trace_id: str) -> Optional[Dict]:
+    value = _redis().get(TRACE_KEY.format(trace_id))
+    return json.loads(value) if value else None
+
+
+def get_profile(trace_id: str) -> Optional[bytes]:
+    value = _redis().get(PROFILE_KEY.format(trace_id))
+    return base64.b64decode(value) if value else None
@@ -0,0 +1,39 @@
+"""
+orjson-backed JSON renderer for API responses.
+
+Selected with ``API_JSON_BACKEND`` (see ``REST_FRAMEWORK`` in settings).
+"""
+
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+# Line separators are valid JSON but not valid JavaScript, DRF escapes them too
+_LINE_SEPARATORS = ((b'\xe2\x80\xa8', b'\\u2028'), (b'\xe2\x80\xa9', b'\\u2029'))
+
+
+class ORJSONRenderer(JSONRenderer):
+    """
+    Drop-in replacement for DRF's ``JSONRenderer`` built on orjson.
+
+    Datetimes, dates, times and UUIDs are serialized natively; anything else
+    orjson doesn't know (decimals, lazy translations, querysets, generators)
+    goes through DRF's ``JSONEncoder.default``. Non-string dict keys are
+    allowed, as with ``json.dumps``. orjson only supports 2-space indentation,
+    which is used whenever an indent is requested.
+    """
+    _encoder = JSONEncoder()
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_UTC_Z
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            option |= orjson.OPT_INDENT_2
+
+        ret = orjson.dumps(data, default=self._encoder.default, option=option)
+        for separator, escaped in _LINE_SEPARATORS:
+            if separator in ret:
+                ret = ret.replace(separator, escaped)
+        return ret
@@ -5,29 +5,82 @@ from asyncio import sleep
 from channels.generic.websocket import AsyncWebsocketConsumer
 
 from channels.layers import get_channel_layer
+from core.metrics import WEBSOCKET_CONNECTIONS
+from core.ws_auth import JWT_SUBPROTOCOL
 from asgiref.sync import async_to_sync
 
 import json
 from enum import Enum
 
 
-class WebSocConsumer(AsyncWebsocketConsumer):
+# Superusers follow every garden through the global group
+LIVE_GROUP = "live"
+
+# Close codes for rejected connections (4000-4999 are application defined)
+WS_UNAUTHORIZED = 4401
+
+
+def garden_group(garden_id):
+    return f"garden_{garden_id}"
+
+
+class AuthenticatedConsumer(AsyncWebsocketConsumer):
+    """
+    Consumer that only accepts users authenticated by ``core.ws_auth``.
+
+    The JWT subprotocol is echoed back on accept, as browsers require.
+    Accepted sockets are counted in ``websocket_connections`` until they close.
+    """
+    counted = False
+
+    async def accept_user(self):
+        user = self.scope.get("user")
+        if user is None or not user.is_authenticated:
+            await self.close(code=WS_UNAUTHORIZED)
+            return None
+
+        subprotocols = self.scope.get("subprotocols") or []
+        await self.accept(subprotocol=JWT_SUBPROTOCOL if JWT_SUBPROTOCOL in subprotocols else None)
+        WEBSOCKET_CONNECTIONS.labels(type(self).__name__).inc()
+        self.counted = True
+        return user
+
+    async def websocket_disconnect(self, message):
+        if self.counted:
+            WEBSOCKET_CONNECTIONS.labels(type(self).__name__).dec()
+            self.counted = False
+        await super().websocket_disconnect(message)
+
+
+class WebSocConsumer(AuthenticatedConsumer):
+    """
+    Live garden updates. Sockets join the group of each garden the user has
+    access to (resolved once at connect), superusers the global group; the
+    base consumer leaves ``self.groups`` on disconnect.
+    """
+
     async def connect(self):
-        await self.channel_layer.group_add("live", self.channel_name)
-        await self.accept()
+        user = await self.accept_user()
+        if user is None:
+            return
 
-    async def disconnect(self, event):
-        await self.channel_layer.group_discard("live", self.channel_name)
+        if user.is_superuser:
+            self.groups = [LIVE_GROUP]
+        else:
+            self.groups = [garden_group(garden_id) for garden_id in user.garden_roles]
+        for group in self.groups:
+            await self.channel_layer.group_add(group, self.channel_name)
 
     async def send_data(self, event):
         text_message = event.get("text", "")
         await self.send(text_data=json.dumps({"message": text_message}))
 
 
-class WebSocConsumerNotif(AsyncWebsocketConsumer):
+class WebSocConsumerNotif(AuthenticatedConsumer):
     async def connect(self):
+        if await self.accept_user() is None:
+            return
         await self.channel_layer.group_add("notif", self.channel_name)
-        await self.accept()
 
     async def disconnect(self, event):
         await self.channel_layer.group_discard("notif", self.channel_name)
@@ -65,7 +118,15 @@ class webSocTag(Enum):
 def send_data_on_ws_live(tag, pigeon, data):
     meta = {"tag": tag.value,"pigeon":pigeon ,"data": data}
     async_to_sync(channel_layer.group_send)(
-        'live', {'type': "send_data", "text": meta})
+        LIVE_GROUP, {'type': "send_data", "text": meta})
+
+
+def send_data_on_ws_garden(garden_id, tag, pigeon, data):
+    """Send a live update to the users of one garden (and to superusers)."""
+    meta = {"tag": tag.value, "pigeon": pigeon, "garden": garden_id, "data": data}
+    for group in (garden_group(garden_id), LIVE_GROUP):
+        async_to_sync(channel_layer.group_send)(
+            group, {'type': "send_data", "text": meta})
 
 
 def send_data_on_ws_notif(pigeon, data):
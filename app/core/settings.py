@@ -93,9 +93,13 @@ INSTALLED_APPS = [
     'users.apps.UsersConfig',
     'rest_framework.authtoken',
     'djoser',
+    # metrics on /metrics
+    'django_prometheus',
 ]
 
 MIDDLEWARE = [
+    # Outermost, so request latency covers the whole middleware stack
+    'django_prometheus.middleware.PrometheusBeforeMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -104,6 +108,10 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'core.db_router.PrimaryStickinessMiddleware',
+    'core.metrics.RequestDBMetricsMiddleware',
+    'core.profiling.RequestProfilingMiddleware',
+    'django_prometheus.middleware.PrometheusAfterMiddleware',
 ]
 
 # ===================================================
@@ -126,11 +134,50 @@ CSRF_TRUSTED_ORIGINS.extend(CORS_ALLOWED_ORIGINS)
 # ===================================================
 AUTH_USER_MODEL = 'users.User'
 
+# JSON library rendering API responses and parsing request bodies:
+# "orjson" (core.renderers / core.parsers) or "json" (stdlib, DRF's default)
+API_JSON_BACKEND = os.getenv('API_JSON_BACKEND', 'orjson')
+JSON_BACKENDS = {
+    'orjson': ('core.renderers.ORJSONRenderer', 'core.parsers.ORJSONParser'),
+    'json': ('rest_framework.renderers.JSONRenderer', 'rest_framework.parsers.JSONParser'),
+}
+JSON_RENDERER, JSON_PARSER = JSON_BACKENDS[API_JSON_BACKEND]
+
+# Opt-in request profiling (core.profiling): a random share of requests, and
+# superuser requests carrying PROFILING_HEADER, are profiled with
+# PROFILING_BACKEND ('cprofile' or 'pyinstrument'); the PROFILING_TOP_N slowest
+# traces per view are kept in Redis for PROFILING_TTL seconds
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', '0') == '1'
+PROFILING_SAMPLE_RATE = float(os.getenv('PROFILING_SAMPLE_RATE', 0))
+PROFILING_HEADER = os.getenv('PROFILING_HEADER', 'X-Profile')
+PROFILING_BACKEND = os.getenv('PROFILING_BACKEND', 'cprofile')
+PROFILING_INTERVAL = float(os.getenv('PROFILING_INTERVAL', 0.001))
+PROFILING_TOP_N = int(os.getenv('PROFILING_TOP_N', 10))
+PROFILING_TTL = int(os.getenv('PROFILING_TTL', 60 * 60 * 24 * 7))
+PROFILING_MAX_QUERIES = int(os.getenv('PROFILING_MAX_QUERIES', 500))
+
+# Pagination of every API list (core.pagination): default rows per page, hard
+# maximum whatever the client asks, and rows counted before ``count`` is null
+API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 1000))
+API_COUNT_LIMIT = int(os.getenv('API_COUNT_LIMIT', 10000))
+
 REST_FRAMEWORK = {
     'COERCE_DECIMAL_TO_STRING': False,
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.BoundedLimitOffsetPagination',
+    'PAGE_SIZE': API_PAGE_SIZE,
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_RENDERER_CLASSES': (
+        JSON_RENDERER,
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
+    'DEFAULT_PARSER_CLASSES': (
+        JSON_PARSER,
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ),
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'core.authentication.StatelessJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
     ),
@@ -140,8 +187,20 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('JWT',),
     'ACCESS_TOKEN_LIFETIME': timedelta(days=1),
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
+    'TOKEN_OBTAIN_SERIALIZER': 'users.tokens.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'users.tokens.ClaimsTokenRefreshSerializer',
 }
 
+# Embed role, superuser flag and garden roles in access tokens and authenticate
+# read requests from those claims, checked against a per-user revocation
+# version in Redis, instead of loading the user row (users.tokens)
+JWT_STATELESS_USERS = os.environ.get('JWT_STATELESS_USERS', '0') == '1'
+
+# Claims cached (in Redis and per process) for websocket authorization; entries
+# are keyed by the revocation version, so the TTL only bounds memory
+AUTH_CLAIMS_CACHE_TTL = int(os.getenv('AUTH_CLAIMS_CACHE_TTL', 3600))
+AUTH_CLAIMS_LOCAL_CACHE_SIZE = int(os.getenv('AUTH_CLAIMS_LOCAL_CACHE_SIZE', 10000))
+
 DJOSER = {
     'LOGIN_FIELD': 'email',
     'USER_CREATE_PASSWORD_RETYPE': True,
@@ -202,6 +261,27 @@ DATABASES = {
     }
 }
 
+# Database connection reuse
+# 'persistent': each thread keeps its connection for DB_CONN_MAX_AGE seconds,
+#   health-checked before reuse
+# 'pooled': connections are returned to a process-wide pool after each request
+#   (core.db_backends.mysql_pooled); preferred under ASGI, where requests run
+#   on executor threads
+# 'per-request': connect and disconnect on every request
+DB_CONN_MODE = os.environ.get('DB_CONN_MODE', 'persistent')
+if DB_CONN_MODE == 'persistent':
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+elif DB_CONN_MODE == 'pooled' and DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+    DATABASES['default']['ENGINE'] = 'core.db_backends.mysql_pooled'
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+    DATABASES['default']['POOL'] = {
+        'SIZE': int(os.environ.get('DB_POOL_SIZE', 10)),
+        'MAX_OVERFLOW': int(os.environ.get('DB_POOL_MAX_OVERFLOW', 10)),
+        'TIMEOUT': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+        'RECYCLE': int(os.environ.get('DB_POOL_RECYCLE', 3600)),
+    }
+
 # Use SQLite for testing to avoid MySQL connection issues
 if 'test' in sys.argv or 'test_coverage' in sys.argv:
     DATABASES['default'] = {
@@ -212,6 +292,22 @@ if 'test' in sys.argv or 'test_coverage' in sys.argv:
         },
     }
 
+# Read replica for the analytics endpoints (core.db_router); reads stay on the
+# primary for DB_REPLICA_STICKY_SECONDS after a user's write. Locally, two
+# SQLite files work too: DB_NAME=/tmp/primary.db DB_REPLICA_NAME=/tmp/replica.db
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+DB_REPLICA_NAME = os.environ.get('DB_REPLICA_NAME')
+DB_REPLICA_STICKY_SECONDS = int(os.environ.get('DB_REPLICA_STICKY_SECONDS', 5))
+if (DB_REPLICA_HOST or DB_REPLICA_NAME) and not ('test' in sys.argv or 'test_coverage' in sys.argv):
+    DATABASES['replica'] = dict(
+        DATABASES['default'],
+        HOST=DB_REPLICA_HOST or DATABASES['default']['HOST'],
+        PORT=os.environ.get('DB_REPLICA_PORT', DATABASES['default']['PORT']),
+        NAME=DB_REPLICA_NAME or DATABASES['default']['NAME'],
+        TEST={'MIRROR': 'default'},
+    )
+DATABASE_ROUTERS = ['core.db_router.ReplicaRouter']
+
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
 
@@ -307,6 +403,35 @@ CELERY_TASK_QUEUES = {
     },
 }
 
+# Worker sizing per queue. High priority workers prefetch a single message so a
+# device command is never stuck behind tasks already buffered by a busy process.
+CELERY_QUEUE_WORKERS = {
+    'high_priority': {
+        'concurrency': int(os.environ.get('CELERY_HIGH_PRIORITY_CONCURRENCY', 4)),
+        'prefetch_multiplier': int(os.environ.get('CELERY_HIGH_PRIORITY_PREFETCH', 1)),
+    },
+    'default': {
+        'concurrency': int(os.environ.get('CELERY_DEFAULT_CONCURRENCY', 4)),
+        'prefetch_multiplier': int(os.environ.get('CELERY_DEFAULT_PREFETCH', 4)),
+    },
+    'low_priority': {
+        'concurrency': int(os.environ.get('CELERY_LOW_PRIORITY_CONCURRENCY', 2)),
+        'prefetch_multiplier': int(os.environ.get('CELERY_LOW_PRIORITY_PREFETCH', 16)),
+    },
+}
+
+# Task state index in Redis, maintained from worker signals. States expire
+# after CELERY_TASK_STATE_TTL seconds; beat refreshes its heartbeat key every
+# tick and is considered down once the key is older than CELERY_BEAT_HEARTBEAT_TTL.
+CELERY_TASK_STATE_TTL = int(os.environ.get('CELERY_TASK_STATE_TTL', 60 * 60 * 24))
+CELERY_BEAT_HEARTBEAT_TTL = int(os.environ.get('CELERY_BEAT_HEARTBEAT_TTL', 60))
+
+# Port on which each Celery worker serves its Prometheus metrics (0 disables);
+# the web process serves them on /metrics (see core.metrics)
+CELERY_METRICS_PORT = int(os.environ.get('CELERY_METRICS_PORT', 0))
+# Client addresses or CIDRs allowed to read /metrics; everyone else gets a 404
+METRICS_ALLOWED_NETWORKS = os.environ.get('METRICS_ALLOWED_NETWORKS', '127.0.0.1,::1').split(',')
+
 # RabbitMQ Settings
 RABBITMQ_HOST = os.environ.get('RABBITMQ_HOST', 'broker')
 RABBITMQ_PORT = int(os.environ.get('RABBITMQ_PORT', 5672))
@@ -317,17 +442,136 @@ RABBITMQ_VHOST = os.environ.get('RABBITMQ_VHOST', '/')
 # Construct Broker URL
 CELERY_BROKER_URL = f'amqp://{RABBITMQ_USER}:{RABBITMQ_PASS}@{RABBITMQ_HOST}:{RABBITMQ_PORT}/{RABBITMQ_VHOST}'
 
+# Redis Settings
+REDIS_HOST = os.environ.get('REDIS_HOST', 'redis')
+REDIS_PORT = int(os.environ.get('REDIS_PORT', 6379))
+
+# Django cache
+# 'tiered' reads through a per-process local-memory L1 (CACHE_LOCAL_TIMEOUT
+# seconds) into Redis; 'redis' and 'local' use a single tier. Tests always use
+# local memory. See core.utils.cache for key versioning and stampede protection.
+CACHE_MODE = os.environ.get('CACHE_MODE', 'tiered')
+CACHE_REDIS_DB = int(os.environ.get('CACHE_REDIS_DB', 2))
+CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT', 300))
+CACHE_LOCAL_TIMEOUT = int(os.environ.get('CACHE_LOCAL_TIMEOUT', 5))
+if 'test' in sys.argv or 'test_coverage' in sys.argv:
+    CACHE_MODE = 'local'
+
+CACHES = {
+    'local': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'smart-garden-l1',
+        'TIMEOUT': CACHE_LOCAL_TIMEOUT if CACHE_MODE == 'tiered' else CACHE_DEFAULT_TIMEOUT,
+        'OPTIONS': {'MAX_ENTRIES': int(os.environ.get('CACHE_LOCAL_MAX_ENTRIES', 10000))},
+    },
+    'redis': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': f'redis://{REDIS_HOST}:{REDIS_PORT}/{CACHE_REDIS_DB}',
+        'TIMEOUT': CACHE_DEFAULT_TIMEOUT,
+        'KEY_PREFIX': 'smart-garden',
+        'OPTIONS': {'socket_connect_timeout': 1, 'socket_timeout': 1},
+    },
+}
+if CACHE_MODE == 'tiered':
+    CACHES['default'] = {
+        'BACKEND': 'core.utils.cache.TieredCache',
+        'TIMEOUT': CACHE_DEFAULT_TIMEOUT,
+        'OPTIONS': {'L1': 'local', 'L2': 'redis', 'L1_TIMEOUT': CACHE_LOCAL_TIMEOUT},
+    }
+else:
+    CACHES['default'] = CACHES[CACHE_MODE]
+
 # Result Backend Settings
-CELERY_RESULT_BACKEND = 'django-db'
+# 'django-db' stores results in the main database through django_celery_results;
+# 'redis' keeps them in Redis where they expire on their own after
+# CELERY_RESULT_EXPIRES seconds. Leftover database rows are purged daily.
+CELERY_RESULT_BACKEND_MODE = os.environ.get('CELERY_RESULT_BACKEND_MODE', 'django-db')
+CELERY_RESULT_REDIS_DB = int(os.environ.get('CELERY_RESULT_REDIS_DB', 1))
+if CELERY_RESULT_BACKEND_MODE == 'redis':
+    CELERY_RESULT_BACKEND = f'redis://{REDIS_HOST}:{REDIS_PORT}/{CELERY_RESULT_REDIS_DB}'
+else:
+    CELERY_RESULT_BACKEND = 'django-db'
+CELERY_RESULT_EXPIRES = int(os.environ.get('CELERY_RESULT_EXPIRES', 60 * 60 * 24))
+CELERY_RESULT_PURGE_BATCH_SIZE = int(os.environ.get('CELERY_RESULT_PURGE_BATCH_SIZE', 1000))
+# Celery's cache-based features use the Django cache (CACHES['default'])
 CELERY_CACHE_BACKEND = 'django-cache'
 
+# Fire-and-forget tasks whose return value nobody reads. They store no result;
+# their state is still available from the task state index.
+CELERY_IGNORE_RESULT_TASKS = [
+    'tasks.tasks.write_system_logs',
+    'tasks.tasks.purge_system_logs',
+    'tasks.tasks.purge_task_results',
+    'tasks.tasks.auto_close_valve',
+    'tasks.tasks.run_schedule',
+    'tasks.tasks.control_valve',
+    'tasks.tasks.control_pump',
+    'tasks.tasks.flush_batch',
+    'tasks.tasks.sweep_batches',
+]
+
+# SystemLog sink: 'sync' writes each event inline, 'async' batches them in-process,
+# 'celery' batches them and ships each batch to the low_priority queue, 'batched'
+# collects them per garden in Redis across processes (tasks.batching)
+SYSTEM_LOG_SINK = os.environ.get('SYSTEM_LOG_SINK', 'sync')
+SYSTEM_LOG_BATCH_SIZE = int(os.environ.get('SYSTEM_LOG_BATCH_SIZE', 100))
+SYSTEM_LOG_FLUSH_INTERVAL_MS = int(os.environ.get('SYSTEM_LOG_FLUSH_INTERVAL_MS', 500))
+
+# SystemLog retention: default TTL (gardens can override), delete batch size and
+# optional archive target for expired rows ('ndjson', 'influx' or empty)
+SYSTEM_LOG_RETENTION_DAYS = int(os.environ.get('SYSTEM_LOG_RETENTION_DAYS', 90))
+SYSTEM_LOG_PURGE_BATCH_SIZE = int(os.environ.get('SYSTEM_LOG_PURGE_BATCH_SIZE', 1000))
+SYSTEM_LOG_ARCHIVE = os.environ.get('SYSTEM_LOG_ARCHIVE', '')
+SYSTEM_LOG_ARCHIVE_DIR = os.environ.get('SYSTEM_LOG_ARCHIVE_DIR', os.path.join(MEDIA_ROOT, 'log-archive'))
+
+# Close open valves automatically once their duration has elapsed
+VALVE_AUTO_CLOSE = os.environ.get('VALVE_AUTO_CLOSE', '1') == '1'
+
 # Flower settings
 FLOWER_BASE_URL = os.getenv('FLOWER_BASE_URL', 'http://celery:6666/flower')
 
+# Outbound HTTP clients (core.clients.http_client): (connect, read) timeouts,
+# retries with backoff for idempotent requests and circuit breaker thresholds.
+# HTTP_CLIENTS overrides the defaults per upstream.
+HTTP_CLIENT_DEFAULTS = {
+    'timeout': (
+        float(os.getenv('HTTP_CONNECT_TIMEOUT', 3.05)),
+        float(os.getenv('HTTP_READ_TIMEOUT', 10)),
+    ),
+    'retries': int(os.getenv('HTTP_RETRIES', 2)),
+    'backoff_factor': float(os.getenv('HTTP_BACKOFF_FACTOR', 0.3)),
+    'pool_maxsize': int(os.getenv('HTTP_POOL_MAXSIZE', 10)),
+    'failure_threshold': int(os.getenv('HTTP_CIRCUIT_FAILURE_THRESHOLD', 5)),
+    'reset_timeout': float(os.getenv('HTTP_CIRCUIT_RESET_TIMEOUT', 30)),
+}
+HTTP_CLIENTS = {
+    'supernova': {},
+    'sso': {},
+    'rabbitmq': {'retries': 0},
+}
+
+# SSO settings. Validated tokens are cached in Redis until they expire (capped at
+# SSO_TOKEN_EXPIRY) and per process for up to SSO_LOCAL_CACHE_TTL seconds;
+# rejected tokens are remembered for SSO_NEGATIVE_CACHE_TTL seconds.
+SSO_URL = os.getenv('SSO_URL', 'http://localhost/oauth')
+SSO_TOKEN_EXPIRY = int(os.getenv('SSO_TOKEN_EXPIRY', 3600))
+SSO_NEGATIVE_CACHE_TTL = int(os.getenv('SSO_NEGATIVE_CACHE_TTL', 60))
+SSO_LOCAL_CACHE_TTL = int(os.getenv('SSO_LOCAL_CACHE_TTL', 60))
+SSO_LOCAL_CACHE_SIZE = int(os.getenv('SSO_LOCAL_CACHE_SIZE', 10000))
+SSO_TIMEOUT = float(os.getenv('SSO_TIMEOUT', 5))
+
 # Supernova API settings
 SUPERNOVA_BASE_URL = os.getenv('SUPERNOVA_BASE_URL', 'https://fc.digikala.com')
 SUPERNOVA_API_KEY = os.getenv('SUPERNOVA_API_KEY')
 SUPERNOVA_AUTH_TOKEN = os.getenv('SUPERNOVA_AUTH_TOKEN')
+# Parallel holder inquiries (keep at or below HTTP_POOL_MAXSIZE) and how long
+# holder lookups and the ready-holders map are cached, in seconds
+SUPERNOVA_CONCURRENCY = int(os.getenv('SUPERNOVA_CONCURRENCY', 8))
+SUPERNOVA_CACHE_TTL = int(os.getenv('SUPERNOVA_CACHE_TTL', 30))
+
+# Seconds rendered garden read responses stay cached in Redis under their ETag
+# (0 keeps ETags/304s but disables the body cache); see garden.http_cache
+GARDEN_RESPONSE_CACHE_TTL = int(os.getenv('GARDEN_RESPONSE_CACHE_TTL', 300))
 
 # Local network settings
 LOCAL_IP = os.getenv('LOCAL_IP', 'localhost')
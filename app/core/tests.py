@@ -2,11 +2,12 @@
 Tests for core Django functionality including migrations and setup.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.core.management import call_command
 from django.db import connection
 from django.db.migrations.executor import MigrationExecutor
 import io
+import json
 import sys
 
 
@@ -138,4 +139,897 @@ class DatabaseConstraintTest(TestCase):
         
         # Try to create second valve with same number in same garden
         with self.assertRaises(IntegrityError):
-            Valve.objects.create(garden=garden, number=1, status='off') 
\ No newline at end of file
+            Valve.objects.create(garden=garden, number=1, status='off') 
+
+
+class BenchmarkHelpersTest(TestCase):
+    """Test the latency summary helpers used by the benchmark commands."""
+
+    def test_summarize(self):
+        from core.utils.benchmark import percentile, summarize
+
+        samples = [float(n) for n in range(1, 101)]
+        summary = summarize(samples)
+
+        self.assertEqual(summary['count'], 100)
+        self.assertEqual(summary['p50'], 50.0)
+        self.assertEqual(summary['p99'], 99.0)
+        self.assertEqual(summary['max'], 100.0)
+        self.assertEqual(percentile([], 95), 0.0)
+        self.assertEqual(summarize([]), {'count': 0})
+
+    def test_compare_to_baseline(self):
+        from core.utils.benchmark import compare_to_baseline
+
+        baseline = {'logs': {'p95': 10.0, 'queries': 2.0, 'rps': 100.0}}
+        self.assertEqual(compare_to_baseline(
+            {'logs': {'p95': 12.0, 'queries': 2.0, 'rps': 80.0}, 'new': {'p95': 50.0}}, baseline, 0.25
+        ), [])
+        self.assertEqual(compare_to_baseline(
+            {'logs': {'p95': 13.0, 'queries': 3.0, 'rps': 70.0}}, baseline, 0.25
+        ), [
+            'logs p95: 13.00 (baseline 10.00)',
+            'logs queries: 3.00 (baseline 2.00)',
+            'logs rps: 70.00 (baseline 100.00)',
+        ])
+
+    def test_count_queries(self):
+        from django.contrib.auth import get_user_model
+        from core.utils.benchmark import count_queries
+
+        with count_queries() as stats:
+            get_user_model().objects.count()
+            get_user_model().objects.exists()
+        self.assertEqual(stats['queries'], 2)
+
+
+class TTLCacheTest(TestCase):
+    """Test the in-process LRU/TTL cache."""
+
+    def test_lru_eviction_and_expiry(self):
+        from unittest.mock import patch
+        from core.utils.cache import TTLCache
+
+        cache = TTLCache(maxsize=2, ttl=10)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertIn('c', cache)
+
+        with patch('core.utils.cache.time.monotonic', return_value=10 ** 9):
+            self.assertIsNone(cache.get('a'))
+
+        cache.set('d', 4, ttl=0)
+        self.assertNotIn('d', cache)
+
+
+class SSOAuthenticationTest(TestCase):
+    """Test SSO token validation caching."""
+
+    def setUp(self):
+        from unittest.mock import MagicMock, patch
+        from core.authentication import clear_local_caches
+
+        clear_local_caches()
+        self.addCleanup(clear_local_caches)
+
+        self.redis_store = {}
+        redis = MagicMock()
+        redis.get_dict.side_effect = lambda key: (
+            json.loads(self.redis_store[key]) if key in self.redis_store else None
+        )
+        redis.set_with_expiry.side_effect = lambda key, value, ttl: self.redis_store.update({key: value})
+        patcher = patch('core.authentication.RedisClient', return_value=redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        patcher = patch('core.authentication.get_http_client')
+        self.sso_get = patcher.start().return_value.get
+        self.addCleanup(patcher.stop)
+        self.profile = {'email': 'sso@example.com', 'name': 'Sso User', 'access_level': 'manager'}
+        self.sso_get.return_value = MagicMock(status_code=200, json=lambda: dict(self.profile))
+
+    def authenticate(self, token='opaque-token'):
+        from django.test import RequestFactory
+        from core.authentication import SSOAuthentication
+
+        request = RequestFactory().get('/', HTTP_AUTHORIZATION=f'Bearer {token}')
+        return SSOAuthentication().authenticate(request)
+
+    def test_valid_token_is_cached_in_both_tiers(self):
+        from core.authentication import clear_local_caches
+
+        user, _ = self.authenticate()
+        self.assertEqual((user.email, user.first_name, user.last_name, user.role),
+                         ('sso@example.com', 'Sso', 'User', 'manager'))
+        self.assertEqual(len(self.redis_store), 1)
+        self.assertNotIn('opaque-token', next(iter(self.redis_store)))
+
+        # Process cache hit: no SSO call and no queries
+        with self.assertNumQueries(0):
+            self.assertEqual(self.authenticate()[0], user)
+
+        # Another process: served from Redis
+        clear_local_caches()
+        self.authenticate()
+        self.assertEqual(self.sso_get.call_count, 1)
+
+    def test_invalid_token_is_negatively_cached(self):
+        from unittest.mock import MagicMock
+        from rest_framework.exceptions import AuthenticationFailed
+
+        self.sso_get.return_value = MagicMock(status_code=401)
+        for _ in range(2):
+            with self.assertRaises(AuthenticationFailed):
+                self.authenticate('bad-token')
+        self.assertEqual(self.sso_get.call_count, 1)
+
+    def test_server_errors_are_not_cached(self):
+        from unittest.mock import MagicMock
+        from rest_framework.exceptions import AuthenticationFailed
+
+        self.sso_get.return_value = MagicMock(status_code=502)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+        self.assertEqual(self.redis_store, {})
+
+    def test_cache_ttl_follows_token_expiry(self):
+        import base64
+        import time
+        from core.authentication import token_ttl
+
+        def jwt(exp):
+            payload = base64.urlsafe_b64encode(json.dumps({'exp': exp}).encode()).decode().rstrip('=')
+            return f"header.{payload}.signature"
+
+        self.assertAlmostEqual(token_ttl(jwt(time.time() + 120)), 120, delta=2)
+        self.assertEqual(token_ttl(jwt(time.time() + 10 ** 6)), 3600)
+        self.assertEqual(token_ttl(jwt(time.time() - 5)), 0)
+        self.assertEqual(token_ttl('opaque-token'), 3600)
+
+    def test_user_sync_skipped_while_profile_unchanged(self):
+        self.authenticate('first-token')
+
+        # New token, same profile: validated again but the user is not touched
+        with self.assertNumQueries(0):
+            self.authenticate('second-token')
+
+        self.profile['name'] = 'Renamed User'
+        user, _ = self.authenticate('third-token')
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, 'Renamed')
+
+    def test_cached_user_is_not_shared_between_requests(self):
+        first, _ = self.authenticate('first-token')
+        second, _ = self.authenticate('second-token')
+
+        self.assertIsNot(first, second)
+        self.assertEqual(second.pk, first.pk)
+        self.assertFalse(second._state.adding)
+        first.role = 'admin'
+        self.assertEqual(self.authenticate('third-token')[0].role, 'manager')
+
+    def test_inactive_user_is_rejected(self):
+        from django.contrib.auth import get_user_model
+        from rest_framework.exceptions import AuthenticationFailed
+
+        get_user_model().objects.create_user(email='sso@example.com', is_active=False)
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate()
+
+
+class HTTPClientTest(TestCase):
+    """Test the pooled outbound HTTP client."""
+
+    def setUp(self):
+        from unittest.mock import MagicMock, patch
+        from core.clients.http_client import HTTPClient
+
+        self.client = HTTPClient('test', timeout=(1, 2), failure_threshold=2, reset_timeout=30)
+        patcher = patch.object(self.client.session, 'request')
+        self.send = patcher.start()
+        self.addCleanup(patcher.stop)
+        self.send.return_value = MagicMock(status_code=200)
+
+    def test_requests_use_default_timeout_and_record_metrics(self):
+        self.client.get('http://upstream/items/1', endpoint='item')
+        self.client.get('http://upstream/items/2', endpoint='item')
+
+        self.assertEqual(self.send.call_args.kwargs['timeout'], (1, 2))
+        metrics = self.client.metrics()['item']
+        self.assertEqual((metrics['requests'], metrics['errors'], metrics['count']), (2, 0, 2))
+        self.assertIn('p95', metrics)
+
+    def test_circuit_opens_after_consecutive_failures(self):
+        import requests
+        from unittest.mock import MagicMock, patch
+        from core.clients.http_client import CircuitOpenError
+
+        self.send.side_effect = requests.ConnectTimeout("slow upstream")
+        for _ in range(2):
+            with self.assertRaises(requests.ConnectTimeout):
+                self.client.get('http://upstream/')
+
+        # Open: fail fast without touching the network
+        with self.assertRaises(CircuitOpenError):
+            self.client.get('http://upstream/')
+        self.assertEqual(self.send.call_count, 2)
+
+        # Half-open after the reset timeout: one successful trial closes it
+        self.send.side_effect = None
+        self.send.return_value = MagicMock(status_code=200)
+        with patch('core.clients.http_client.time.monotonic', return_value=10 ** 9):
+            self.client.get('http://upstream/')
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+    def test_unexpected_error_ends_the_trial_call(self):
+        from unittest.mock import MagicMock, patch
+        from core.clients.http_client import CircuitOpenError
+
+        self.send.return_value = MagicMock(status_code=503)
+        self.client.get('http://upstream/')
+        self.client.get('http://upstream/')
+
+        with patch('core.clients.http_client.time.monotonic', return_value=10 ** 9):
+            self.send.side_effect = UnicodeError("bad header")
+            with self.assertRaises(UnicodeError):
+                self.client.get('http://upstream/')
+            self.assertEqual(self.client.metrics()['GET']['errors'], 3)
+
+        # The failed trial reopened the circuit; the next one is let through
+        with self.assertRaises(CircuitOpenError):
+            self.client.get('http://upstream/')
+        self.send.side_effect = None
+        self.send.return_value = MagicMock(status_code=200)
+        with patch('core.clients.http_client.time.monotonic', return_value=2 * 10 ** 9):
+            self.client.get('http://upstream/')
+        self.assertEqual(self.client.breaker.state, 'closed')
+
+    def test_server_errors_count_as_failures(self):
+        from unittest.mock import MagicMock
+
+        self.send.return_value = MagicMock(status_code=503)
+        self.client.get('http://upstream/')
+        self.client.get('http://upstream/')
+
+        self.assertEqual(self.client.breaker.state, 'open')
+        self.assertEqual(self.client.metrics()['GET']['errors'], 2)
+
+
+class SupernovaClientTest(TestCase):
+    """Test cached and concurrent Supernova lookups."""
+
+    def setUp(self):
+        from unittest.mock import patch
+        from core.utils.supernova import clear_caches
+
+        clear_caches()
+        self.addCleanup(clear_caches)
+        patcher = patch('core.utils.supernova.get_http_client')
+        self.http_get = patcher.start().return_value.get
+        self.addCleanup(patcher.stop)
+
+    def test_inquire_holders_keeps_input_order(self):
+        import re
+        import threading
+        import time
+        from unittest.mock import MagicMock
+        from core.utils.supernova import inquire_holders
+
+        in_flight, peak = [0], [0]
+        lock = threading.Lock()
+
+        def respond(url, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                peak[0] = max(peak[0], in_flight[0])
+            time.sleep(0.02)
+            with lock:
+                in_flight[0] -= 1
+            holder = re.search(r'/holder/(\w+)/', url).group(1)
+            if holder == 'H3':
+                return MagicMock(status_code=404, text='not found')
+            return MagicMock(status_code=200, json=lambda: {'result': {'pigeon': int(holder[1:])}})
+
+        self.http_get.side_effect = respond
+
+        results = inquire_holders(['H1', 'H2', 'H3', 'H4', 'H1'], max_workers=2)
+
+        self.assertEqual(results[:2], [(True, 1), (True, 2)])
+        self.assertFalse(results[2][0])
+        self.assertEqual(results[3:], [(True, 4), (True, 1)])
+        self.assertEqual(self.http_get.call_count, 4)
+        self.assertLessEqual(peak[0], 2)
+
+        # Successful lookups are cached, failures are retried
+        inquire_holders(['H1', 'H3'])
+        self.assertEqual(self.http_get.call_count, 5)
+
+    def test_active_baskets_are_cached(self):
+        from unittest.mock import MagicMock
+        from core.utils.supernova import get_active_basket_dict
+
+        self.http_get.return_value = MagicMock(
+            json=lambda: {'holders': [{'holder_code': 'H1', 'pigeon_id': '7'}]}
+        )
+
+        self.assertEqual(get_active_basket_dict(), {'H1': '7'})
+        self.assertEqual(get_active_basket_dict(), {'H1': '7'})
+        self.assertEqual(self.http_get.call_count, 1)
+
+        get_active_basket_dict(refresh=True)
+        self.assertEqual(self.http_get.call_count, 2)
+
+
+class WebsocketAuthTest(TestCase):
+    """Test cases for JWT websocket authentication and garden groups."""
+    
+    def setUp(self):
+        from unittest.mock import patch
+        from django.contrib.auth import get_user_model
+        from garden.models import Garden, GardenAccess
+        from users.test_security import FakeVersionStore
+        from users.tokens import _claims_cache
+        
+        self.store = FakeVersionStore()
+        patcher = patch('users.tokens._redis', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        _claims_cache.clear()
+        
+        User = get_user_model()
+        self.user = User.objects.create_user(email='ws@example.com', password='securepass123')
+        self.garden = Garden.objects.create(name="Member Garden")
+        self.other_garden = Garden.objects.create(name="Other Garden")
+        self.access = GardenAccess.objects.create(user=self.user, garden=self.garden, role='staff')
+        
+        from rest_framework_simplejwt.tokens import AccessToken
+        self.token = str(AccessToken.for_user(self.user))
+    
+    def _communicator(self, path, **kwargs):
+        from channels.testing import WebsocketCommunicator
+        from core.routing import ws_urlpatterns
+        from core.ws_auth import JWTAuthMiddleware
+        from channels.routing import URLRouter
+        
+        return WebsocketCommunicator(JWTAuthMiddleware(URLRouter(ws_urlpatterns)), path, **kwargs)
+    
+    async def test_rejects_anonymous_connections(self):
+        """Test that sockets without a valid token are closed."""
+        for path in ('ws/live', 'ws/live?token=invalid'):
+            communicator = self._communicator(path)
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4401)
+    
+    async def test_joins_only_member_garden_groups(self):
+        """Test that a socket receives updates of its user's gardens only."""
+        from channels.layers import get_channel_layer
+        from core.routing import garden_group
+        
+        communicator = self._communicator(f'ws/live?token={self.token}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        
+        layer = get_channel_layer()
+        await layer.group_send(garden_group(self.other_garden.id), {'type': 'send_data', 'text': 'other'})
+        await layer.group_send(garden_group(self.garden.id), {'type': 'send_data', 'text': 'mine'})
+        self.assertEqual(await communicator.receive_json_from(), {'message': 'mine'})
+        self.assertTrue(await communicator.receive_nothing())
+        await communicator.disconnect()
+    
+    async def test_accepts_token_subprotocol(self):
+        """Test that the token can be passed as a websocket subprotocol."""
+        communicator = self._communicator('ws/notif', subprotocols=['jwt', self.token])
+        connected, subprotocol = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(subprotocol, 'jwt')
+        await communicator.disconnect()
+    
+    def test_memberships_are_cached_until_access_changes(self):
+        """Test that reconnects skip the database until the user's access changes."""
+        from core.ws_auth import get_ws_user
+        
+        self.assertEqual(get_ws_user(self.token).garden_roles, {self.garden.id: 'staff'})
+        with self.assertNumQueries(0):
+            self.assertEqual(get_ws_user(self.token).garden_roles, {self.garden.id: 'staff'})
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.access.delete()
+        self.assertEqual(get_ws_user(self.token).garden_roles, {})
+    
+    def test_falls_back_to_database_without_redis(self):
+        """Test that memberships are still resolved when the claims cache is down."""
+        from unittest.mock import patch
+        from core.ws_auth import get_ws_user
+        
+        with patch('users.tokens._redis', side_effect=ConnectionError):
+            user = get_ws_user(self.token)
+        self.assertEqual(user.email, 'ws@example.com')
+        self.assertEqual(user.garden_roles, {self.garden.id: 'staff'})
+
+
+TIERED_CACHES = {
+    'default': {
+        'BACKEND': 'core.utils.cache.TieredCache',
+        'OPTIONS': {'L1': 'l1', 'L2': 'l2', 'L1_TIMEOUT': 5},
+    },
+    'l1': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-test-l1'},
+    'l2': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'tiered-test-l2'},
+}
+
+
+class TieredCacheTest(TestCase):
+    """Test cases for the tiered cache backend and its helpers."""
+    
+    def setUp(self):
+        from django.core.cache import caches
+        from django.test import override_settings
+        
+        override = override_settings(CACHES=TIERED_CACHES)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.cache, self.l1, self.l2 = caches['default'], caches['l1'], caches['l2']
+        for cache in (self.l1, self.l2):
+            cache.clear()
+    
+    def test_l2_hit_fills_l1(self):
+        """Test that values read from L2 are copied into L1."""
+        self.l2.set('key', 'value')
+        self.assertEqual(self.cache.get('key'), 'value')
+        self.assertEqual(self.l1.get('key'), 'value')
+    
+    def test_writes_and_deletes_reach_both_tiers(self):
+        """Test that set and delete keep the tiers consistent."""
+        self.cache.set('key', 'value', 60)
+        self.assertEqual(self.l1.get('key'), 'value')
+        self.assertEqual(self.l2.get('key'), 'value')
+        
+        self.cache.delete('key')
+        self.assertIsNone(self.l1.get('key'))
+        self.assertIsNone(self.l2.get('key'))
+    
+    def test_l2_errors_are_misses(self):
+        """Test that an unavailable L2 degrades to the local tier."""
+        from unittest.mock import patch
+        
+        with patch.object(self.l2, 'get', side_effect=ConnectionError), \
+                patch.object(self.l2, 'set', side_effect=ConnectionError):
+            self.assertIsNone(self.cache.get('key'))
+            self.cache.set('key', 'value')
+            self.assertEqual(self.cache.get('key'), 'value')
+    
+    def test_incr_falls_back_to_l1_without_l2(self):
+        """Test that counters and namespace bumps keep working locally while L2 is down."""
+        from unittest.mock import patch
+        from core.utils.cache import bump_namespace, namespace_version
+        
+        with patch.object(self.l2, 'add', side_effect=ConnectionError), \
+                patch.object(self.l2, 'get', side_effect=ConnectionError), \
+                patch.object(self.l2, 'incr', side_effect=ConnectionError):
+            self.cache.add('counter', 1)
+            self.assertEqual(self.cache.incr('counter'), 2)
+            
+            version = namespace_version('gardens')
+            bump_namespace('gardens')
+            self.assertEqual(namespace_version('gardens'), version + 1)
+        
+        with self.assertRaises(ValueError):
+            self.cache.incr('missing')
+    
+    def test_versioned_key_changes_after_bump(self):
+        """Test that bumping a namespace moves all of its keys."""
+        from core.utils.cache import bump_namespace, versioned_key
+        
+        key = versioned_key('gardens', 1, 'summary')
+        self.assertEqual(versioned_key('gardens', 1, 'summary'), key)
+        self.assertTrue(key.startswith('gardens:v') and key.endswith(':1:summary'))
+        
+        bump_namespace('gardens')
+        self.assertNotEqual(versioned_key('gardens', 1, 'summary'), key)
+    
+    def test_bumps_never_share_a_version(self):
+        """Test that back-to-back bumps each move the namespace to a new version."""
+        from core.utils.cache import bump_namespace, namespace_version
+        
+        versions = set()
+        for _ in range(3):
+            bump_namespace('gardens')
+            versions.add(namespace_version('gardens'))
+        self.assertEqual(len(versions), 3)
+    
+    def test_get_or_compute_computes_once(self):
+        """Test that fresh values are served without recomputing."""
+        from core.utils.cache import get_or_compute
+        
+        calls = []
+        compute = lambda: calls.append(1) or len(calls)
+        self.assertEqual(get_or_compute('expensive', compute, 60), 1)
+        self.assertEqual(get_or_compute('expensive', compute, 60), 1)
+        self.assertEqual(len(calls), 1)
+    
+    def test_stale_value_served_while_another_caller_recomputes(self):
+        """Test that only the lock holder recomputes a stale value."""
+        import time
+        from core.utils.cache import get_or_compute
+        
+        self.cache.set('expensive', {'value': 'stale', 'fresh_until': time.time() - 1}, 60)
+        self.cache.add('expensive:lock', 1, 30)
+        self.assertEqual(get_or_compute('expensive', lambda: 'fresh', 60), 'stale')
+        
+        self.cache.delete('expensive:lock')
+        self.assertEqual(get_or_compute('expensive', lambda: 'fresh', 60), 'fresh')
+        self.assertIsNone(self.cache.get('expensive:lock'))
+    
+    def test_cold_miss_waits_for_lock_holder(self):
+        """Test that a cold miss gives up waiting and computes itself."""
+        from core.utils.cache import get_or_compute
+        
+        self.cache.add('expensive:lock', 1, 30)
+        self.assertEqual(get_or_compute('expensive', lambda: 'computed', 60, wait=0.1), 'computed')
+
+
+class FakeDBConnection:
+    """Stand-in for a DB-API connection."""
+    
+    def __init__(self):
+        self.closed = False
+        self.broken = False
+    
+    def ping(self):
+        if self.broken:
+            raise ConnectionError("server has gone away")
+    
+    def rollback(self):
+        if self.broken:
+            raise ConnectionError("server has gone away")
+    
+    def close(self):
+        self.closed = True
+
+
+class ConnectionPoolTest(TestCase):
+    """Test cases for the pooled database backend's connection pool."""
+    
+    def _pool(self, **kwargs):
+        from core.db_backends.pool import ConnectionPool
+        return ConnectionPool(FakeDBConnection, ping=lambda connection: connection.ping(), **kwargs)
+    
+    def test_released_connections_are_reused(self):
+        """Test that a released connection is handed out again."""
+        pool = self._pool(size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+        
+        self.assertIs(pool.acquire(), connection)
+        self.assertEqual(pool.open_connections, 1)
+    
+    def test_broken_connections_are_replaced(self):
+        """Test that idle connections failing the health check are discarded."""
+        pool = self._pool(size=2)
+        connection = pool.acquire()
+        pool.release(connection)
+        connection.broken = True
+        
+        replacement = pool.acquire()
+        self.assertIsNot(replacement, connection)
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.open_connections, 1)
+    
+    def test_overflow_connections_are_closed_on_release(self):
+        """Test that only ``size`` idle connections are kept."""
+        pool = self._pool(size=1, max_overflow=1)
+        first, second = pool.acquire(), pool.acquire()
+        pool.release(first)
+        pool.release(second)
+        
+        self.assertTrue(second.closed)
+        self.assertEqual(pool.idle_connections, 1)
+        self.assertEqual(pool.open_connections, 1)
+    
+    def test_exhausted_pool_times_out(self):
+        """Test that acquiring beyond size + overflow fails after the timeout."""
+        from core.db_backends.pool import PoolExhausted
+        
+        pool = self._pool(size=1, max_overflow=0, timeout=0.05)
+        pool.acquire()
+        with self.assertRaises(PoolExhausted):
+            pool.acquire()
+    
+    def test_waiting_caller_gets_released_connection(self):
+        """Test that a caller blocked on a full pool gets the next released connection."""
+        import threading
+        
+        pool = self._pool(size=1, max_overflow=0, timeout=2)
+        connection = pool.acquire()
+        threading.Timer(0.05, pool.release, args=[connection]).start()
+        
+        self.assertIs(pool.acquire(), connection)
+    
+    def test_expired_connections_are_recycled(self):
+        """Test that connections older than ``recycle`` are not reused."""
+        pool = self._pool(size=1, recycle=0)
+        connection = pool.acquire()
+        pool.release(connection)
+        
+        self.assertTrue(connection.closed)
+        self.assertEqual(pool.open_connections, 0)
+
+
+class ORJSONRendererTest(TestCase):
+    """Test that the orjson renderer and parser match DRF's stdlib ones."""
+    
+    def test_renders_like_stdlib_renderer(self):
+        """Test output parity for the types API responses contain."""
+        import datetime
+        import decimal
+        import uuid
+        from django.utils.translation import gettext_lazy
+        from rest_framework.renderers import JSONRenderer
+        from core.renderers import ORJSONRenderer
+        
+        data = {
+            'measured_at': datetime.datetime(2024, 3, 1, 8, 30, tzinfo=datetime.timezone.utc),
+            'date': datetime.date(2024, 3, 1),
+            'liters': decimal.Decimal('1.5'),
+            'valves': {1: 10.0, 2: 5},
+            'label': gettext_lazy('Manual'),
+            'id': uuid.UUID(int=1),
+            'event': 'Valve 1\u2028روشن',
+            'items': [None, True, 3],
+        }
+        
+        self.assertEqual(
+            json.loads(ORJSONRenderer().render(data)),
+            json.loads(JSONRenderer().render(data))
+        )
+        self.assertIn(b'\\u2028', ORJSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+    
+    def test_indent_requested(self):
+        """Test that a requested indent pretty-prints the response."""
+        from core.renderers import ORJSONRenderer
+        
+        body = ORJSONRenderer().render({'a': [1]}, 'application/json; indent=4')
+        self.assertEqual(body, b'{\n  "a": [\n    1\n  ]\n}')
+    
+    def test_parser(self):
+        """Test parsing and that malformed bodies raise ParseError."""
+        from rest_framework.exceptions import ParseError
+        from core.parsers import ORJSONParser
+        
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(b'{"a": [1, 2.5]}')), {'a': [1, 2.5]})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"a": NaN}'))
+    
+    def test_selected_by_settings(self):
+        """Test that the API uses the configured JSON backend."""
+        from rest_framework.settings import api_settings
+        from core.parsers import ORJSONParser
+        from core.renderers import ORJSONRenderer
+        
+        self.assertIs(api_settings.DEFAULT_RENDERER_CLASSES[0], ORJSONRenderer)
+        self.assertIs(api_settings.DEFAULT_PARSER_CLASSES[0], ORJSONParser)
+
+
+class MetricsTest(TestCase):
+    """Test cases for the Prometheus metrics."""
+    
+    def _sample(self, name, **labels):
+        from prometheus_client import REGISTRY
+        return REGISTRY.get_sample_value(name, labels) or 0
+    
+    def test_metrics_endpoint(self):
+        """Test that /metrics exposes the request and custom metrics."""
+        self.client.get('/api/')
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        body = response.content.decode()
+        self.assertIn('django_http_requests_latency_seconds_by_view_method', body)
+        self.assertIn('django_request_db_queries', body)
+    
+    def test_metrics_endpoint_is_restricted(self):
+        """Test that /metrics is hidden from clients outside METRICS_ALLOWED_NETWORKS."""
+        from django.test import override_settings
+        
+        response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 404)
+        
+        with override_settings(METRICS_ALLOWED_NETWORKS=['127.0.0.1', '203.0.113.0/24']):
+            response = self.client.get('/metrics', REMOTE_ADDR='203.0.113.7')
+        self.assertEqual(response.status_code, 200)
+    
+    def test_request_db_queries_by_view(self):
+        """Test that the queries of a request are counted under its view."""
+        from django.contrib.auth import get_user_model
+        from django.http import HttpResponse
+        from django.test import RequestFactory
+        from django.urls import resolve
+        from core.metrics import RequestDBMetricsMiddleware
+        
+        def view(request):
+            request.resolver_match = resolve('/api/')
+            list(get_user_model().objects.all())
+            get_user_model().objects.count()
+            return HttpResponse()
+        
+        labels = {'view': 'core.urls.api_root'}
+        before_count = self._sample('django_request_db_queries_count', **labels)
+        before_sum = self._sample('django_request_db_queries_sum', **labels)
+        RequestDBMetricsMiddleware(view)(RequestFactory().get('/api/'))
+        self.assertEqual(self._sample('django_request_db_queries_count', **labels), before_count + 1)
+        self.assertEqual(self._sample('django_request_db_queries_sum', **labels), before_sum + 2)
+        self.assertGreater(self._sample('django_request_db_query_seconds_count', **labels), 0)
+    
+    def test_timed_client_operation(self):
+        """Test that client operations are timed and their errors counted."""
+        from core.metrics import timed
+        
+        @timed('redis', 'get')
+        def failing():
+            raise ValueError
+        
+        before = self._sample('client_operation_seconds_count', client='redis', operation='get')
+        errors = self._sample('client_operation_errors_total', client='redis', operation='get')
+        with self.assertRaises(ValueError):
+            failing()
+        self.assertEqual(self._sample('client_operation_seconds_count', client='redis', operation='get'), before + 1)
+        self.assertEqual(self._sample('client_operation_errors_total', client='redis', operation='get'), errors + 1)
+    
+    def test_redis_commands_timed(self):
+        """Test that every command of the instrumented connection is recorded by name."""
+        from unittest.mock import patch
+        import redis
+        from core.clients.redis_client import InstrumentedRedis
+        
+        conn = InstrumentedRedis()
+        before = self._sample('client_operation_seconds_count', client='redis', operation='get')
+        with patch.object(redis.StrictRedis, 'execute_command', return_value='1'):
+            self.assertEqual(conn.get('key'), '1')
+        self.assertEqual(self._sample('client_operation_seconds_count', client='redis', operation='get'), before + 1)
+    
+    def test_celery_task_runtime_by_queue(self):
+        """Test that task runtimes are recorded under their delivery queue."""
+        from types import SimpleNamespace
+        from core.metrics import task_finished, task_started
+        
+        task = SimpleNamespace(name='tasks.tasks.control_valve',
+                               request=SimpleNamespace(delivery_info={'routing_key': 'high_priority'}))
+        labels = {'task': task.name, 'queue': 'high_priority', 'state': 'SUCCESS'}
+        before = self._sample('celery_task_runtime_seconds_count', **labels)
+        task_started('task-1')
+        task_finished('task-1', task, 'SUCCESS')
+        # Tasks not started in this process (e.g. eager runs) are ignored
+        task_finished('task-2', task, 'SUCCESS')
+        self.assertEqual(self._sample('celery_task_runtime_seconds_count', **labels), before + 1)
+
+
+class FakeRedisSortedSets:
+    """In-memory stand-in for the Redis commands used by profile traces."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def pipeline(self):
+        return self
+    
+    def execute(self):
+        return []
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+    
+    def set(self, key, value, ex=None):
+        self.data[key] = value
+        return True
+    
+    def delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+    
+    def expire(self, key, ttl):
+        return key in self.data
+    
+    def sadd(self, key, *members):
+        self.data.setdefault(key, set()).update(members)
+    
+    def smembers(self, key):
+        return set(self.data.get(key, set()))
+    
+    def zadd(self, key, mapping):
+        self.data.setdefault(key, {}).update(mapping)
+    
+    def zcard(self, key):
+        return len(self.data.get(key, {}))
+    
+    def zrem(self, key, *members):
+        for member in members:
+            self.data.get(key, {}).pop(member, None)
+    
+    def zrange(self, key, start, end, desc=False, withscores=False):
+        items = sorted(self.data.get(key, {}).items(), key=lambda item: item[1], reverse=desc)
+        items = items[start:len(items) + end + 1 if end < 0 else end + 1]
+        return items if withscores else [member for member, _ in items]
+
+
+@override_settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=0, PROFILING_TOP_N=2)
+class RequestProfilingTest(TestCase):
+    """Test cases for the request profiling middleware and trace endpoints."""
+    
+    def setUp(self):
+        from unittest.mock import patch
+        from django.contrib.auth import get_user_model
+        from garden.models import Garden
+        
+        self.store = FakeRedisSortedSets()
+        patcher = patch('core.profiling._redis', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        User = get_user_model()
+        self.admin = User.objects.create_superuser(email='profiler@example.com', password='securepass123')
+        self.user = User.objects.create_user(email='regular@example.com', password='securepass123')
+        Garden.objects.create(name="Profiled Garden")
+    
+    def test_superuser_header_profiles_request(self):
+        """Test that a superuser request with the header is profiled, listed and downloadable."""
+        import marshal
+        
+        self.client.force_login(self.admin)
+        response = self.client.get('/api/garden/gardens/', HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        
+        traces = self.client.get('/api/profiles/').json()
+        self.assertEqual(len(traces), 1)
+        self.assertEqual(traces[0]['view'], 'garden-list')
+        self.assertEqual(traces[0]['trigger'], 'header')
+        self.assertGreater(traces[0]['sql_count'], 0)
+        self.assertNotIn('sql', traces[0])
+        
+        trace = self.client.get(f"/api/profiles/{traces[0]['id']}/").json()
+        self.assertEqual(len(trace['sql']), trace['sql_count'])
+        self.assertIn('cumulative', trace['profile_summary'])
+        
+        download = self.client.get(f"/api/profiles/{traces[0]['id']}/download/")
+        self.assertEqual(download['Content-Disposition'], f'attachment; filename="{traces[0]["id"]}.prof"')
+        self.assertIsInstance(marshal.loads(download.content), dict)
+    
+    def test_header_ignored_for_regular_users(self):
+        """Test that regular users can neither trigger profiling nor read traces."""
+        self.client.force_login(self.user)
+        self.client.get('/api/garden/gardens/', HTTP_X_PROFILE='1')
+        self.assertEqual(self.store.data, {})
+        self.assertEqual(self.client.get('/api/profiles/').status_code, 403)
+    
+    @override_settings(PROFILING_SAMPLE_RATE=1)
+    def test_sampled_requests(self):
+        """Test that sampled requests are profiled without the header."""
+        self.client.force_login(self.user)
+        self.client.get('/api/garden/gardens/')
+        self.client.force_login(self.admin)
+        self.assertEqual(len(self.client.get('/api/profiles/').json()), 1)
+    
+    def test_keeps_slowest_traces_per_view(self):
+        """Test that only the PROFILING_TOP_N slowest traces of a view are kept."""
+        from core.profiling import get_profile, list_traces, store_trace
+        
+        def trace(trace_id, duration_ms, view='system-status'):
+            return {'id': trace_id, 'view': view, 'duration_ms': duration_ms,
+                    'sql': [], 'clients': [], 'profile_summary': ''}
+        
+        self.assertTrue(store_trace(trace('a', 30), b'a'))
+        self.assertTrue(store_trace(trace('b', 10), b'b'))
+        self.assertTrue(store_trace(trace('c', 20), b'c'))
+        self.assertFalse(store_trace(trace('d', 5), b'd'))
+        self.assertTrue(store_trace(trace('e', 1, 'valve-control'), b'e'))
+        
+        self.assertEqual([t['id'] for t in list_traces('system-status')], ['a', 'c'])
+        self.assertEqual([t['id'] for t in list_traces()], ['a', 'c', 'e'])
+        self.assertIsNone(get_profile('b'))
+        self.assertEqual(get_profile('c'), b'c')
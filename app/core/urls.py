@@ -20,6 +20,14 @@ from django.http import Http404, JsonResponse
 from django.conf import settings
 from django.conf.urls.static import static
 from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
+from rest_framework.routers import SimpleRouter
+
+from core.metrics import metrics_view
+from core.views import ProfileTraceViewSet
+
+# Diagnostics for superusers
+diagnostics_router = SimpleRouter()
+diagnostics_router.register(r'profiles', ProfileTraceViewSet, basename='profile')
 
 def not_found(request):
     raise Http404
@@ -45,8 +53,14 @@ urlpatterns = [
     path('api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
     path('api/schema/redoc/', SpectacularRedocView.as_view(url_name='schema'), name='redoc'),
 
+    # Request profiles (core.profiling)
+    path('api/', include(diagnostics_router.urls)),
+
     # Simple API root response
     path('api/', api_root),
+
+    # Prometheus metrics, for METRICS_ALLOWED_NETWORKS only
+    path('metrics', metrics_view, name='prometheus-django-metrics'),
 ]
 
 # Add static and media file serving in development mode
@@ -0,0 +1,105 @@
+"""
+Helpers shared by the benchmark management commands.
+"""
+
+import math
+import time
+from contextlib import ExitStack, contextmanager
+from typing import Dict, List, Sequence
+
+from django.db import connections
+
+# Metrics compared against a baseline, and whether they are better lower
+BASELINE_METRICS = {'p50': True, 'p95': True, 'p99': True, 'queries': True, 'rps': False}
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Return the ``pct`` percentile (nearest-rank) of ``values``."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(pct / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize(samples_ms: Sequence[float]) -> Dict[str, float]:
+    """Summarize latency samples in milliseconds."""
+    if not samples_ms:
+        return {'count': 0}
+    return {
+        'count': len(samples_ms),
+        'mean': sum(samples_ms) / len(samples_ms),
+        'min': min(samples_ms),
+        'p50': percentile(samples_ms, 50),
+        'p95': percentile(samples_ms, 95),
+        'p99': percentile(samples_ms, 99),
+        'max': max(samples_ms),
+    }
+
+
+def format_summary(label: str, summary: Dict[str, float]) -> str:
+    """Render a summary as a single aligned report line."""
+    if not summary.get('count'):
+        return f"{label:<32} no samples"
+    return (
+        f"{label:<32} n={summary['count']:<6} "
+        f"p50={summary['p50']:9.3f}ms p95={summary['p95']:9.3f}ms "
+        f"p99={summary['p99']:9.3f}ms max={summary['max']:9.3f}ms"
+    )
+
+
+@contextmanager
+def timer(samples_ms: List[float]):
+    """Append the elapsed time of the block, in milliseconds, to ``samples_ms``."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        samples_ms.append((time.perf_counter() - start) * 1000)
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the queries run inside the block on every database alias.
+
+    Yields a dict whose ``queries`` entry is updated as queries run.
+    """
+    stats = {'queries': 0}
+
+    def count(execute, sql, params, many, context):
+        stats['queries'] += 1
+        return execute(sql, params, many, context)
+
+    with ExitStack() as stack:
+        for connection in connections.all():
+            stack.enter_context(connection.execute_wrapper(count))
+        yield stats
+
+
+def compare_to_baseline(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+                        tolerance: float) -> List[str]:
+    """
+    Describe the regressions of ``results`` against ``baseline``.
+
+    Both map a benchmark name to its metrics. Latencies may grow, and
+    throughput (``rps``) drop, by ``tolerance`` (a fraction of the baseline);
+    query counts may not grow at all. Benchmarks or metrics missing on either
+    side are not compared.
+    """
+    regressions = []
+    for name, metrics in results.items():
+        for metric, lower_is_better in BASELINE_METRICS.items():
+            value = metrics.get(metric)
+            expected = baseline.get(name, {}).get(metric)
+            if value is None or expected is None:
+                continue
+            if metric == 'queries':
+                regressed = value > expected
+            elif lower_is_better:
+                regressed = value > expected * (1 + tolerance)
+            else:
+                regressed = value < expected * (1 - tolerance)
+            if regressed:
+                regressions.append(f"{name} {metric}: {value:.2f} (baseline {expected:.2f})")
+    return regressions
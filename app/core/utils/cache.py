@@ -0,0 +1,257 @@
+"""
+Caching helpers: an in-process TTL cache, the tiered Django cache backend
+and key versioning / stampede protection on top of the Django cache.
+"""
+
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+
+logger = logging.getLogger(__name__)
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after a time-to-live.
+
+    Used as a per-process tier in front of Redis for hot lookups. Entries are
+    evicted least-recently-used first once ``maxsize`` is reached; expired
+    entries are dropped lazily on access.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Return the cached value, or ``default`` if it is missing or expired."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Cache a value for ``ttl`` seconds (defaults to the cache TTL)."""
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+
+_MISSING = object()
+
+
+class TieredCache(BaseCache):
+    """
+    Django cache backend reading through a local L1 cache into a shared L2.
+
+    Both tiers are other ``CACHES`` aliases, given in ``OPTIONS``::
+
+        'default': {
+            'BACKEND': 'core.utils.cache.TieredCache',
+            'OPTIONS': {'L1': 'local', 'L2': 'redis', 'L1_TIMEOUT': 5},
+        }
+
+    L2 hits are copied into L1 for at most ``L1_TIMEOUT`` seconds, which bounds
+    how long another process may serve a value after it was changed or
+    deleted. Writes go to both tiers. L2 errors are logged and treated as
+    misses, so an unavailable Redis degrades to per-process caching.
+    """
+
+    def __init__(self, location, params):
+        super().__init__(params)
+        options = params.get('OPTIONS', {})
+        self._l1_alias = options.get('L1', 'local')
+        self._l2_alias = options.get('L2', 'redis')
+        self.l1_timeout = options.get('L1_TIMEOUT', 5)
+
+    @property
+    def l1(self) -> BaseCache:
+        return caches[self._l1_alias]
+
+    @property
+    def l2(self) -> BaseCache:
+        return caches[self._l2_alias]
+
+    def _l1_timeout(self, timeout):
+        return self.l1_timeout if timeout is None else min(timeout, self.l1_timeout)
+
+    def get(self, key, default=None, version=None):
+        value = self.l1.get(key, _MISSING, version=version)
+        if value is not _MISSING:
+            return value
+        try:
+            value = self.l2.get(key, _MISSING, version=version)
+        except Exception as e:
+            logger.error(f"L2 cache unavailable: {e}")
+            return default
+        if value is _MISSING:
+            return default
+        self.l1.set(key, value, self.l1_timeout, version=version)
+        return value
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        try:
+            self.l2.set(key, value, timeout, version=version)
+        except Exception as e:
+            logger.error(f"L2 cache unavailable: {e}")
+        self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        try:
+            added = self.l2.add(key, value, timeout, version=version)
+        except Exception as e:
+            logger.error(f"L2 cache unavailable: {e}")
+            return self.l1.add(key, value, self._l1_timeout(timeout), version=version)
+        if added:
+            self.l1.set(key, value, self._l1_timeout(timeout), version=version)
+        return added
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        timeout = self.default_timeout if timeout is DEFAULT_TIMEOUT else timeout
+        self.l1.touch(key, self._l1_timeout(timeout), version=version)
+        try:
+            return self.l2.touch(key, timeout, version=version)
+        except Exception as e:
+            logger.error(f"L2 cache unavailable: {e}")
+            return False
+
+    def delete(self, key, version=None):
+        deleted = self.l1.delete(key, version=version)
+        try:
+            return self.l2.delete(key, version=version) or deleted
+        except Exception as e:
+            logger.error(f"L2 cache unavailable: {e}")
+            return deleted
+
+    def incr(self, key, delta=1, version=None):
+        try:
+            value = self.l2.incr(key, delta, version=version)
+        except ValueError:
+            # Missing key: same contract as any Django cache
+            self.l1.delete(key, version=version)
+            raise
+        except Exception as e:
+            logger.error(f"L2 cache unavailable: {e}")
+            return self.l1.incr(key, delta, version=version)
+        self.l1.delete(key, version=version)
+        return value
+
+    def clear(self):
+        self.l1.clear()
+        try:
+            self.l2.clear()
+        except Exception as e:
+            logger.error(f"L2 cache unavailable: {e}")
+
+
+NAMESPACE_VERSION_KEY = 'ns-version:{}'
+
+
+def namespace_version(namespace: str, cache: Optional[BaseCache] = None) -> int:
+    """Current version of a key namespace (see ``versioned_key``)."""
+    cache = cache or caches['default']
+    key = NAMESPACE_VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        # Start from the clock so versions never repeat after the cache is flushed
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_namespace(namespace: str, cache: Optional[BaseCache] = None) -> None:
+    """Invalidate every key of a namespace at once; old entries simply expire."""
+    cache = cache or caches['default']
+    key = NAMESPACE_VERSION_KEY.format(namespace)
+    # An atomic increment: two bumps in the same millisecond still get two versions
+    cache.add(key, int(time.time() * 1000), None)
+    cache.incr(key)
+
+
+def versioned_key(namespace: str, *parts, cache: Optional[BaseCache] = None) -> str:
+    """
+    Cache key ``<namespace>:v<version>:<parts>``.
+
+    With the tiered cache a bump may take up to its L1 timeout to reach
+    other processes.
+    """
+    suffix = ':'.join(str(part) for part in parts)
+    return f"{namespace}:v{namespace_version(namespace, cache)}:{suffix}"
+
+
+def get_or_compute(
+    key: str,
+    compute: Callable[[], Any],
+    timeout: float,
+    cache: Optional[BaseCache] = None,
+    stale_ttl: Optional[float] = None,
+    lock_timeout: float = 30,
+    wait: float = 2,
+) -> Any:
+    """
+    Return a cached value, computing it at most once at a time across processes.
+
+    Values are stored for ``timeout + stale_ttl`` seconds (``stale_ttl``
+    defaults to ``timeout``) but considered fresh for ``timeout`` only. Once
+    stale, the caller that wins a short lock recomputes while the others keep
+    serving the stale value. On a cold miss the lock winner computes and the
+    others wait up to ``wait`` seconds for its result before computing
+    themselves.
+    """
+    cache = cache or caches['default']
+    stale_ttl = timeout if stale_ttl is None else stale_ttl
+    lock_key = f"{key}:lock"
+
+    entry = cache.get(key)
+    if entry is not None:
+        if entry['fresh_until'] > time.time() or not cache.add(lock_key, 1, lock_timeout):
+            return entry['value']
+    elif not cache.add(lock_key, 1, lock_timeout):
+        deadline = time.monotonic() + wait
+        while time.monotonic() < deadline:
+            time.sleep(0.05)
+            entry = cache.get(key)
+            if entry is not None:
+                return entry['value']
+        return compute()
+
+    try:
+        value = compute()
+        cache.set(key, {'value': value, 'fresh_until': time.time() + timeout}, timeout + stale_ttl)
+        return value
+    finally:
+        cache.delete(lock_key)
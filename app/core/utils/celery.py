@@ -2,26 +2,63 @@
 Utility functions for Celery task management and monitoring.
 """
 
-import requests
 import logging
-from typing import Optional, Literal
+import time
+from typing import Dict, Iterable, Optional, Literal
 from django.conf import settings
 
+from core.clients.http_client import get_http_client
+
 logger = logging.getLogger(__name__)
 
 TaskStatus = Literal['SUCCESS', 'FAILURE', 'PENDING', 'STARTED', 'RETRY', 'REVOKED', 'NOTEXIST']
 
-def get_flower_task_url(task_id: str) -> str:
-    """Get the Flower API URL for a specific task."""
-    return f"{settings.FLOWER_BASE_URL}/task/{task_id}"
+TASK_STATE_KEY = 'celery:task-state:{}'
+BEAT_HEARTBEAT_KEY = 'celery:beat:heartbeat'
+
+
+def _redis():
+    from core.clients.redis_client import RedisClient
+    return RedisClient().connection
+
+
+def record_task_state(task_id: str, state: TaskStatus) -> None:
+    """
+    Store the latest state of a task in the Redis task state index.
+
+    Called from the Celery signal handlers in core.celery_client; errors are
+    logged rather than raised so status tracking never fails a task.
+    """
+    try:
+        _redis().setex(TASK_STATE_KEY.format(task_id), settings.CELERY_TASK_STATE_TTL, state)
+    except Exception as e:
+        logger.error(f"Error recording state {state} for task {task_id}: {e}")
+
+
+def check_task_statuses(task_ids: Iterable[str]) -> Dict[str, TaskStatus]:
+    """
+    Look up the states of many tasks in one Redis round trip.
+    
+    Args:
+        task_ids: The IDs of the tasks to check
+        
+    Returns:
+        A mapping of task ID to state; unknown or expired tasks are 'NOTEXIST'
+    """
+    task_ids = list(task_ids)
+    if not task_ids:
+        return {}
+    try:
+        states = _redis().mget([TASK_STATE_KEY.format(task_id) for task_id in task_ids])
+    except Exception as e:
+        logger.error(f"Error checking task statuses: {e}")
+        states = [None] * len(task_ids)
+    return {task_id: state or 'NOTEXIST' for task_id, state in zip(task_ids, states)}
 
-def get_flower_tasks_url() -> str:
-    """Get the Flower API URL for all tasks."""
-    return f"{settings.FLOWER_BASE_URL}/api/tasks"
 
 def check_task_status(task_id: str) -> TaskStatus:
     """
-    Check the status of a Celery task using Flower's API.
+    Check the status of a Celery task in the task state index.
     
     Args:
         task_id: The ID of the task to check
@@ -29,36 +66,26 @@ def check_task_status(task_id: str) -> TaskStatus:
     Returns:
         The status of the task as a string
     """
+    return check_task_statuses([task_id])[task_id]
+
+
+def record_beat_heartbeat() -> None:
+    """Refresh the beat heartbeat key; it expires if beat stops ticking."""
     try:
-        response = requests.get(get_flower_task_url(task_id))
-        response_text = str(response.content)
-        
-        # Extract status from HTML response
-        start_pattern = "<td>State</td>"
-        start_index = response_text.find(start_pattern) + len(start_pattern)
-        
-        end_pattern = "</span>"
-        end_index = response_text.find(end_pattern, start_index)
-        
-        status_pattern = "\">"
-        status_start = response_text.find(status_pattern, start_index, end_index) + len(status_pattern)
-        status = response_text[status_start:end_index]
-        
-        return 'NOTEXIST' if len(status) > 10 else status
+        _redis().setex(BEAT_HEARTBEAT_KEY, settings.CELERY_BEAT_HEARTBEAT_TTL, str(time.time()))
     except Exception as e:
-        logger.error(f"Error checking task status: {e}")
-        return 'NOTEXIST'
+        logger.error(f"Error recording beat heartbeat: {e}")
+
 
 def check_beat_is_active() -> bool:
     """
-    Check if Celery Beat is active by looking for scheduled tasks.
+    Check if Celery Beat is active from its heartbeat key.
     
     Returns:
         True if Beat is active, False otherwise
     """
     try:
-        response = requests.get(get_flower_tasks_url())
-        return 'reset_worker_task_for_problem_case' in str(response.content)
+        return bool(_redis().exists(BEAT_HEARTBEAT_KEY))
     except Exception as e:
         logger.error(f"Error checking Beat status: {e}")
         return False
@@ -92,7 +119,9 @@ def purge_rabbitmq_queue(
         
         url = f'http://{host}:{port}/rabbit/api/queues/{vhost}/{queue_name}/contents'
         
-        response = requests.delete(url, auth=(username, password))
+        response = get_http_client('rabbitmq').delete(
+            url, auth=(username, password), endpoint='purge-queue'
+        )
         
         if response.status_code == 204:
             logger.info(f"Successfully purged queue '{queue_name}' in vhost '{vhost}'")
@@ -0,0 +1,47 @@
+"""
+Utility functions for bulk database maintenance.
+"""
+
+import logging
+from typing import Callable, Optional
+from django.db.models import QuerySet
+
+logger = logging.getLogger(__name__)
+
+
+def delete_in_batches(
+    queryset: QuerySet,
+    batch_size: int = 1000,
+    on_batch: Optional[Callable[[QuerySet], None]] = None
+) -> int:
+    """
+    Delete the rows of a queryset in bounded primary key ranges.
+
+    Each round picks the next ``batch_size`` primary keys in order and deletes
+    the ``pk__gte``/``pk__lte`` slice, so every DELETE touches a short index
+    range instead of locking the whole match set at once.
+
+    Args:
+        queryset: Rows to delete
+        batch_size: Maximum number of rows per DELETE
+        on_batch: Optional callback receiving each slice before it is deleted
+            (used for archiving)
+
+    Returns:
+        The total number of rows deleted
+    """
+    total = 0
+    while True:
+        pks = list(
+            queryset.order_by('pk').values_list('pk', flat=True)[:batch_size]
+        )
+        if not pks:
+            return total
+
+        batch = queryset.filter(pk__gte=pks[0], pk__lte=pks[-1])
+        if on_batch is not None:
+            on_batch(batch)
+
+        deleted, _ = batch.delete()
+        total += deleted
+        logger.debug(f"Deleted {deleted} {queryset.model.__name__} rows (pk {pks[0]}-{pks[-1]})")
@@ -5,35 +5,59 @@ Utility functions for interacting with the Supernova API.
 import requests
 import json
 import logging
-from typing import Dict, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 from django.conf import settings
 
+from core.clients.http_client import get_http_client
+from core.utils.cache import TTLCache
+
 logger = logging.getLogger(__name__)
 
-def get_active_basket_dict() -> Dict[str, str]:
+# Short-lived caches of successful answers: the ready-holders map and holder
+# barcode -> pigeon ID. Failures are never cached.
+_basket_cache = TTLCache(maxsize=1, ttl=settings.SUPERNOVA_CACHE_TTL)
+_holder_cache = TTLCache(maxsize=10000, ttl=settings.SUPERNOVA_CACHE_TTL)
+
+def clear_caches() -> None:
+    _basket_cache.clear()
+    _holder_cache.clear()
+
+def get_active_basket_dict(refresh: bool = False) -> Dict[str, str]:
     """
     Get active basket information from Supernova API.
     
+    The map is cached for SUPERNOVA_CACHE_TTL seconds; pass ``refresh=True``
+    to bypass the cache.
+    
     Returns:
         Dictionary mapping holder codes to pigeon IDs
     """
+    if not refresh:
+        baskets = _basket_cache.get('baskets')
+        if baskets is not None:
+            return baskets
+    
     url = f"{settings.SUPERNOVA_BASE_URL}/api/automation/presort/ready-holders"
     headers = {
         'api-key': settings.SUPERNOVA_API_KEY,
     }
     
     try:
-        response = requests.get(url, headers=headers)
+        response = get_http_client('supernova').get(url, headers=headers, endpoint='ready-holders')
         response.raise_for_status()
         
         data = response.json()
-        return {
+        baskets = {
             holder["holder_code"]: holder["pigeon_id"]
             for holder in data.get('holders', [])
         }
     except Exception as e:
         logger.error(f"Error fetching active baskets: {e}")
         return {}
+    
+    _basket_cache.set('baskets', baskets)
+    return baskets
 
 def get_inquiry_url(holder_id: str) -> str:
     """Generate the Supernova inquiry URL for a holder."""
@@ -42,20 +66,33 @@ def get_inquiry_url(holder_id: str) -> str:
         f"?Authorization={settings.SUPERNOVA_AUTH_TOKEN}"
     )
 
-def inquire_holder(barcode: str) -> Tuple[bool, Union[int, str]]:
+def inquire_holder(barcode: str, use_cache: bool = True) -> Tuple[bool, Union[int, str]]:
     """
     Query Supernova API for holder information.
     
     Args:
         barcode: The holder barcode to query
+        use_cache: Serve a recent successful answer without a request
         
     Returns:
         Tuple of (success: bool, result: Union[int, str])
         If successful, result is the pigeon ID
         If failed, result is the error message
     """
+    if use_cache:
+        pigeon = _holder_cache.get(barcode)
+        if pigeon is not None:
+            return True, pigeon
+    
+    result = _inquire_holder(barcode)
+    if result[0]:
+        _holder_cache.set(barcode, result[1])
+    return result
+
+def _inquire_holder(barcode: str) -> Tuple[bool, Union[int, str]]:
     try:
-        response = requests.get(get_inquiry_url(barcode))
+        # Labelled endpoint: the URL carries the auth token
+        response = get_http_client('supernova').get(get_inquiry_url(barcode), endpoint='holder-pigeon')
         status_code = response.status_code
         
         if status_code == 200:
@@ -73,4 +110,40 @@ def inquire_holder(barcode: str) -> Tuple[bool, Union[int, str]]:
             
     except requests.RequestException as e:
         logger.error(f"Request failed for barcode {barcode}: {e}")
-        return False, f"Request failed: {str(e)}" 
\ No newline at end of file
+        return False, f"Request failed: {str(e)}"
+
+def inquire_holders(
+    barcodes: Iterable[str],
+    max_workers: Optional[int] = None
+) -> List[Tuple[bool, Union[int, str]]]:
+    """
+    Query many holders concurrently.
+    
+    Cached barcodes are answered without a request and duplicates are only
+    queried once; the rest run on a thread pool of at most ``max_workers``
+    (default SUPERNOVA_CONCURRENCY) requests in flight.
+    
+    Args:
+        barcodes: The holder barcodes to query
+        max_workers: Concurrency limit
+        
+    Returns:
+        One (success, pigeon ID or error message) tuple per barcode, in input order
+    """
+    barcodes = list(barcodes)
+    results = {}
+    pending = []
+    for barcode in dict.fromkeys(barcodes):
+        pigeon = _holder_cache.get(barcode)
+        if pigeon is not None:
+            results[barcode] = (True, pigeon)
+        else:
+            pending.append(barcode)
+    
+    if pending:
+        workers = min(max_workers or settings.SUPERNOVA_CONCURRENCY, len(pending))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='supernova') as executor:
+            for barcode, result in zip(pending, executor.map(inquire_holder, pending)):
+                results[barcode] = result
+    
+    return [results[barcode] for barcode in barcodes]
@@ -0,0 +1,71 @@
+import logging
+
+from django.http import Http404, HttpResponse
+from drf_spectacular.utils import OpenApiParameter, extend_schema
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from core import profiling
+from core.permissions import IsSuperuser
+
+logger = logging.getLogger(__name__)
+
+
+class ProfileTraceViewSet(viewsets.ViewSet):
+    """
+    Request profiles kept by ``core.profiling.RequestProfilingMiddleware``.
+
+    The list is bounded by ``PROFILING_TOP_N`` traces per view, so it is not paginated.
+    """
+    permission_classes = [IsAuthenticated, IsSuperuser]
+    lookup_value_regex = '[0-9a-f]{32}'
+
+    def _unavailable(self, e):
+        logger.error(f"Error reading profile traces: {e}")
+        return Response({'error': 'Profile storage unavailable'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    @extend_schema(
+        summary="List profile traces",
+        description="Slowest profiled requests, slowest first",
+        parameters=[OpenApiParameter(name='view', description='Only traces of this view', required=False, type=str)]
+    )
+    def list(self, request):
+        try:
+            traces = profiling.list_traces(request.query_params.get('view'))
+        except Exception as e:
+            return self._unavailable(e)
+        return Response(traces)
+
+    @extend_schema(
+        summary="Get a profile trace",
+        description="Trace with its SQL queries, client calls and profile summary"
+    )
+    def retrieve(self, request, pk=None):
+        try:
+            trace = profiling.get_trace(pk)
+        except Exception as e:
+            return self._unavailable(e)
+        if trace is None:
+            raise Http404
+        return Response(trace)
+
+    @extend_schema(
+        summary="Download a profile",
+        description="Full profile of a trace: a pstats file (cProfile) or a speedscope flamegraph (pyinstrument)"
+    )
+    @action(detail=True, methods=['get'])
+    def download(self, request, pk=None):
+        try:
+            trace = profiling.get_trace(pk)
+            profile = profiling.get_profile(pk)
+        except Exception as e:
+            return self._unavailable(e)
+        if trace is None or profile is None:
+            raise Http404
+
+        extension, content_type = profiling.PROFILE_FORMATS[trace['profile_format']]
+        response = HttpResponse(profile, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{pk}.{extension}"'
+        return response
@@ -0,0 +1,84 @@
+"""
+JWT authentication for websocket connections.
+
+Clients pass their access token either in the query string
+(``ws/live?token=<jwt>``) or as the second websocket subprotocol
+(``new WebSocket(url, ['jwt', token])``). The user and their garden roles are
+resolved from the cached authorization claims (``users.tokens``), so a
+reconnect storm costs one Redis round trip per socket instead of session and
+user queries.
+"""
+
+import logging
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+logger = logging.getLogger(__name__)
+
+JWT_SUBPROTOCOL = 'jwt'
+
+
+def get_scope_token(scope):
+    """Return the raw access token of a websocket scope, if there is one."""
+    subprotocols = scope.get('subprotocols') or []
+    if len(subprotocols) >= 2 and subprotocols[0] == JWT_SUBPROTOCOL:
+        return subprotocols[1]
+
+    query = parse_qs(scope.get('query_string', b'').decode())
+    tokens = query.get('token')
+    return tokens[0] if tokens else None
+
+
+def get_ws_user(raw_token):
+    """
+    Resolve the user of an access token, with ``garden_roles`` set.
+
+    Falls back to the database when the claims cache is unavailable.
+    """
+    from garden.models import GardenAccess
+    from users.tokens import build_user, cached_user_claims
+
+    authentication = JWTAuthentication()
+    try:
+        token = authentication.get_validated_token(raw_token)
+    except InvalidToken:
+        return AnonymousUser()
+
+    user_id = token[api_settings.USER_ID_CLAIM]
+    claims = cached_user_claims(user_id)
+    if claims:
+        return build_user(user_id, claims)
+
+    try:
+        user = authentication.get_user(token)
+    except (AuthenticationFailed, InvalidToken):
+        return AnonymousUser()
+    user.garden_roles = dict(
+        GardenAccess.objects.filter(user=user).values_list('garden_id', 'role')
+    )
+    return user
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Populate ``scope['user']`` from a JWT access token.
+
+    Connections without a valid token get an ``AnonymousUser``; consumers
+    decide whether to reject them.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        raw_token = get_scope_token(scope)
+        if raw_token:
+            scope['user'] = await database_sync_to_async(get_ws_user)(raw_token)
+        else:
+            scope['user'] = AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -7,7 +7,7 @@ from .models import (
 
 @admin.register(Garden)
 class GardenAdmin(admin.ModelAdmin):
-    list_display = ('name', 'location', 'created_at')
+    list_display = ('name', 'location', 'log_retention_days', 'created_at')
     search_fields = ('name', 'location')
     list_filter = ('created_at',)
 
@@ -65,13 +65,15 @@ class SystemLogAdmin(admin.ModelAdmin):
 
 @admin.register(WaterUsage)
 class WaterUsageAdmin(admin.ModelAdmin):
-    list_display = ('garden', 'period', 'valve1', 'valve2', 'valve3', 'timestamp')
-    list_filter = ('garden', 'timestamp')
-    search_fields = ('period',)
+    list_display = ('garden', 'valve', 'bucket_start', 'liters')
+    list_filter = ('garden', 'bucket_start')
+    list_select_related = ('garden', 'valve')
+    date_hierarchy = 'bucket_start'
 
 
 @admin.register(PowerConsumption)
 class PowerConsumptionAdmin(admin.ModelAdmin):
-    list_display = ('garden', 'time', 'consumption', 'date')
-    list_filter = ('garden', 'date')
-    date_hierarchy = 'date' 
\ No newline at end of file
+    list_display = ('garden', 'measured_at', 'consumption')
+    list_filter = ('garden', 'measured_at')
+    list_select_related = ('garden',)
+    date_hierarchy = 'measured_at'
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class GardenConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'garden'
-    verbose_name = 'Smart Garden' 
\ No newline at end of file
+    verbose_name = 'Smart Garden'
+
+    def ready(self):
+        import garden.signals  # noqa
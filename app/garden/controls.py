@@ -0,0 +1,73 @@
+"""
+Device control operations shared by the API views and the Celery task catalogue.
+"""
+
+from django.utils import timezone
+
+from .log_sink import log_event
+from .models import Garden, Pump, Valve
+
+
+def open_valve(valve: Valve, duration=None, source: str = 'Manual') -> Valve:
+    """Open a valve for ``duration`` seconds (defaults to its stored duration)."""
+    valve.status = 'on'
+    if duration is not None:
+        valve.duration = duration
+    valve.last_active = timezone.now()
+    valve.save()
+
+    log_event(valve.garden_id, f"Valve {valve.number} turned on", source)
+    return valve
+
+
+def close_valve(valve: Valve, source: str = 'Manual') -> Valve:
+    """Close a valve."""
+    valve.status = 'off'
+    valve.save()
+
+    log_event(valve.garden_id, f"Valve {valve.number} turned off", source)
+    return valve
+
+
+def set_pump(garden: Garden, running: bool, source: str = 'Manual') -> Pump:
+    """Start or stop the pump of a garden, creating it if needed."""
+    pump, created = Pump.objects.get_or_create(
+        garden=garden,
+        defaults={'status': 'off'}
+    )
+    pump.status = 'on' if running else 'off'
+    pump.save()
+
+    log_event(garden.id, "Pump started" if running else "Pump stopped", source)
+    return pump
+
+
+def emergency_stop(source: str = 'Manual') -> int:
+    """
+    Turn off every valve and the pump.
+
+    Returns:
+        The number of valves that were turned off
+    """
+    valves = list(Valve.objects.all())
+    for valve in valves:
+        valve.status = 'off'
+        valve.save()
+
+        log_event(
+            valve.garden_id,
+            f"Emergency stop - Valve {valve.number} turned off",
+            source
+        )
+
+    pump = Pump.objects.first()
+    if pump:
+        pump.status = 'off'
+        pump.save()
+
+    # Log general emergency stop event in first available garden
+    first_garden = Garden.objects.first()
+    if first_garden:
+        log_event(first_garden.id, "Emergency stop activated", source)
+
+    return len(valves)
@@ -0,0 +1,218 @@
+"""
+Conditional GET and response caching for garden read endpoints.
+
+Every garden has a version counter in Redis, bumped after commit whenever one
+of its valves, pumps, power records, schedules or usage records is saved or
+deleted (``garden.signals``); a global counter is bumped alongside for
+endpoints that span all gardens. The versions of the gardens a response
+covers, together with the request path and the caller's garden roles, make up
+its ETag:
+
+- a poll whose ``If-None-Match`` still matches gets ``304 Not Modified``;
+- otherwise the rendered body cached under that ETag is returned, if any;
+- only on a miss does the view query and serialize, and the body is cached.
+
+With stateless JWT users (``JWT_STATELESS_USERS``) the first two cases need
+no database query at all. Without Redis, views behave as if uncached.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from typing import Dict, Iterable, Optional
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+from rest_framework.response import Response
+
+from .models import GardenAccess
+
+logger = logging.getLogger(__name__)
+
+GARDEN_VERSION_KEY = 'garden:ver:{}'
+ALL_GARDENS = 'all'
+RESPONSE_CACHE_KEY = 'garden:resp:{}'
+
+
+def _redis():
+    from core.clients.redis_client import RedisClient
+    return RedisClient().connection
+
+
+def get_garden_versions(garden_ids: Iterable) -> Optional[Dict[str, int]]:
+    """
+    Current versions of some gardens (or ``ALL_GARDENS``), or None if Redis is unavailable.
+
+    Missing counters are initialised to the current time in milliseconds, so
+    ETags issued before Redis lost its data never match again.
+    """
+    garden_ids = [str(garden_id) for garden_id in garden_ids]
+    if not garden_ids:
+        return {}
+    try:
+        conn = _redis()
+        keys = [GARDEN_VERSION_KEY.format(garden_id) for garden_id in garden_ids]
+        values = conn.mget(keys)
+        missing = [key for key, value in zip(keys, values) if value is None]
+        if missing:
+            now = int(time.time() * 1000)
+            for key in missing:
+                conn.set(key, now, nx=True)
+            values = conn.mget(keys)
+        return {garden_id: int(value) for garden_id, value in zip(garden_ids, values)}
+    except Exception as e:
+        logger.error(f"Garden versions unavailable: {e}")
+        return None
+
+
+def bump_garden_version(garden_id) -> None:
+    """Invalidate the cached responses covering a garden."""
+    try:
+        conn = _redis()
+        pipe = conn.pipeline()
+        now = int(time.time() * 1000)
+        for key in (GARDEN_VERSION_KEY.format(garden_id), GARDEN_VERSION_KEY.format(ALL_GARDENS)):
+            # A lost counter restarts from the clock, like in get_garden_versions
+            pipe.set(key, now, nx=True)
+            pipe.incr(key)
+        pipe.execute()
+    except Exception as e:
+        logger.error(f"Could not bump version of garden {garden_id}: {e}")
+
+
+def user_garden_roles(user) -> Dict[int, str]:
+    """The user's role per garden, from token claims when available."""
+    garden_roles = getattr(user, 'garden_roles', None)
+    if garden_roles is None:
+        garden_roles = dict(GardenAccess.objects.filter(user=user).values_list('garden_id', 'role'))
+    return garden_roles
+
+
+class NotModified(Exception):
+    """Short-circuits a view with a 304 or a cached response."""
+
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGardenCacheMixin:
+    """
+    ViewSet mixin serving ``cached_actions`` with ETags and a cached body.
+
+    ``garden_scoped`` views are filtered by the ``garden_id`` query parameter
+    and otherwise by the user's gardens, and are versioned accordingly; other
+    views depend on every garden and use the global version.
+    """
+    cached_actions = ('list', 'retrieve')
+    garden_scoped = True
+
+    def get_cache_scope(self, request):
+        """
+        Return ``(garden ids to version, user-dependent key part)``.
+        """
+        from .views import is_mock_mode
+
+        garden_id = request.query_params.get('garden_id')
+        if not self.garden_scoped or is_mock_mode(request):
+            return [ALL_GARDENS], ''
+
+        user = request.user
+        if user.is_superuser:
+            return [garden_id or ALL_GARDENS], 'su'
+
+        garden_roles = user_garden_roles(user)
+        if garden_id:
+            try:
+                role = garden_roles.get(int(garden_id))
+            except ValueError:
+                return None
+            return [garden_id], role or ''
+        return sorted(garden_roles), json.dumps(sorted(garden_roles.items()))
+
+    def get_cache_variant(self) -> str:
+        """Extra ETag input for responses that depend on more than the data."""
+        return ''
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.response_etag = None
+        if request.method != 'GET' or self.action not in self.cached_actions:
+            return
+
+        scope = self.get_cache_scope(request)
+        if scope is None:
+            return
+        garden_ids, user_part = scope
+        versions = get_garden_versions(garden_ids)
+        if versions is None:
+            return
+
+        digest = hashlib.sha256(json.dumps([
+            type(self).__name__,
+            request.get_full_path(),
+            request.accepted_media_type,
+            user_part,
+            sorted(versions.items()),
+            self.get_cache_variant(),
+        ]).encode()).hexdigest()[:32]
+        self.response_etag = f'"{digest}"'
+
+        if self.response_etag in parse_etags(request.headers.get('If-None-Match', '')):
+            raise NotModified(HttpResponseNotModified())
+
+        cached = self._get_cached_body(digest)
+        if cached is not None:
+            response = HttpResponse(cached['body'], content_type=cached['content_type'])
+            response['X-Cache'] = 'HIT'
+            raise NotModified(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModified):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        etag = getattr(self, 'response_etag', None)
+        if etag is None or response.status_code not in (200, 304):
+            return response
+        if getattr(self, 'served_from_replica', False):
+            # The replica may lag behind the version the ETag was built from;
+            # caching its body would serve stale data to everyone until the next write
+            return response
+
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, no-cache'
+        if isinstance(response, Response) and response.status_code == 200:
+            response['X-Cache'] = 'MISS'
+            self._set_cached_body(etag.strip('"'), response)
+        return response
+
+    def _get_cached_body(self, digest) -> Optional[dict]:
+        if settings.GARDEN_RESPONSE_CACHE_TTL <= 0:
+            return None
+        try:
+            cached = _redis().get(RESPONSE_CACHE_KEY.format(digest))
+            return json.loads(cached) if cached else None
+        except Exception as e:
+            logger.error(f"Response cache unavailable: {e}")
+            return None
+
+    def _set_cached_body(self, digest, response) -> None:
+        if settings.GARDEN_RESPONSE_CACHE_TTL <= 0:
+            return
+        try:
+            response.render()
+            body = response.content.decode()
+        except UnicodeDecodeError:
+            return
+        try:
+            _redis().setex(
+                RESPONSE_CACHE_KEY.format(digest),
+                settings.GARDEN_RESPONSE_CACHE_TTL,
+                json.dumps({'body': body, 'content_type': response['Content-Type']}),
+            )
+        except Exception as e:
+            logger.error(f"Response cache unavailable: {e}")
@@ -0,0 +1,237 @@
+"""
+SystemLog sinks.
+
+Control actions record their events through ``log_event`` instead of calling
+``SystemLog.objects.create`` directly so the write can be taken off the request
+path. The sink is selected per deployment with ``SYSTEM_LOG_SINK``:
+
+- ``sync``: write every event immediately (default).
+- ``async``: buffer events in-process and ``bulk_create`` them from a background
+  thread every ``SYSTEM_LOG_BATCH_SIZE`` events or ``SYSTEM_LOG_FLUSH_INTERVAL_MS``.
+- ``celery``: buffer the same way but hand each batch to the
+  ``write_system_logs`` task on the ``low_priority`` queue.
+- ``batched``: push each event to a per-garden Redis batch shared by all
+  processes; one ``flush_batch`` task writes up to ``SYSTEM_LOG_BATCH_SIZE``
+  events at a time (see ``tasks.batching``).
+
+Buffered sinks are flushed on interpreter exit and on Celery worker shutdown.
+"""
+
+import atexit
+import logging
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import SystemLog
+
+logger = logging.getLogger(__name__)
+
+LogEvent = Dict[str, Any]
+
+
+def write_events(events: List[LogEvent]) -> None:
+    """Insert a batch of events with a single ``bulk_create``."""
+    SystemLog.objects.bulk_create(
+        [
+            SystemLog(
+                garden_id=event['garden_id'],
+                event=event['event'],
+                source=event['source'],
+                timestamp=_as_datetime(event['timestamp']),
+            )
+            for event in events
+        ],
+        batch_size=settings.SYSTEM_LOG_BATCH_SIZE,
+    )
+
+
+def enqueue_events(events: List[LogEvent]) -> None:
+    """Ship a batch of events to the low priority Celery queue."""
+    from tasks.tasks import write_system_logs
+
+    payload = [
+        dict(event, timestamp=_as_datetime(event['timestamp']).isoformat())
+        for event in events
+    ]
+    write_system_logs.apply_async(args=[payload], queue='low_priority')
+
+
+def _as_datetime(value):
+    return parse_datetime(value) if isinstance(value, str) else value
+
+
+class SyncLogSink:
+    """Write each event as soon as it is emitted."""
+
+    def emit(self, garden_id: int, event: str, source: str) -> None:
+        SystemLog.objects.create(garden_id=garden_id, event=event, source=source)
+
+    def flush(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+class BufferedLogSink:
+    """
+    Buffer events in memory and hand them to ``writer`` in batches.
+
+    A daemon thread flushes the buffer every ``flush_interval_ms`` or as soon as
+    ``batch_size`` events are pending. Events are timestamped on ``emit`` so the
+    stored time reflects when the action happened, not when it was flushed.
+    A failed write puts the batch back at the head of the buffer.
+    """
+
+    def __init__(
+        self,
+        writer: Callable[[List[LogEvent]], None] = write_events,
+        batch_size: int = 100,
+        flush_interval_ms: int = 500,
+    ):
+        self.writer = writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000
+        self._buffer: List[LogEvent] = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def emit(self, garden_id: int, event: str, source: str) -> None:
+        record = {
+            'garden_id': garden_id,
+            'event': event,
+            'source': source,
+            'timestamp': timezone.now(),
+        }
+        with self._lock:
+            self._buffer.append(record)
+            pending = len(self._buffer)
+            closed = self._closed
+            if not closed:
+                self._ensure_worker()
+
+        if closed:
+            # Late events after shutdown are written straight through.
+            self.flush()
+        elif pending >= self.batch_size:
+            self._wakeup.set()
+
+    def flush(self) -> int:
+        """Write everything currently buffered and return the number of events."""
+        with self._flush_lock:
+            with self._lock:
+                batch, self._buffer = self._buffer, []
+            if not batch:
+                return 0
+            try:
+                self.writer(batch)
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} system log events: {e}")
+                with self._lock:
+                    self._buffer[:0] = batch
+                return 0
+            return len(batch)
+
+    def close(self) -> None:
+        """Stop the background thread and flush what is left."""
+        self._closed = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=5)
+        self.flush()
+
+    def _ensure_worker(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(
+                target=self._run, name='system-log-sink', daemon=True
+            )
+            self._thread.start()
+
+    def _run(self) -> None:
+        while not self._closed:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            if self._closed:
+                break
+            try:
+                self.flush()
+            finally:
+                # Connections are per thread; don't leave this one idle.
+                connections.close_all()
+
+
+class BatchedLogSink:
+    """Add each event to the shared per-garden ``system-logs`` task batch."""
+
+    def emit(self, garden_id: int, event: str, source: str) -> None:
+        from tasks.tasks import write_system_log_batch
+
+        write_system_log_batch.add(garden_id, {
+            'garden_id': garden_id,
+            'event': event,
+            'source': source,
+            'timestamp': timezone.now().isoformat(),
+        })
+
+    def flush(self) -> int:
+        return 0
+
+    def close(self) -> None:
+        pass
+
+
+_sink = None
+_sink_lock = threading.Lock()
+
+
+def build_log_sink(mode: Optional[str] = None):
+    """Create the sink configured by ``SYSTEM_LOG_SINK`` (or ``mode``)."""
+    mode = mode or settings.SYSTEM_LOG_SINK
+    if mode == 'sync':
+        return SyncLogSink()
+    if mode in ('async', 'celery'):
+        return BufferedLogSink(
+            writer=enqueue_events if mode == 'celery' else write_events,
+            batch_size=settings.SYSTEM_LOG_BATCH_SIZE,
+            flush_interval_ms=settings.SYSTEM_LOG_FLUSH_INTERVAL_MS,
+        )
+    if mode == 'batched':
+        return BatchedLogSink()
+    raise ValueError(
+        f"Unknown SYSTEM_LOG_SINK '{mode}'. Use 'sync', 'async', 'celery' or 'batched'."
+    )
+
+
+def get_log_sink():
+    """Return the process-wide sink, creating it on first use."""
+    global _sink
+    if _sink is None:
+        with _sink_lock:
+            if _sink is None:
+                _sink = build_log_sink()
+    return _sink
+
+
+def shutdown_log_sink(**kwargs) -> None:
+    """Flush and discard the process-wide sink; safe to call more than once."""
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
+
+
+def log_event(garden_id: int, event: str, source: str = 'Manual') -> None:
+    """Record a SystemLog event through the configured sink."""
+    get_log_sink().emit(garden_id, event, source)
+
+
+atexit.register(shutdown_log_sink)
@@ -0,0 +1,345 @@
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import resolve
+from django.utils import timezone
+from prometheus_client.parser import text_string_to_metric_families
+from rest_framework.test import APIClient
+
+from core.utils.benchmark import compare_to_baseline, count_queries, format_summary, summarize, timer
+from garden.models import Garden, GardenAccess, Pump, Schedule, SystemLog, Valve, WaterUsage
+from users.models import User
+from users.tokens import ClaimsRefreshToken
+
+BENCHMARK_EMAIL = 'benchmark-api@smartgarden.local'
+GARDEN_PREFIX = 'API benchmark'
+DEFAULT_BASELINE = os.path.join(settings.BASE_DIR, 'benchmark_baseline.json')
+
+Endpoint = namedtuple('Endpoint', ['method', 'path', 'body'])
+
+# Hot endpoints of the dashboard and the control panel; requests go to the
+# seeded gardens in turn
+ENDPOINTS = {
+    'valves/status': Endpoint('get', '/api/garden/valves/status/?garden_id={garden_id}', None),
+    'system/status': Endpoint('get', '/api/garden/system/status/?garden_id={garden_id}', None),
+    'logs': Endpoint('get', '/api/garden/logs/?garden_id={garden_id}', None),
+    'water-usage/by_period': Endpoint(
+        'get', '/api/garden/water-usage/by_period/?period=month&garden_id={garden_id}', None
+    ),
+    'pump/control': Endpoint('post', '/api/garden/pump/control/', lambda garden_id, i: {
+        'garden_id': garden_id, 'action': 'start' if i % 2 == 0 else 'stop', 'source': 'System',
+    }),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed gardens, valves and logs, then measure latency percentiles, queries '
+        'per request and throughput of the hot garden endpoints, through the test '
+        'client (in process) and through an ASGI server. Results can be saved as '
+        'a JSON baseline; later runs fail when they regress against it. Runs on '
+        'a throwaway test database, created and destroyed by the command.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--gardens', type=int, default=5, help='Number of seeded gardens')
+        parser.add_argument('--valves', type=int, default=8, help='Valves per garden')
+        parser.add_argument('--logs', type=int, default=10000, help='Log rows per garden')
+        parser.add_argument('--usage-days', type=int, default=90,
+                            help='Days of daily water usage per valve')
+        parser.add_argument('--requests', type=int, default=200,
+                            help='Timed requests per endpoint and mode')
+        parser.add_argument('--warmup', type=int, default=10,
+                            help='Untimed requests per endpoint and mode')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Concurrent clients of the ASGI server')
+        parser.add_argument('--endpoints', nargs='+', choices=list(ENDPOINTS), default=list(ENDPOINTS))
+        parser.add_argument('--modes', nargs='+', choices=['client', 'asgi'], default=['client', 'asgi'])
+        parser.add_argument('--server', choices=['daphne', 'uvicorn'], default='daphne',
+                            help='ASGI server started for the asgi mode')
+        parser.add_argument('--url', help='Benchmark an already running server instead of starting one '
+                                          '(needs --no-test-database: it must use the same database)')
+        parser.add_argument('--no-test-database', action='store_true',
+                            help='Seed the configured database instead of a test database; it must '
+                                 'be a throwaway one, so this is refused unless DEBUG is on')
+        parser.add_argument('--baseline', default=DEFAULT_BASELINE,
+                            help='JSON baseline to compare with (ignored if missing)')
+        parser.add_argument('--update-baseline', action='store_true',
+                            help='Write the results to the baseline instead of comparing')
+        parser.add_argument('--tolerance', type=float, default=0.25,
+                            help='Allowed latency increase and throughput drop, as a fraction')
+
+    def handle(self, *args, **options):
+        if options['no_test_database'] and not settings.DEBUG:
+            raise CommandError('--no-test-database writes to the configured database; refused unless DEBUG is on')
+        if options['url'] and not options['no_test_database']:
+            raise CommandError('--url needs --no-test-database: the server must use the seeded database')
+
+        self.stdout.write(
+            f"{options['gardens']} gardens x {options['valves']} valves x {options['logs']} logs, "
+            f"{options['requests']} requests per endpoint"
+        )
+        old_config = None if options['no_test_database'] else self._create_test_database()
+        try:
+            user, gardens = self._seed(options)
+            try:
+                token = str(ClaimsRefreshToken.for_user(user).access_token)
+                results = {}
+                if 'client' in options['modes']:
+                    results.update(self._run_client(token, gardens, options))
+                if 'asgi' in options['modes']:
+                    results.update(self._run_asgi(token, gardens, options))
+            finally:
+                if old_config is None:
+                    self._cleanup(user, gardens)
+        finally:
+            if old_config is not None:
+                teardown_databases(old_config, verbosity=0)
+
+        self._check_baseline(results, options)
+
+    def _create_test_database(self):
+        """Create (and migrate) test databases, as the test runner does; the server shares them."""
+        for alias in connections:
+            settings_dict = connections[alias].settings_dict
+            test_settings = settings_dict.setdefault('TEST', {})
+            if test_settings.get('MIRROR'):
+                continue
+            if settings_dict['ENGINE'].endswith('sqlite3'):
+                # A file, so that the ASGI server process can open it too
+                test_settings['NAME'] = os.path.join(tempfile.gettempdir(), f'benchmark_api_{alias}.sqlite3')
+            else:
+                name = test_settings.get('NAME') or f"test_{settings_dict['NAME']}"
+                test_settings['NAME'] = f'{name}_benchmark'
+        return setup_databases(verbosity=0, interactive=False, serialized_aliases=set())
+
+    def _seed(self, options):
+        user = User.objects.create_user(email=BENCHMARK_EMAIL, password=None)
+        gardens = [
+            Garden.objects.create(name=f'{GARDEN_PREFIX} {i}', location='Benchmark')
+            for i in range(options['gardens'])
+        ]
+        GardenAccess.objects.bulk_create(
+            GardenAccess(user=user, garden=garden, role='manager') for garden in gardens
+        )
+        now = timezone.now()
+        for garden in gardens:
+            Valve.objects.bulk_create(
+                Valve(garden=garden, number=number, last_active=now)
+                for number in range(1, options['valves'] + 1)
+            )
+            # bulk_create doesn't set primary keys on every backend (MySQL)
+            valves = list(Valve.objects.filter(garden=garden))
+            Pump.objects.create(garden=garden, status='off')
+            Schedule.objects.create(garden=garden, startTime='08:00 AM', duration='30 minutes',
+                                    target='Valve 1', repeat='Daily', isActive=True)
+            SystemLog.objects.bulk_create(
+                (
+                    SystemLog(garden=garden, event=f'Valve {i % options["valves"] + 1} turned on',
+                              source='Automatic', timestamp=now - timedelta(minutes=i))
+                    for i in range(options['logs'])
+                ),
+                batch_size=1000,
+            )
+            WaterUsage.objects.bulk_create(
+                (
+                    WaterUsage(garden=garden, valve=valve, bucket_start=now - timedelta(days=day),
+                               liters=day * 0.37 + valve.number)
+                    for valve in valves for day in range(options['usage_days'])
+                ),
+                batch_size=1000,
+            )
+        return user, [garden.id for garden in gardens]
+
+    def _cleanup(self, user, gardens):
+        """Delete the rows seeded by this run (with --no-test-database)."""
+        Garden.objects.filter(id__in=gardens).delete()
+        user.delete()
+
+    def _requests(self, endpoint, gardens, count):
+        """(method, path, body) of ``count`` requests spread over the gardens."""
+        for i in range(count):
+            garden_id = gardens[i % len(gardens)]
+            body = endpoint.body(garden_id, i) if endpoint.body else None
+            yield endpoint.method, endpoint.path.format(garden_id=garden_id), body
+
+    def _run_client(self, token, gardens, options):
+        client = APIClient(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        client.credentials(HTTP_AUTHORIZATION=f'JWT {token}')
+
+        def send(method, path, body):
+            if body is None:
+                response = getattr(client, method)(path)
+            else:
+                response = getattr(client, method)(path, body, format='json')
+            if response.status_code >= 400:
+                raise CommandError(f"{method.upper()} {path}: HTTP {response.status_code}")
+
+        results = {}
+        for name in options['endpoints']:
+            endpoint = ENDPOINTS[name]
+            for request in self._requests(endpoint, gardens, options['warmup']):
+                send(*request)
+
+            samples = []
+            with count_queries() as stats:
+                start = time.perf_counter()
+                for request in self._requests(endpoint, gardens, options['requests']):
+                    with timer(samples):
+                        send(*request)
+                elapsed = time.perf_counter() - start
+            results[f'client {name}'] = self._report(
+                f'client {name}', samples, elapsed, stats['queries'] / len(samples)
+            )
+        return results
+
+    def _run_asgi(self, token, gardens, options):
+        server = None
+        url = options['url']
+        if not url:
+            server, url = self._start_server(options['server'])
+        try:
+            return self._drive_server(url.rstrip('/'), token, gardens, options)
+        finally:
+            if server is not None:
+                server.terminate()
+                server.wait(timeout=10)
+
+    def _start_server(self, name):
+        with socket.socket() as sock:
+            sock.bind(('127.0.0.1', 0))
+            port = sock.getsockname()[1]
+        if name == 'daphne':
+            command = [sys.executable, '-m', 'daphne', '-v', '0', '-b', '127.0.0.1', '-p', str(port),
+                       'core.asgi:application']
+        else:
+            command = [sys.executable, '-m', 'uvicorn', 'core.asgi:application', '--host', '127.0.0.1',
+                       '--port', str(port), '--log-level', 'warning']
+        # Same signing key, so the server accepts this process' tokens, and
+        # same (test) database; replica reads go to the primary, as in tests
+        env = dict(os.environ, SECRET_KEY=settings.SECRET_KEY,
+                   DB_NAME=connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+        env.pop('DB_REPLICA_HOST', None)
+        env.pop('DB_REPLICA_NAME', None)
+        server = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env, stdout=subprocess.DEVNULL)
+        url = f'http://127.0.0.1:{port}'
+
+        deadline = time.monotonic() + 30
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise CommandError(f"{name} exited with code {server.returncode}")
+            try:
+                requests.get(f'{url}/api/', timeout=1)
+                self.stdout.write(f"{name} listening on {url}")
+                return server, url
+            except requests.ConnectionError:
+                time.sleep(0.2)
+        server.terminate()
+        raise CommandError(f"{name} did not start within 30s")
+
+    def _drive_server(self, url, token, gardens, options):
+        concurrency = options['concurrency']
+        headers = {'Authorization': f'JWT {token}', 'Host': settings.ALLOWED_HOSTS[0]}
+
+        def worker(batch):
+            samples = []
+            with requests.Session() as session:
+                session.headers.update(headers)
+                for method, path, body in batch:
+                    with timer(samples):
+                        response = session.request(method, url + path, json=body, timeout=30)
+                    if response.status_code >= 400:
+                        raise CommandError(f"{method.upper()} {path}: HTTP {response.status_code}")
+            return samples
+
+        results = {}
+        for name in options['endpoints']:
+            endpoint = ENDPOINTS[name]
+            worker(list(self._requests(endpoint, gardens, options['warmup'])))
+
+            batch = list(self._requests(endpoint, gardens, options['requests']))
+            batches = [batch[i::concurrency] for i in range(concurrency)]
+            view = resolve(endpoint.path.split('?')[0]).view_name
+            before = self._server_queries(url, view)
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                samples = [sample for result in executor.map(worker, batches) for sample in result]
+            elapsed = time.perf_counter() - start
+            after = self._server_queries(url, view)
+
+            queries = None
+            if before is not None and after is not None and after[1] > before[1]:
+                queries = (after[0] - before[0]) / (after[1] - before[1])
+            results[f'asgi {name}'] = self._report(f'asgi {name}', samples, elapsed, queries)
+        return results
+
+    def _server_queries(self, url, view):
+        """(queries, requests) recorded by the server's /metrics for a view, if exposed."""
+        try:
+            body = requests.get(f'{url}/metrics', timeout=5).text
+        except requests.RequestException:
+            return None
+        totals = {}
+        for family in text_string_to_metric_families(body):
+            if family.name != 'django_request_db_queries':
+                continue
+            for sample in family.samples:
+                if sample.labels.get('view') == view and sample.name.endswith(('_sum', '_count')):
+                    totals[sample.name.rsplit('_', 1)[1]] = sample.value
+        if 'count' not in totals:
+            return (0.0, 0.0)
+        return totals.get('sum', 0.0), totals['count']
+
+    def _report(self, label, samples, elapsed, queries):
+        summary = summarize(samples)
+        rps = len(samples) / elapsed
+        queries_text = 'n/a' if queries is None else f'{queries:.2f}'
+        self.stdout.write(f"{format_summary(label, summary)} queries={queries_text} req/s={rps:.1f}")
+        return {
+            'p50': round(summary['p50'], 3),
+            'p95': round(summary['p95'], 3),
+            'p99': round(summary['p99'], 3),
+            'queries': None if queries is None else round(queries, 2),
+            'rps': round(rps, 1),
+        }
+
+    def _check_baseline(self, results, options):
+        config = {key: options[key] for key in ('gardens', 'valves', 'logs', 'usage_days', 'requests', 'concurrency')}
+        path = options['baseline']
+
+        if options['update_baseline']:
+            with open(path, 'w') as f:
+                json.dump({'config': config, 'results': results}, f, indent=2, sort_keys=True)
+                f.write('\n')
+            self.stdout.write(self.style.SUCCESS(f"Baseline written to {path}"))
+            return
+
+        if not os.path.exists(path):
+            self.stdout.write(f"No baseline at {path}; run with --update-baseline to create it")
+            return
+        with open(path) as f:
+            baseline = json.load(f)
+        if baseline.get('config') != config:
+            self.stdout.write(self.style.WARNING(
+                f"Baseline was recorded with {baseline.get('config')}, comparing anyway"
+            ))
+
+        regressions = compare_to_baseline(results, baseline.get('results', {}), options['tolerance'])
+        if regressions:
+            for regression in regressions:
+                self.stderr.write(f"REGRESSION {regression}")
+            raise CommandError(f"{len(regressions)} regression(s) against {path}")
+        self.stdout.write(self.style.SUCCESS(f"No regression against {path}"))
@@ -0,0 +1,51 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.core.management.base import BaseCommand
+
+from core.utils.benchmark import format_summary, summarize, timer
+from core.utils.cache import TieredCache
+
+BENCHMARK_KEY = 'benchmark:cache-hit'
+
+
+class Command(BaseCommand):
+    help = 'Measure cache hit latency of each configured cache tier.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=1000,
+                            help='Number of hits to time per tier')
+        parser.add_argument('--size', type=int, default=1024,
+                            help='Size of the cached value in bytes')
+
+    def handle(self, *args, **options):
+        value = 'x' * options['size']
+        self.stdout.write(f"CACHE_MODE={settings.CACHE_MODE}")
+
+        self._report('local', caches['local'], value, options['iterations'])
+        redis_available = self._report('redis', caches['redis'], value, options['iterations'])
+
+        default = caches['default']
+        if isinstance(default, TieredCache):
+            self._report('default (L1 hit)', default, value, options['iterations'])
+            if redis_available:
+                # Evicting L1 before each read forces the read-through to L2
+                self._report('default (L2 hit)', default, value, options['iterations'],
+                             before_each=lambda: default.l1.delete(BENCHMARK_KEY))
+
+    def _report(self, label, cache, value, iterations, before_each=None) -> bool:
+        try:
+            cache.set(BENCHMARK_KEY, value, 60)
+            cache.get(BENCHMARK_KEY)
+        except Exception as e:
+            self.stdout.write(self.style.WARNING(f"{label:<32} unavailable: {e}"))
+            return False
+
+        samples = []
+        for _ in range(iterations):
+            if before_each:
+                before_each()
+            with timer(samples):
+                cache.get(BENCHMARK_KEY)
+        cache.delete(BENCHMARK_KEY)
+        self.stdout.write(format_summary(label, summarize(samples)))
+        return True
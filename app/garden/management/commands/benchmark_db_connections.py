@@ -0,0 +1,91 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS, close_old_connections, connections
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from core.utils.benchmark import format_summary, summarize, timer
+from garden.models import Garden, GardenAccess, Valve
+from garden.views import ValveViewSet
+from users.models import User
+
+
+class UncachedValveViewSet(ValveViewSet):
+    # Measure the database path, not the response cache
+    cached_actions = ()
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure requests/second of the valve status endpoint with connections '
+        'closed after every request (CONN_MAX_AGE=0) and reused across requests. '
+        'Run once per DB_CONN_MODE to compare against the pooled backend.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Number of requests per mode')
+        parser.add_argument('--concurrency', type=int, default=4,
+                            help='Number of threads sending requests')
+        parser.add_argument('--max-age', type=int, default=60,
+                            help='CONN_MAX_AGE of the reuse mode')
+
+    def handle(self, *args, **options):
+        db_settings = connections.settings[DEFAULT_DB_ALIAS]
+        self.stdout.write(f"DB_CONN_MODE={settings.DB_CONN_MODE} ENGINE={db_settings['ENGINE']}")
+
+        user = User.objects.create_user(email='benchmark-db@smartgarden.local', password=None)
+        garden = Garden.objects.create(name='Connection benchmark')
+        original = {key: db_settings.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS')}
+        try:
+            GardenAccess.objects.create(user=user, garden=garden, role='staff')
+            for number in range(1, 5):
+                Valve.objects.create(garden=garden, number=number)
+            connections.close_all()
+
+            for max_age in (0, options['max_age']):
+                db_settings['CONN_MAX_AGE'] = max_age
+                db_settings['CONN_HEALTH_CHECKS'] = max_age > 0
+                self._run(f"CONN_MAX_AGE={max_age}", user, garden, options)
+        finally:
+            db_settings.update(original)
+            garden.delete()
+            user.delete()
+
+    def _run(self, label, user, garden, options):
+        view = UncachedValveViewSet.as_view({'get': 'status'})
+        factory = APIRequestFactory()
+        path = f'/api/garden/valves/status/?garden_id={garden.id}'
+
+        def request(samples):
+            # What Django's request_started/request_finished handlers do
+            close_old_connections()
+            try:
+                with timer(samples):
+                    api_request = factory.get(path, SERVER_NAME=settings.ALLOWED_HOSTS[0])
+                    force_authenticate(api_request, user=user)
+                    view(api_request).render()
+            finally:
+                close_old_connections()
+
+        def worker(count):
+            samples = []
+            try:
+                for _ in range(count):
+                    request(samples)
+            finally:
+                connections.close_all()
+            return samples
+
+        concurrency = options['concurrency']
+        counts = [options['requests'] // concurrency] * concurrency
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            samples = [sample for result in executor.map(worker, counts) for sample in result]
+        elapsed = time.perf_counter() - start
+
+        self.stdout.write(
+            f"{format_summary(label, summarize(samples))} req/s={len(samples) / elapsed:.1f}"
+        )
@@ -0,0 +1,77 @@
+import io
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from core.parsers import ORJSONParser
+from core.renderers import ORJSONRenderer
+from core.utils.benchmark import format_summary, summarize, timer
+from garden.models import Garden, PowerConsumption, SystemLog, Valve, WaterUsage
+from garden.serializers import PowerConsumptionSerializer, SystemLogSerializer, WaterUsageSerializer
+
+RENDERERS = (('json', JSONRenderer()), ('orjson', ORJSONRenderer()))
+PARSERS = (('json', JSONParser()), ('orjson', ORJSONParser()))
+
+
+def build_rows(dataset, count):
+    """Unsaved instances shaped like the rows of a large list response."""
+    garden = Garden(id=1, name='JSON benchmark', location='Benchmark')
+    now = timezone.now()
+    if dataset == 'logs':
+        return SystemLogSerializer, [
+            SystemLog(id=i, garden=garden, event=f'Valve {i % 8 + 1} turned on', source='Automatic',
+                      timestamp=now - timedelta(seconds=i))
+            for i in range(count)
+        ]
+    if dataset == 'usage':
+        valves = [Valve(id=number, garden=garden, number=number) for number in range(1, 9)]
+        return WaterUsageSerializer, [
+            WaterUsage(id=i, garden=garden, valve=valves[i % 8], bucket_start=now - timedelta(hours=i),
+                       liters=i * 0.37)
+            for i in range(count)
+        ]
+    return PowerConsumptionSerializer, [
+        PowerConsumption(id=i, garden=garden, measured_at=now - timedelta(hours=i), consumption=i * 1.3)
+        for i in range(count)
+    ]
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure rendering and parsing time of list responses with the stdlib '
+        'JSON renderer/parser and the orjson ones, over the existing serializers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Number of rows per response')
+        parser.add_argument('--datasets', nargs='+', choices=['logs', 'usage', 'power'],
+                            default=['logs', 'usage', 'power'], help='Serializers to render')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of timed runs per renderer and size')
+
+    def handle(self, *args, **options):
+        for dataset in options['datasets']:
+            for size in options['sizes']:
+                serializer_class, rows = build_rows(dataset, size)
+                # Serialization is the same for both renderers, so it is done once
+                data = serializer_class(rows, many=True).data
+                body = JSONRenderer().render(data)
+                self.stdout.write(f"{dataset} x{size} ({len(body) / 1024:.0f} KiB)")
+
+                for name, renderer in RENDERERS:
+                    samples = []
+                    for _ in range(options['repeat']):
+                        with timer(samples):
+                            renderer.render(data)
+                    self.stdout.write(format_summary(f'  render {name}', summarize(samples)))
+
+                for name, parser in PARSERS:
+                    samples = []
+                    for _ in range(options['repeat']):
+                        with timer(samples):
+                            parser.parse(io.BytesIO(body))
+                    self.stdout.write(format_summary(f'  parse {name}', summarize(samples)))
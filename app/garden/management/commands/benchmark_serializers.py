@@ -0,0 +1,81 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from core.utils.benchmark import summarize, timer
+from garden.models import Garden, SystemLog, Valve, WaterUsage
+from garden.serializers import (
+    SystemLogValuesSerializer, ValveValuesSerializer, WaterUsageValuesSerializer
+)
+
+DATASETS = {
+    'logs': SystemLogValuesSerializer,
+    'valves': ValveValuesSerializer,
+    'usage': WaterUsageValuesSerializer,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the per-row cost of list serialization (query included) with '
+        'the model serializers and with the read-only values() serializers.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=5000,
+                            help='Number of rows per dataset')
+        parser.add_argument('--repeat', type=int, default=5,
+                            help='Number of timed runs per serializer')
+
+    def handle(self, *args, **options):
+        # Rolled back at the end, so the rows never commit (nor signal a change)
+        with transaction.atomic():
+            self._run(options['rows'], options['repeat'])
+            transaction.set_rollback(True)
+
+    def _run(self, rows, repeat):
+        garden = Garden.objects.create(name='Serializer benchmark')
+        now = timezone.now()
+        valves = Valve.objects.bulk_create(
+            Valve(garden=garden, number=number, last_active=now) for number in range(1, rows + 1)
+        )
+        SystemLog.objects.bulk_create(
+            SystemLog(garden=garden, event=f'Valve {i % 8 + 1} turned on', source='Automatic',
+                      timestamp=now - timedelta(seconds=i))
+            for i in range(rows)
+        )
+        WaterUsage.objects.bulk_create(
+            WaterUsage(garden=garden, valve=valves[i % 8], bucket_start=now - timedelta(hours=i), liters=i * 0.37)
+            for i in range(rows)
+        )
+
+        for dataset, values_serializer in DATASETS.items():
+            model_serializer = values_serializer.model_serializer
+            queryset = model_serializer.Meta.model.objects.filter(garden=garden)
+            self._report(f'{dataset} model', rows, repeat, lambda: model_serializer(
+                queryset.select_related(*self._related(model_serializer)), many=True
+            ).data)
+            self._report(f'{dataset} values', rows, repeat, lambda: values_serializer(
+                values_serializer.values(queryset)
+            ).data)
+
+    def _related(self, model_serializer):
+        # What the model serializer's dotted sources (``garden.name``) traverse
+        return {
+            field.source.split('.')[0]
+            for field in model_serializer().fields.values()
+            if '.' in field.source
+        }
+
+    def _report(self, label, rows, repeat, serialize):
+        samples = []
+        for _ in range(repeat):
+            with timer(samples):
+                data = serialize()
+        assert len(data) == rows
+        summary = summarize(samples)
+        self.stdout.write(
+            f"{label:<20} p50={summary['p50']:9.3f}ms per row={summary['p50'] * 1000 / rows:7.2f}us"
+        )
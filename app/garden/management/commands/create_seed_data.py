@@ -208,32 +208,33 @@ class Command(BaseCommand):
         # Create water usage data
         WaterUsage.objects.filter(garden=haj_ebi_garden).delete()
         
-        for i in range(7):  # Last 7 days
-            date = timezone.now() - timedelta(days=i)
-            WaterUsage.objects.create(
+        usage_ranges = {1: (15, 25), 2: (10, 20), 3: (8, 15)}
+        valves = {valve.number: valve for valve in Valve.objects.filter(garden=haj_ebi_garden)}
+        WaterUsage.objects.bulk_create([
+            WaterUsage(
                 garden=haj_ebi_garden,
-                period=f'Day {i+1}',
-                valve1=random.uniform(15, 25),
-                valve2=random.uniform(10, 20),
-                valve3=random.uniform(8, 15),
-                timestamp=date
+                valve=valves[number],
+                bucket_start=timezone.now() - timedelta(days=i),
+                liters=random.uniform(*usage_ranges[number])
             )
+            for i in range(7)  # Last 7 days
+            for number in usage_ranges
+            if number in valves
+        ])
         
         self.stdout.write(self.style.SUCCESS('Created water usage data for last 7 days'))
         
         # Create power consumption data
         PowerConsumption.objects.filter(garden=haj_ebi_garden).delete()
         
-        today = timezone.now().date()
+        midnight = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
         for hour in range(24):
-            time_str = f'{hour:02d}:00'
             consumption = random.uniform(20, 60) if 6 <= hour <= 20 else random.uniform(10, 25)
             
             PowerConsumption.objects.create(
                 garden=haj_ebi_garden,
-                time=time_str,
-                consumption=consumption,
-                date=today
+                measured_at=midnight + timedelta(hours=hour),
+                consumption=consumption
             )
         
         self.stdout.write(self.style.SUCCESS('Created power consumption data for today'))
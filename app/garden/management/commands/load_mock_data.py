@@ -127,34 +127,33 @@ class Command(BaseCommand):
         
         # Create water usage data
         self.stdout.write('Creating water usage data...')
+        valves = {valve.number: valve for valve in Valve.objects.filter(garden=garden)}
         mock_water_usage = [
-            {"garden": garden, "period": "Week 1", "valve1": 10, "valve2": 5, "valve3": 7},
-            {"garden": garden, "period": "Week 2", "valve1": 12, "valve2": 6, "valve3": 8},
+            {"days_ago": 14, "liters": {1: 10, 2: 5, 3: 7}},
+            {"days_ago": 7, "liters": {1: 12, 2: 6, 3: 8}},
         ]
         
-        for usage_data in mock_water_usage:
-            WaterUsage.objects.create(**usage_data)
+        WaterUsage.objects.bulk_create([
+            WaterUsage(
+                garden=garden,
+                valve=valves[number],
+                bucket_start=timezone.now() - timedelta(days=usage_data["days_ago"]),
+                liters=liters
+            )
+            for usage_data in mock_water_usage
+            for number, liters in usage_data["liters"].items()
+        ])
         
         # Create power consumption data
         self.stdout.write('Creating power consumption data...')
-        today = timezone.now().date()
-        mock_power_consumption = [
-            {"garden": garden, "time": "00:00", "consumption": 10, "date": today},
-            {"garden": garden, "time": "01:00", "consumption": 12, "date": today},
-            {"garden": garden, "time": "02:00", "consumption": 8, "date": today},
-            {"garden": garden, "time": "03:00", "consumption": 5, "date": today},
-            {"garden": garden, "time": "04:00", "consumption": 7, "date": today},
-            {"garden": garden, "time": "05:00", "consumption": 9, "date": today},
-            {"garden": garden, "time": "06:00", "consumption": 11, "date": today},
-            {"garden": garden, "time": "07:00", "consumption": 14, "date": today},
-            {"garden": garden, "time": "08:00", "consumption": 16, "date": today},
-            {"garden": garden, "time": "09:00", "consumption": 18, "date": today},
-            {"garden": garden, "time": "10:00", "consumption": 15, "date": today},
-            {"garden": garden, "time": "11:00", "consumption": 13, "date": today},
-            {"garden": garden, "time": "12:00", "consumption": 11, "date": today},
-        ]
+        midnight = timezone.localtime().replace(hour=0, minute=0, second=0, microsecond=0)
+        mock_power_consumption = [10, 12, 8, 5, 7, 9, 11, 14, 16, 18, 15, 13, 11]
         
-        for consumption_data in mock_power_consumption:
-            PowerConsumption.objects.create(**consumption_data)
+        for hour, consumption in enumerate(mock_power_consumption):
+            PowerConsumption.objects.create(
+                garden=garden,
+                measured_at=midnight + timedelta(hours=hour),
+                consumption=consumption
+            )
             
         self.stdout.write(self.style.SUCCESS('Successfully loaded mock data into the database!')) 
\ No newline at end of file
@@ -0,0 +1,19 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:39
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0004_garden_alter_valve_number_power_garden_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='systemlog',
+            name='timestamp',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.0.1 on 2026-10-19 14:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0005_systemlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='garden',
+            name='log_retention_days',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='systemlog',
+            index=models.Index(fields=['garden', 'timestamp'], name='garden_syst_garden__18410a_idx'),
+        ),
+    ]
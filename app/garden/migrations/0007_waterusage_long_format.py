@@ -0,0 +1,104 @@
+import logging
+from collections import Counter, defaultdict
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def unpivot_water_usage(apps, schema_editor):
+    """
+    Turn each (valve1, valve2, valve3) row into one row per valve with usage.
+
+    Valve rows are hardware records, so none are created: readings of valves
+    a garden does not have are skipped and reported.
+    """
+    LegacyWaterUsage = apps.get_model('garden', 'LegacyWaterUsage')
+    WaterUsage = apps.get_model('garden', 'WaterUsage')
+    Valve = apps.get_model('garden', 'Valve')
+    db = schema_editor.connection.alias
+
+    valves = {
+        (garden_id, number): valve_id
+        for valve_id, garden_id, number in Valve.objects.using(db).filter(
+            number__in=(1, 2, 3)
+        ).values_list('id', 'garden_id', 'number')
+    }
+    skipped = Counter()
+    batch = []
+    for row in LegacyWaterUsage.objects.using(db).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        for number in (1, 2, 3):
+            liters = getattr(row, f'valve{number}')
+            if not liters:
+                continue
+            valve_id = valves.get((row.garden_id, number))
+            if valve_id is None:
+                skipped[row.garden_id, number] += 1
+                continue
+            batch.append(WaterUsage(
+                garden_id=row.garden_id, valve_id=valve_id, bucket_start=row.timestamp, liters=liters
+            ))
+        if len(batch) >= BATCH_SIZE:
+            WaterUsage.objects.using(db).bulk_create(batch)
+            batch = []
+    WaterUsage.objects.using(db).bulk_create(batch)
+
+    for (garden_id, number), count in sorted(skipped.items()):
+        logger.warning(f"Skipped {count} water usage readings of garden {garden_id}: it has no valve {number}")
+
+
+def pivot_water_usage(apps, schema_editor):
+    """Reverse: rebuild one row per (garden, bucket) from valves 1-3."""
+    LegacyWaterUsage = apps.get_model('garden', 'LegacyWaterUsage')
+    WaterUsage = apps.get_model('garden', 'WaterUsage')
+    db = schema_editor.connection.alias
+
+    buckets = defaultdict(dict)
+    for garden_id, bucket_start, number, liters in WaterUsage.objects.using(db).values_list(
+        'garden_id', 'bucket_start', 'valve__number', 'liters'
+    ).iterator(chunk_size=BATCH_SIZE):
+        if number in (1, 2, 3):
+            valve = f'valve{number}'
+            buckets[garden_id, bucket_start][valve] = buckets[garden_id, bucket_start].get(valve, 0) + liters
+
+    for (garden_id, bucket_start), usage in buckets.items():
+        row = LegacyWaterUsage.objects.using(db).create(
+            garden_id=garden_id, period=bucket_start.date().isoformat(), **usage
+        )
+        # timestamp is auto_now_add
+        LegacyWaterUsage.objects.using(db).filter(pk=row.pk).update(timestamp=bucket_start)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0006_systemlog_retention'),
+    ]
+
+    operations = [
+        migrations.RenameModel('WaterUsage', 'LegacyWaterUsage'),
+        migrations.AlterField(
+            model_name='legacywaterusage',
+            name='garden',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='garden.garden'),
+        ),
+        migrations.CreateModel(
+            name='WaterUsage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket_start', models.DateTimeField()),
+                ('liters', models.FloatField(default=0)),
+                ('garden', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='water_usages', to='garden.garden')),
+                ('valve', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='water_usages', to='garden.valve')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['garden', 'bucket_start'], name='garden_wate_garden__36b959_idx')],
+            },
+        ),
+        migrations.RunPython(unpivot_water_usage, pivot_water_usage),
+        migrations.DeleteModel('LegacyWaterUsage'),
+    ]
@@ -0,0 +1,87 @@
+from datetime import datetime, time
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+BATCH_SIZE = 1000
+
+
+def _parse_time(value):
+    """Parse the legacy "HH:MM" strings, falling back to midnight."""
+    try:
+        hour, minute = (int(part) for part in value.strip().split(':')[:2])
+        return time(hour, minute)
+    except (AttributeError, ValueError):
+        return time.min
+
+
+def fill_measured_at(apps, schema_editor):
+    """Combine the legacy local date and "HH:MM" time into an aware instant."""
+    PowerConsumption = apps.get_model('garden', 'PowerConsumption')
+    db = schema_editor.connection.alias
+
+    batch = []
+    for row in PowerConsumption.objects.using(db).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        row.measured_at = timezone.make_aware(datetime.combine(row.date, _parse_time(row.time)))
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            PowerConsumption.objects.using(db).bulk_update(batch, ['measured_at'])
+            batch = []
+    PowerConsumption.objects.using(db).bulk_update(batch, ['measured_at'])
+
+
+def fill_date_and_time(apps, schema_editor):
+    """Reverse: split measured_at back into the local date and "HH:MM" time."""
+    PowerConsumption = apps.get_model('garden', 'PowerConsumption')
+    db = schema_editor.connection.alias
+
+    batch = []
+    for row in PowerConsumption.objects.using(db).order_by('pk').iterator(chunk_size=BATCH_SIZE):
+        local = timezone.localtime(row.measured_at)
+        row.date = local.date()
+        row.time = local.strftime('%H:%M')
+        batch.append(row)
+        if len(batch) >= BATCH_SIZE:
+            PowerConsumption.objects.using(db).bulk_update(batch, ['date', 'time'])
+            batch = []
+    PowerConsumption.objects.using(db).bulk_update(batch, ['date', 'time'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('garden', '0007_waterusage_long_format'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='powerconsumption',
+            name='measured_at',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_measured_at, fill_date_and_time),
+        migrations.AlterField(
+            model_name='powerconsumption',
+            name='measured_at',
+            field=models.DateTimeField(default=timezone.now),
+        ),
+        # A default lets the reverse migration re-add the column to existing rows
+        migrations.AlterField(
+            model_name='powerconsumption',
+            name='time',
+            field=models.CharField(default='00:00', max_length=10),
+        ),
+        migrations.RemoveField(
+            model_name='powerconsumption',
+            name='date',
+        ),
+        migrations.RemoveField(
+            model_name='powerconsumption',
+            name='time',
+        ),
+        migrations.AddIndex(
+            model_name='powerconsumption',
+            index=models.Index(fields=['garden', 'measured_at'], name='garden_powe_garden__8042a0_idx'),
+        ),
+    ]
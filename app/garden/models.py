@@ -1,5 +1,6 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 
 class Garden(models.Model):
@@ -7,6 +8,8 @@ class Garden(models.Model):
     name = models.CharField(max_length=100)
     description = models.TextField(blank=True)
     location = models.CharField(max_length=255, blank=True)
+    # Days to keep system logs; falls back to SYSTEM_LOG_RETENTION_DAYS when empty
+    log_retention_days = models.PositiveIntegerField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -77,7 +80,8 @@ class SystemLog(models.Model):
     """Model for system logs."""
     garden = models.ForeignKey(Garden, on_delete=models.CASCADE, related_name='system_logs')
     event = models.CharField(max_length=255)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the event is emitted so batched writes keep the original time
+    timestamp = models.DateTimeField(default=timezone.now, editable=False)
     source = models.CharField(max_length=20, choices=[
         ('Manual', 'Manual'),
         ('Automatic', 'Automatic'),
@@ -86,6 +90,9 @@ class SystemLog(models.Model):
     
     class Meta:
         ordering = ['-timestamp']
+        indexes = [
+            models.Index(fields=['garden', 'timestamp']),
+        ]
     
     def __str__(self):
         return f"{self.garden.name} - {self.event} - {self.timestamp}"
@@ -112,24 +119,31 @@ class Schedule(models.Model):
 
 
 class WaterUsage(models.Model):
-    """Model for water usage data."""
+    """Liters used by one valve during one time bucket (long format)."""
     garden = models.ForeignKey(Garden, on_delete=models.CASCADE, related_name='water_usages')
-    period = models.CharField(max_length=20)  # Week 1, Week 2, etc.
-    valve1 = models.FloatField(default=0)
-    valve2 = models.FloatField(default=0)
-    valve3 = models.FloatField(default=0)
-    timestamp = models.DateTimeField(auto_now_add=True)
+    valve = models.ForeignKey(Valve, on_delete=models.CASCADE, related_name='water_usages')
+    bucket_start = models.DateTimeField()
+    liters = models.FloatField(default=0)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['garden', 'bucket_start']),
+        ]
     
     def __str__(self):
-        return f"{self.garden.name} - Water usage for {self.period}"
+        return f"{self.garden.name} - Valve {self.valve.number} used {self.liters}L from {self.bucket_start}"
 
 
 class PowerConsumption(models.Model):
-    """Model for power consumption data."""
+    """Power consumption measured by a garden at one instant."""
     garden = models.ForeignKey(Garden, on_delete=models.CASCADE, related_name='power_consumptions')
-    time = models.CharField(max_length=10)  # Format: "00:00"
+    measured_at = models.DateTimeField(default=timezone.now)
     consumption = models.FloatField()
-    date = models.DateField(auto_now_add=True)
+    
+    class Meta:
+        indexes = [
+            models.Index(fields=['garden', 'measured_at']),
+        ]
     
     def __str__(self):
-        return f"{self.garden.name} - Power consumption at {self.time}: {self.consumption}" 
\ No newline at end of file
+        return f"{self.garden.name} - Power consumption at {self.measured_at}: {self.consumption}"
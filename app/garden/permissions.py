@@ -1,7 +1,45 @@
+from typing import Optional
+
 from rest_framework import permissions
 from .models import GardenAccess
 
 
+def garden_role(user, garden_id) -> Optional[str]:
+    """
+    Return the user's role in a garden, or None without access.
+
+    Users authenticated from token claims carry their garden roles
+    (``garden_roles``), so the check needs no query.
+    """
+    garden_roles = getattr(user, 'garden_roles', None)
+    if garden_roles is not None:
+        try:
+            return garden_roles.get(int(garden_id))
+        except (TypeError, ValueError):
+            return None
+
+    return GardenAccess.objects.filter(
+        user=user,
+        garden_id=garden_id
+    ).values_list('role', flat=True).first()
+
+
+def accessible_garden_ids(user):
+    """Garden ids the user has access to, as a list or a subquery."""
+    garden_roles = getattr(user, 'garden_roles', None)
+    if garden_roles is not None:
+        return list(garden_roles)
+    return GardenAccess.objects.filter(user=user).values('garden_id')
+
+
+def _object_garden_id(obj):
+    if hasattr(obj, 'garden_id'):
+        return obj.garden_id
+    if hasattr(obj, 'garden'):
+        return obj.garden.pk
+    return None
+
+
 class HasGardenAccess(permissions.BasePermission):
     """
     Base permission to check if the user has access to a garden.
@@ -9,147 +47,87 @@ class HasGardenAccess(permissions.BasePermission):
     def has_permission(self, request, view):
         if not request.user.is_authenticated:
             return False
-            
+
         # Superusers can access everything
         if request.user.is_superuser:
             return True
-            
+
         # For list views, allow access, filtering will happen in the queryset
         if view.action in ['list', 'retrieve']:
             return True
-            
+
         # For detail actions (like control, set_duration), check object permission
         if hasattr(view, 'get_object'):
             return True  # Will be checked in has_object_permission
-            
+
         # For garden-specific actions, check if garden_id is provided
         garden_id = view.kwargs.get('garden_id') or request.query_params.get('garden_id')
-        
+
         if garden_id is None:
             # Allow if no specific garden is required (will be filtered in queryset)
             return True
-            
+
         # Check if the user has access to this garden
-        return GardenAccess.objects.filter(
-            user=request.user,
-            garden_id=garden_id
-        ).exists()
-    
+        return garden_role(request.user, garden_id) is not None
+
     def has_object_permission(self, request, view, obj):
         # Superusers can access everything
         if request.user.is_superuser:
             return True
-            
-        # Check if obj has a garden attribute
-        if hasattr(obj, 'garden'):
-            garden = obj.garden
-        elif hasattr(obj, 'garden_id'):
-            garden_id = obj.garden_id
-            return GardenAccess.objects.filter(
-                user=request.user,
-                garden_id=garden_id
-            ).exists()
-        else:
+
+        garden_id = _object_garden_id(obj)
+        if garden_id is None:
             # If the object doesn't have a garden relation, allow access
             return True
-            
+
         # Check user's access to this garden
-        return GardenAccess.objects.filter(
-            user=request.user,
-            garden=garden
-        ).exists()
+        return garden_role(request.user, garden_id) is not None
 
 
-class IsGardenAdmin(HasGardenAccess):
+class GardenRolePermission(HasGardenAccess):
     """
-    Permission to only allow garden admins to access the view or object.
+    Permission to only allow users with one of ``roles`` in the garden.
     """
+    roles = ()
+
     def has_permission(self, request, view):
         if not super().has_permission(request, view):
             return False
-            
+
         # For list views, allow access, filtering will happen in queryset
         if view.action == 'list':
             return True
-            
+
         garden_id = view.kwargs.get('garden_id') or request.query_params.get('garden_id')
-        
+
         if garden_id is None:
             return False
-            
-        return GardenAccess.objects.filter(
-            user=request.user,
-            garden_id=garden_id,
-            role='admin'
-        ).exists()
-    
+
+        return garden_role(request.user, garden_id) in self.roles
+
     def has_object_permission(self, request, view, obj):
         if not super().has_object_permission(request, view, obj):
             return False
-            
-        if hasattr(obj, 'garden'):
-            garden = obj.garden
-        elif hasattr(obj, 'garden_id'):
-            garden_id = obj.garden_id
-            return GardenAccess.objects.filter(
-                user=request.user,
-                garden_id=garden_id,
-                role='admin'
-            ).exists()
-        else:
+
+        garden_id = _object_garden_id(obj)
+        if garden_id is None:
             return False
-            
-        return GardenAccess.objects.filter(
-            user=request.user,
-            garden=garden,
-            role='admin'
-        ).exists()
+
+        return garden_role(request.user, garden_id) in self.roles
 
 
-class IsGardenManager(HasGardenAccess):
+class IsGardenAdmin(GardenRolePermission):
+    """
+    Permission to only allow garden admins to access the view or object.
+    """
+    roles = ('admin',)
+
+
+class IsGardenManager(GardenRolePermission):
     """
     Permission to only allow garden managers or admins to access the view or object.
     """
-    def has_permission(self, request, view):
-        if not super().has_permission(request, view):
-            return False
-            
-        # For list views, allow access, filtering will happen in queryset
-        if view.action == 'list':
-            return True
-            
-        garden_id = view.kwargs.get('garden_id') or request.query_params.get('garden_id')
-        
-        if garden_id is None:
-            return False
-            
-        return GardenAccess.objects.filter(
-            user=request.user,
-            garden_id=garden_id,
-            role__in=['admin', 'manager']
-        ).exists()
-    
-    def has_object_permission(self, request, view, obj):
-        if not super().has_object_permission(request, view, obj):
-            return False
-            
-        if hasattr(obj, 'garden'):
-            garden = obj.garden
-        elif hasattr(obj, 'garden_id'):
-            garden_id = obj.garden_id
-            return GardenAccess.objects.filter(
-                user=request.user,
-                garden_id=garden_id,
-                role__in=['admin', 'manager']
-            ).exists()
-        else:
-            return False
-            
-        return GardenAccess.objects.filter(
-            user=request.user,
-            garden=garden,
-            role__in=['admin', 'manager']
-        ).exists()
+    roles = ('admin', 'manager')
 
 
 class IsGardenStaff(HasGardenAccess):
@@ -157,4 +135,4 @@ class IsGardenStaff(HasGardenAccess):
     Permission to allow any role (admin, manager, staff) to access the view or object.
     """
     # This class just inherits from HasGardenAccess without additional restrictions
-    pass 
\ No newline at end of file
+    pass
@@ -0,0 +1,133 @@
+"""
+SystemLog retention and archival.
+
+Each garden keeps its logs for ``Garden.log_retention_days`` days, falling back
+to ``SYSTEM_LOG_RETENTION_DAYS``. Expired rows are deleted in bounded primary
+key ranges and, when ``SYSTEM_LOG_ARCHIVE`` is set, archived first to
+gzip-compressed NDJSON files (``ndjson``) or to InfluxDB (``influx``).
+"""
+
+import gzip
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.utils import timezone
+
+from core.utils.db import delete_in_batches
+from .models import Garden, SystemLog
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FIELDS = ('id', 'garden_id', 'event', 'source', 'timestamp')
+
+
+class NDJSONArchiver:
+    """Append expired rows to one gzip NDJSON file per garden and day."""
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory or settings.SYSTEM_LOG_ARCHIVE_DIR
+
+    def path_for(self, garden_id: int, run_date) -> str:
+        return os.path.join(
+            self.directory, f"system-logs-garden{garden_id}-{run_date:%Y%m%d}.ndjson.gz"
+        )
+
+    def __call__(self, batch) -> None:
+        rows = list(batch.order_by('pk').values(*ARCHIVE_FIELDS))
+        if not rows:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(rows[0]['garden_id'], timezone.localdate())
+        # gzip supports appending members, so repeated batches share one file
+        with gzip.open(path, 'at', encoding='utf-8') as archive:
+            for row in rows:
+                row['timestamp'] = row['timestamp'].isoformat()
+                archive.write(json.dumps(row) + '\n')
+
+
+class InfluxArchiver:
+    """Write expired rows to InfluxDB as ``system_log`` points."""
+
+    measurement = 'system_log'
+
+    def __init__(self, client=None):
+        self._client = client
+
+    @property
+    def client(self):
+        if self._client is None:
+            from core.clients import InfluxDBClient
+            self._client = InfluxDBClient()
+        return self._client
+
+    def __call__(self, batch) -> None:
+        from influxdb_client import Point
+
+        points = [
+            Point(self.measurement)
+            .tag('garden_id', str(row['garden_id']))
+            .tag('source', row['source'])
+            .field('event', row['event'])
+            .field('log_id', row['id'])
+            .time(row['timestamp'])
+            for row in batch.order_by('pk').values(*ARCHIVE_FIELDS)
+        ]
+        if points:
+            self.client.write_batch(points)
+
+
+ARCHIVERS = {
+    'ndjson': NDJSONArchiver,
+    'influx': InfluxArchiver,
+}
+
+
+def get_archiver(name: Optional[str] = None):
+    """Return the archiver configured by ``SYSTEM_LOG_ARCHIVE`` (or ``name``)."""
+    name = settings.SYSTEM_LOG_ARCHIVE if name is None else name
+    if not name:
+        return None
+    try:
+        return ARCHIVERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown SYSTEM_LOG_ARCHIVE '{name}'. Use 'ndjson', 'influx' or leave empty.")
+
+
+def retention_cutoff(garden: Garden, now: Optional[datetime] = None) -> datetime:
+    """Return the timestamp before which this garden's logs are expired."""
+    days = garden.log_retention_days or settings.SYSTEM_LOG_RETENTION_DAYS
+    return (now or timezone.now()) - timedelta(days=days)
+
+
+def purge_expired_logs(
+    now: Optional[datetime] = None,
+    batch_size: Optional[int] = None,
+    archiver=None
+) -> Dict[int, int]:
+    """
+    Delete (and optionally archive) expired SystemLog rows for every garden.
+
+    ``archiver`` defaults to the configured one; pass ``False`` to skip archiving.
+
+    Returns:
+        Mapping of garden id to the number of rows removed
+    """
+    batch_size = batch_size or settings.SYSTEM_LOG_PURGE_BATCH_SIZE
+    if archiver is None:
+        archiver = get_archiver()
+
+    purged = {}
+    for garden in Garden.objects.only('id', 'log_retention_days'):
+        expired = SystemLog.objects.filter(
+            garden_id=garden.id,
+            timestamp__lt=retention_cutoff(garden, now)
+        )
+        deleted = delete_in_batches(expired, batch_size=batch_size, on_batch=archiver or None)
+        if deleted:
+            logger.info(f"Purged {deleted} expired system logs for garden {garden.id}")
+            purged[garden.id] = deleted
+    return purged
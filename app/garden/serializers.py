@@ -1,3 +1,5 @@
+from django.db.models import F
+from django.utils import timezone
 from rest_framework import serializers
 from .models import (
     Garden, GardenAccess, Valve, Power, Pump, Schedule, SystemLog,
@@ -71,6 +73,7 @@ class ScheduleSerializer(serializers.ModelSerializer):
 class WaterUsageSerializer(serializers.ModelSerializer):
     """Serializer for WaterUsage model."""
     garden_name = serializers.CharField(source='garden.name', read_only=True)
+    valve_number = serializers.IntegerField(source='valve.number', read_only=True)
     
     class Meta:
         model = WaterUsage
@@ -78,12 +81,25 @@ class WaterUsageSerializer(serializers.ModelSerializer):
 
 
 class PowerConsumptionSerializer(serializers.ModelSerializer):
-    """Serializer for PowerConsumption model."""
+    """
+    Serializer for PowerConsumption model.
+    
+    ``date`` and ``time`` ("00:00") are the local date and time of
+    ``measured_at``, kept read-only for existing clients.
+    """
     garden_name = serializers.CharField(source='garden.name', read_only=True)
+    date = serializers.SerializerMethodField()
+    time = serializers.SerializerMethodField()
     
     class Meta:
         model = PowerConsumption
         fields = '__all__'
+    
+    def get_date(self, obj):
+        return timezone.localtime(obj.measured_at).date().isoformat()
+    
+    def get_time(self, obj):
+        return timezone.localtime(obj.measured_at).strftime('%H:%M')
 
 
 class SystemStatusSerializer(serializers.Serializer):
@@ -99,4 +115,113 @@ class SystemStatusSerializer(serializers.Serializer):
         return {
             'time': obj.get('time', ''),
             'target': obj.get('target', '')
-        } 
\ No newline at end of file
+        } 
+
+# Read-only serializers for hot list endpoints
+class ValuesSerializer:
+    """
+    Read-only serializer rendering ``.values()`` rows like ``model_serializer``.
+    
+    ``values(queryset)`` selects exactly the fields of the model serializer,
+    with related sources such as ``garden.name`` joined into the same query
+    (``garden_name=F('garden__name')``). Rows are then plain dicts: no model
+    instances, no related lookups and no per-row field introspection. Only
+    fields whose representation differs from the database value (dates,
+    times, decimals) go through the field's ``to_representation``, and
+    ``SerializerMethodField``s call ``get_<name>(row)`` on this class.
+    
+    Usage: ``ValveValuesSerializer(ValveValuesSerializer.values(queryset)).data``
+    """
+    model_serializer = None
+    
+    CONVERTED_FIELDS = (
+        serializers.DateTimeField, serializers.DateField, serializers.TimeField,
+        serializers.DecimalField, serializers.DurationField,
+    )
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    @classmethod
+    def get_plan(cls):
+        """
+        Return ``(lookups, expressions, fields)`` built once per class.
+        
+        ``fields`` lists ``(name, row key or None, converter or None)`` in the
+        model serializer's field order.
+        """
+        plan = cls.__dict__.get('_plan')
+        if plan is not None:
+            return plan
+        
+        lookups, expressions, fields = [], {}, []
+        for name, field in cls.model_serializer().fields.items():
+            if field.write_only:
+                continue
+            if isinstance(field, serializers.SerializerMethodField):
+                fields.append((name, None, getattr(cls, f'get_{name}')))
+                continue
+            if field.source == name:
+                lookups.append(name)
+            else:
+                expressions[name] = F(field.source.replace('.', '__'))
+            converter = field.to_representation if isinstance(field, cls.CONVERTED_FIELDS) else None
+            fields.append((name, name, converter))
+        
+        cls._plan = plan = (lookups, expressions, fields)
+        return plan
+    
+    @classmethod
+    def values(cls, queryset):
+        """The queryset's rows as dicts holding every serialized field."""
+        lookups, expressions, _ = cls.get_plan()
+        return queryset.values(*lookups, **expressions)
+    
+    @property
+    def data(self):
+        fields = self.get_plan()[2]
+        data = []
+        for row in self.rows:
+            item = {}
+            for name, key, converter in fields:
+                if key is None:
+                    item[name] = converter(self, row)
+                    continue
+                value = row[key]
+                item[name] = converter(value) if converter is not None and value is not None else value
+            data.append(item)
+        return data
+
+
+class ValveValuesSerializer(ValuesSerializer):
+    model_serializer = ValveSerializer
+
+
+class PowerValuesSerializer(ValuesSerializer):
+    model_serializer = PowerSerializer
+
+
+class PumpValuesSerializer(ValuesSerializer):
+    model_serializer = PumpSerializer
+
+
+class SystemLogValuesSerializer(ValuesSerializer):
+    model_serializer = SystemLogSerializer
+
+
+class ScheduleValuesSerializer(ValuesSerializer):
+    model_serializer = ScheduleSerializer
+
+
+class WaterUsageValuesSerializer(ValuesSerializer):
+    model_serializer = WaterUsageSerializer
+
+
+class PowerConsumptionValuesSerializer(ValuesSerializer):
+    model_serializer = PowerConsumptionSerializer
+    
+    def get_date(self, row):
+        return timezone.localtime(row['measured_at']).date().isoformat()
+    
+    def get_time(self, row):
+        return timezone.localtime(row['measured_at']).strftime('%H:%M')
@@ -0,0 +1,42 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .http_cache import bump_garden_version
+from .models import Garden, Power, PowerConsumption, Pump, Schedule, Valve, WaterUsage
+from .timers import schedule_valve_close
+
+# Models whose rows appear in cached garden responses (see garden.http_cache)
+VERSIONED_MODELS = (Valve, Pump, Power, Schedule, WaterUsage, PowerConsumption)
+
+# Fields that move an open valve's closing deadline
+VALVE_TIMER_FIELDS = {'status', 'duration', 'last_active'}
+
+
+@receiver(post_save, sender=Valve)
+def reschedule_valve_timer(sender, instance, update_fields=None, **kwargs):
+    """(Re)arm the auto-close timer whenever an open valve's deadline may have moved."""
+    if update_fields is not None and not VALVE_TIMER_FIELDS.intersection(update_fields):
+        return
+    schedule_valve_close(instance)
+
+
+@receiver(post_save, sender=Schedule)
+@receiver(post_delete, sender=Schedule)
+def push_schedule_change(sender, instance, **kwargs):
+    """Push schedule changes to the beat scheduler's in-memory cache."""
+    from tasks.scheduler import publish_schedule_change
+
+    schedule_id = instance.pk
+    transaction.on_commit(lambda: publish_schedule_change(schedule_id))
+
+
+def bump_garden_version_on_change(sender, instance, **kwargs):
+    """Invalidate cached responses of the garden a row belongs to, once committed."""
+    garden_id = instance.pk if sender is Garden else instance.garden_id
+    transaction.on_commit(lambda: bump_garden_version(garden_id))
+
+
+for model in VERSIONED_MODELS + (Garden,):
+    post_save.connect(bump_garden_version_on_change, sender=model, dispatch_uid=f'garden-version-{model.__name__}')
+    post_delete.connect(bump_garden_version_on_change, sender=model, dispatch_uid=f'garden-version-{model.__name__}')
@@ -2,7 +2,7 @@
 Comprehensive tests for the garden app.
 """
 
-from django.test import TestCase
+from django.test import TestCase, override_settings
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from django.utils import timezone
@@ -10,7 +10,9 @@ from rest_framework.test import APITestCase, APIClient
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
 from datetime import datetime, timedelta
+from unittest.mock import patch, MagicMock
 import json
+import threading
 
 from .models import (
     Garden, GardenAccess, Valve, Power, Pump, Schedule, 
@@ -21,6 +23,7 @@ from .serializers import (
     PumpSerializer, ScheduleSerializer, SystemLogSerializer
 )
 from .permissions import IsGardenAdmin, IsGardenManager, IsGardenStaff
+from .views import local_day_start
 
 User = get_user_model()
 
@@ -287,6 +290,68 @@ class GardenSerializerTest(TestCase):
         self.assertEqual(garden.name, self.garden_data['name'])
 
 
+class ValuesSerializerParityTest(TestCase):
+    """Test that the values() serializers render exactly like the model serializers."""
+    
+    def setUp(self):
+        self.garden = Garden.objects.create(name="Parity Garden", location="Test Location")
+        valve = Valve.objects.create(garden=self.garden, number=1, last_active=timezone.now())
+        Valve.objects.create(garden=self.garden, number=2)
+        Power.objects.create(garden=self.garden, status='on')
+        Pump.objects.create(garden=self.garden)
+        SystemLog.objects.create(garden=self.garden, event="Valve 1 turned on", source="Manual")
+        Schedule.objects.create(
+            garden=self.garden, startTime="08:00 AM", duration="30 minutes", target="Valve 1",
+            repeat="Weekly", days=["monday", "friday"]
+        )
+        WaterUsage.objects.create(garden=self.garden, valve=valve, bucket_start=timezone.now(), liters=12.5)
+        PowerConsumption.objects.create(garden=self.garden, consumption=45.5)
+    
+    def test_parity_with_model_serializers(self):
+        """Test every values serializer against its model serializer."""
+        from .serializers import (
+            ValveValuesSerializer, PowerValuesSerializer, PumpValuesSerializer,
+            SystemLogValuesSerializer, ScheduleValuesSerializer,
+            WaterUsageValuesSerializer, PowerConsumptionValuesSerializer
+        )
+        
+        for values_serializer in (
+            ValveValuesSerializer, PowerValuesSerializer, PumpValuesSerializer,
+            SystemLogValuesSerializer, ScheduleValuesSerializer,
+            WaterUsageValuesSerializer, PowerConsumptionValuesSerializer
+        ):
+            model_serializer = values_serializer.model_serializer
+            with self.subTest(model_serializer.__name__):
+                queryset = model_serializer.Meta.model.objects.order_by('pk')
+                expected = model_serializer(queryset, many=True).data
+                with self.assertNumQueries(1):
+                    data = values_serializer(values_serializer.values(queryset)).data
+                
+                self.assertTrue(data)
+                self.assertEqual(data, [dict(item) for item in expected])
+                # Same keys in the same order, so rendered bodies are identical
+                self.assertEqual([list(item) for item in data], [list(item) for item in expected])
+    
+    def test_list_endpoint_uses_values_serializer(self):
+        """Test that list responses are unchanged and need no per-row queries."""
+        admin = User.objects.create_superuser(email='parity@example.com', password='password123')
+        client = APIClient()
+        client.force_authenticate(user=admin)
+        for number in range(3, 10):
+            Valve.objects.create(garden=self.garden, number=number)
+        
+        with self.assertNumQueries(1):
+            response = client.get(reverse('systemlog-list'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        response = client.get(reverse('valve-status'), {'garden_id': self.garden.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            json.loads(response.content),
+            json.loads(json.dumps(ValveSerializer(Valve.objects.all(), many=True).data))
+        )
+
+
 class ValveAPITest(AuthenticatedAPITestCase):
     """Test cases for Valve API endpoints."""
     
@@ -569,8 +634,8 @@ class PermissionTest(AuthenticatedAPITestCase):
         response = self.client.get(url)
         
         # Should only see the garden they have access to
-        self.assertEqual(len(response.data), 1)
-        self.assertEqual(response.data[0]['name'], "Test Garden")
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['results'][0]['name'], "Test Garden")
 
 
 class DataAnalyticsTest(AuthenticatedAPITestCase):
@@ -581,21 +646,24 @@ class DataAnalyticsTest(AuthenticatedAPITestCase):
         super().setUp()
         
         # Create test data
+        self.valves = [
+            Valve.objects.create(garden=self.garden, number=number)
+            for number in range(1, 6)
+        ]
         for i in range(7):  # 7 days of data
             date = timezone.now().date() - timedelta(days=i)
-            WaterUsage.objects.create(
-                garden=self.garden,
-                period=f"Day {i+1}",
-                valve1=10.0 + i,
-                valve2=8.0 + i,
-                valve3=6.0 + i
-            )
+            for valve in self.valves:
+                WaterUsage.objects.create(
+                    garden=self.garden,
+                    valve=valve,
+                    bucket_start=timezone.now() - timedelta(days=i),
+                    liters=valve.number + i
+                )
             
             PowerConsumption.objects.create(
                 garden=self.garden,
-                time=f"{8+i}:00",
-                consumption=45.0 + i,
-                date=date
+                measured_at=local_day_start(date) + timedelta(hours=8 + i),
+                consumption=45.0 + i
             )
 
     def test_water_usage_by_period(self):
@@ -605,12 +673,103 @@ class DataAnalyticsTest(AuthenticatedAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertIsInstance(response.data, list)
     
+    def test_water_usage_by_period_groups_by_bucket_and_valve(self):
+        """Test that usage is summed per day and valve, for any number of valves."""
+        # A second reading in today's bucket is added to it
+        WaterUsage.objects.create(
+            garden=self.garden,
+            valve=self.valves[0],
+            bucket_start=timezone.now(),
+            liters=100
+        )
+        other_garden = Garden.objects.create(name="Other Garden", location="Elsewhere")
+        WaterUsage.objects.create(
+            garden=other_garden,
+            valve=Valve.objects.create(garden=other_garden, number=1),
+            bucket_start=timezone.now(),
+            liters=1000
+        )
+        
+        url = reverse('waterusage-by-period')
+        response = self.client.get(url, {'period': 'week', 'garden_id': self.garden.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        today = response.data[-1]
+        self.assertEqual(today['valves'], {1: 101, 2: 2, 3: 3, 4: 4, 5: 5})
+        self.assertEqual(today['total'], 115)
+        for bucket in response.data:
+            self.assertEqual(len(bucket['valves']), 5)
+            self.assertEqual(bucket['total'], sum(bucket['valves'].values()))
+    
+    def test_water_usage_by_period_invalid_date(self):
+        """Test that an invalid date range is rejected."""
+        url = reverse('waterusage-by-period')
+        response = self.client.get(url, {'startDate': '2024-13-01', 'endDate': '2024-12-31'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_water_usage_by_period_invalid_garden_id(self):
+        """Test that a non-integer garden_id is rejected."""
+        url = reverse('waterusage-by-period')
+        response = self.client.get(url, {'garden_id': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
     def test_power_consumption_history(self):
         """Test power consumption history endpoint."""
         url = reverse('powerconsumption-history')
         response = self.client.get(url, {'period': 'daily'})
         self.assertEqual(response.status_code, status.HTTP_200_OK)
-        self.assertIsInstance(response.data, list)
+        self.assertIsInstance(response.data['results'], list)
+    
+    def test_power_consumption_history_invalid_garden_id(self):
+        """Test that a non-integer garden_id is rejected."""
+        url = reverse('powerconsumption-history')
+        response = self.client.get(url, {'garden_id': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+    
+    def test_power_consumption_history_week_covers_whole_days(self):
+        """Test that the weekly window starts at local midnight, matching its daily cache variant."""
+        first_day = timezone.localdate() - timedelta(days=7)
+        PowerConsumption.objects.create(
+            garden=self.garden,
+            measured_at=local_day_start(first_day) + timedelta(minutes=1),
+            consumption=1.0
+        )
+        
+        url = reverse('powerconsumption-history')
+        response = self.client.get(url, {'period': 'week', 'garden_id': self.garden.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['date'], first_day.isoformat())
+    
+    def test_power_consumption_history_day(self):
+        """Test that the daily history holds today's samples in time order."""
+        url = reverse('powerconsumption-history')
+        response = self.client.get(url, {'period': 'day', 'garden_id': self.garden.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['results'][0]['time'], '08:00')
+        self.assertEqual(response.data['results'][0]['date'], timezone.localdate().isoformat())
+    
+    def test_power_consumption_history_date_range(self):
+        """Test that a date range covers whole local days, including backfilled data."""
+        today = timezone.localdate()
+        # Historical data keeps its measurement time
+        PowerConsumption.objects.create(
+            garden=self.garden,
+            measured_at=local_day_start(today - timedelta(days=400)) + timedelta(hours=23, minutes=30),
+            consumption=1.0
+        )
+        
+        url = reverse('powerconsumption-history')
+        start = (today - timedelta(days=400)).isoformat()
+        response = self.client.get(url, {'startDate': start, 'endDate': start})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([(row['date'], row['time']) for row in response.data['results']], [(start, '23:30')])
+        
+        response = self.client.get(url, {
+            'startDate': (today - timedelta(days=2)).isoformat(),
+            'endDate': today.isoformat()
+        })
+        self.assertEqual([row['consumption'] for row in response.data['results']], [47.0, 46.0, 45.0])
     
     def test_system_logs_filtering(self):
         """Test system logs with filtering."""
@@ -631,8 +790,13 @@ class DataAnalyticsTest(AuthenticatedAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         
         # Should only return manual logs
-        manual_logs = [log for log in response.data if log['source'] == 'Manual']
+        manual_logs = [log for log in response.data['results'] if log['source'] == 'Manual']
         self.assertEqual(len(manual_logs), 1)
+    
+    def test_system_logs_invalid_garden_id(self):
+        """Test that a non-integer garden_id is rejected."""
+        response = self.client.get(reverse('systemlog-list'), {'garden_id': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
 
 
 class ErrorHandlingTest(AuthenticatedAPITestCase):
@@ -666,4 +830,630 @@ class ErrorHandlingTest(AuthenticatedAPITestCase):
             'repeat': 'InvalidRepeat'  # Invalid repeat option
         }
         response = self.client.post(url, invalid_data, format='json')
-        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST) 
\ No newline at end of file
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST) 
+
+class SystemLogSinkTest(TestCase):
+    """Test cases for the buffered SystemLog sinks."""
+    
+    def setUp(self):
+        self.garden = Garden.objects.create(name="Test Garden")
+    
+    def test_sync_sink_writes_immediately(self):
+        """Test that the sync sink creates the row on emit."""
+        from .log_sink import SyncLogSink
+        
+        SyncLogSink().emit(self.garden.id, "Valve 1 turned on", "Manual")
+        self.assertEqual(SystemLog.objects.count(), 1)
+    
+    def test_buffered_sink_flushes_on_close(self):
+        """Test that buffered events are only written on flush/close."""
+        from .log_sink import BufferedLogSink
+        
+        sink = BufferedLogSink(batch_size=100, flush_interval_ms=60_000)
+        for i in range(3):
+            sink.emit(self.garden.id, f"Event {i}", "Manual")
+        self.assertEqual(SystemLog.objects.count(), 0)
+        
+        sink.close()
+        self.assertEqual(SystemLog.objects.count(), 3)
+    
+    def test_no_events_lost_across_restart(self):
+        """Test that a graceful shutdown followed by a new sink loses nothing."""
+        from .log_sink import BufferedLogSink
+        
+        first = BufferedLogSink(batch_size=100, flush_interval_ms=60_000)
+        for i in range(5):
+            first.emit(self.garden.id, f"Before restart {i}", "Manual")
+        first.close()
+        
+        # Events emitted after shutdown are written straight through
+        first.emit(self.garden.id, "Late event", "System")
+        
+        second = BufferedLogSink(batch_size=100, flush_interval_ms=60_000)
+        for i in range(4):
+            second.emit(self.garden.id, f"After restart {i}", "Manual")
+        second.close()
+        
+        self.assertEqual(SystemLog.objects.count(), 10)
+        self.assertTrue(SystemLog.objects.filter(event="Late event").exists())
+    
+    def test_emit_time_is_preserved(self):
+        """Test that the stored timestamp is the emit time, not the flush time."""
+        from .log_sink import BufferedLogSink
+        
+        sink = BufferedLogSink(batch_size=100, flush_interval_ms=60_000)
+        emitted_at = timezone.now() - timedelta(minutes=5)
+        with patch('garden.log_sink.timezone.now', return_value=emitted_at):
+            sink.emit(self.garden.id, "Old event", "Manual")
+        sink.close()
+        
+        self.assertEqual(SystemLog.objects.get().timestamp, emitted_at)
+    
+    def test_batch_size_triggers_background_flush(self):
+        """Test that reaching the batch size wakes the flush thread."""
+        from .log_sink import BufferedLogSink
+        
+        flushed = []
+        done = threading.Event()
+        
+        def writer(events):
+            flushed.extend(events)
+            done.set()
+        
+        sink = BufferedLogSink(writer=writer, batch_size=2, flush_interval_ms=60_000)
+        sink.emit(self.garden.id, "First", "Manual")
+        sink.emit(self.garden.id, "Second", "Manual")
+        
+        self.assertTrue(done.wait(timeout=5))
+        self.assertEqual([e['event'] for e in flushed], ["First", "Second"])
+        sink.close()
+    
+    def test_failed_flush_keeps_events(self):
+        """Test that a failing writer does not drop the batch."""
+        from .log_sink import BufferedLogSink
+        
+        writer = MagicMock(side_effect=[Exception("DB down"), None])
+        sink = BufferedLogSink(writer=writer, batch_size=100, flush_interval_ms=60_000)
+        sink.emit(self.garden.id, "Kept", "Manual")
+        
+        self.assertEqual(sink.flush(), 0)
+        self.assertEqual(sink.flush(), 1)
+        self.assertEqual(writer.call_args[0][0][0]['event'], "Kept")
+        sink.close()
+    
+    @patch('tasks.tasks.write_system_logs.apply_async')
+    def test_celery_sink_uses_low_priority_queue(self, mock_apply_async):
+        """Test that the celery sink ships batches to the low priority queue."""
+        from .log_sink import build_log_sink
+        
+        sink = build_log_sink('celery')
+        sink.emit(self.garden.id, "Queued", "Manual")
+        sink.close()
+        
+        mock_apply_async.assert_called_once()
+        self.assertEqual(mock_apply_async.call_args.kwargs['queue'], 'low_priority')
+        events = mock_apply_async.call_args.kwargs['args'][0]
+        self.assertEqual(events[0]['event'], "Queued")
+        self.assertIsInstance(events[0]['timestamp'], str)
+
+
+class SystemLogRetentionTest(TestCase):
+    """Test cases for SystemLog retention and archival."""
+    
+    def setUp(self):
+        self.garden = Garden.objects.create(name="Test Garden")
+        self.short_garden = Garden.objects.create(name="Short Retention", log_retention_days=7)
+        self.now = timezone.now()
+        
+        for garden in (self.garden, self.short_garden):
+            for days in (1, 10, 100, 200):
+                SystemLog.objects.create(
+                    garden=garden,
+                    event=f"{days} days old",
+                    source="System",
+                    timestamp=self.now - timedelta(days=days)
+                )
+    
+    def test_purge_respects_per_garden_ttl(self):
+        """Test that each garden is purged against its own retention."""
+        from django.test import override_settings
+        from .retention import purge_expired_logs
+        
+        with override_settings(SYSTEM_LOG_RETENTION_DAYS=90):
+            purged = purge_expired_logs(now=self.now, archiver=False)
+        
+        self.assertEqual(purged, {self.garden.id: 2, self.short_garden.id: 3})
+        self.assertEqual(
+            sorted(SystemLog.objects.filter(garden=self.garden).values_list('event', flat=True)),
+            ["1 days old", "10 days old"]
+        )
+        self.assertEqual(SystemLog.objects.filter(garden=self.short_garden).count(), 1)
+    
+    def test_delete_in_batches_uses_bounded_ranges(self):
+        """Test that rows are deleted in slices of at most batch_size."""
+        from core.utils.db import delete_in_batches
+        
+        slices = []
+        deleted = delete_in_batches(
+            SystemLog.objects.filter(garden=self.garden),
+            batch_size=3,
+            on_batch=lambda batch: slices.append(batch.count())
+        )
+        
+        self.assertEqual(deleted, 4)
+        self.assertEqual(slices, [3, 1])
+    
+    def test_ndjson_archive_written_before_delete(self):
+        """Test that expired rows are archived to a gzip NDJSON file."""
+        import gzip
+        import tempfile
+        from .retention import NDJSONArchiver, purge_expired_logs
+        
+        with tempfile.TemporaryDirectory() as directory:
+            archiver = NDJSONArchiver(directory)
+            purge_expired_logs(now=self.now, archiver=archiver)
+            
+            path = archiver.path_for(self.short_garden.id, timezone.localdate())
+            with gzip.open(path, 'rt', encoding='utf-8') as archive:
+                rows = [json.loads(line) for line in archive]
+        
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['garden_id'] for row in rows}, {self.short_garden.id})
+        self.assertIn('timestamp', rows[0])
+    
+    def test_influx_archive_uses_write_batch(self):
+        """Test that the InfluxDB archiver writes one batch per slice."""
+        from .retention import InfluxArchiver, purge_expired_logs
+        
+        client = MagicMock()
+        purge_expired_logs(now=self.now, batch_size=10, archiver=InfluxArchiver(client=client))
+        
+        written = sum(len(call.args[0]) for call in client.write_batch.call_args_list)
+        self.assertEqual(written, 5)
+    
+    def test_logs_filtered_by_garden(self):
+        """Test the garden_id filter on the logs endpoint."""
+        user = User.objects.create_user(email='logs@example.com', password='testpass123')
+        self.client.force_login(user)
+        
+        response = self.client.get(reverse('systemlog-list'), {'garden_id': self.short_garden.id})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual({log['garden'] for log in response.json()['results']}, {self.short_garden.id})
+
+
+class ValveAutoCloseTimerTest(AuthenticatedAPITestCase):
+    """Test cases for valve auto-close timers."""
+    
+    def setUp(self):
+        super().setUp()
+        self.valve = Valve.objects.create(
+            garden=self.garden,
+            number=1,
+            status='off',
+            duration=300
+        )
+    
+    @patch('tasks.tasks.auto_close_valve.apply_async')
+    def test_open_schedules_close_at_deadline(self, mock_apply_async):
+        """Test that opening a valve arms a timer for last_active + duration."""
+        url = reverse('valve-control', kwargs={'pk': self.valve.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(url, {'action': 'open', 'duration': 600}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        
+        self.valve.refresh_from_db()
+        deadline = self.valve.last_active + timedelta(seconds=600)
+        mock_apply_async.assert_called_once_with(
+            args=[self.valve.pk, deadline.isoformat()],
+            eta=deadline,
+            queue='high_priority'
+        )
+    
+    @patch('tasks.tasks.auto_close_valve.apply_async')
+    def test_duration_change_reschedules(self, mock_apply_async):
+        """Test that changing the duration of an open valve arms a new timer."""
+        self.valve.status = 'on'
+        self.valve.last_active = timezone.now()
+        self.valve.save()
+        
+        url = reverse('valve-set-duration', kwargs={'pk': self.valve.pk})
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(url, {'duration': 900}, format='json')
+        
+        self.assertEqual(
+            mock_apply_async.call_args.kwargs['eta'],
+            self.valve.last_active + timedelta(seconds=900)
+        )
+    
+    @patch('tasks.tasks.auto_close_valve.apply_async')
+    def test_closed_valve_has_no_timer(self, mock_apply_async):
+        """Test that saving a closed valve does not schedule anything."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.valve.duration = 120
+            self.valve.save()
+        mock_apply_async.assert_not_called()
+    
+    def test_due_timer_closes_valve(self):
+        """Test that the current timer closes the valve and logs it."""
+        from .timers import close_if_due, valve_deadline
+        
+        self.valve.status = 'on'
+        self.valve.last_active = timezone.now() - timedelta(seconds=300)
+        self.valve.save()
+        
+        self.assertTrue(close_if_due(self.valve.pk, valve_deadline(self.valve).isoformat()))
+        self.valve.refresh_from_db()
+        self.assertEqual(self.valve.status, 'off')
+        self.assertTrue(SystemLog.objects.filter(garden=self.garden, source='Automatic').exists())
+    
+    def test_stale_timer_is_ignored(self):
+        """Test that a superseded or cancelled timer leaves the valve alone."""
+        from .timers import close_if_due, valve_deadline
+        
+        self.valve.status = 'on'
+        self.valve.last_active = timezone.now()
+        self.valve.save()
+        old_deadline = valve_deadline(self.valve).isoformat()
+        
+        # Duration changed: the old timer is superseded
+        self.valve.duration = 900
+        self.valve.save()
+        self.assertFalse(close_if_due(self.valve.pk, old_deadline))
+        self.valve.refresh_from_db()
+        self.assertEqual(self.valve.status, 'on')
+        
+        # Manual close: the current timer is cancelled
+        current_deadline = valve_deadline(self.valve).isoformat()
+        self.valve.status = 'off'
+        self.valve.save()
+        self.assertFalse(close_if_due(self.valve.pk, current_deadline))
+
+
+class FakeRedisStrings:
+    """In-memory stand-in for the Redis string commands used by response caching."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def mget(self, keys):
+        return [self.data.get(key) for key in keys]
+    
+    def set(self, key, value, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+    
+    def setex(self, key, ttl, value):
+        return self.set(key, value)
+    
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+    
+    def pipeline(self):
+        return self
+    
+    def execute(self):
+        return []
+
+
+class GardenResponseCacheTest(AuthenticatedAPITestCase):
+    """Test cases for ETags and cached bodies on garden read endpoints."""
+    
+    def setUp(self):
+        super().setUp()
+        self.redis = FakeRedisStrings()
+        patcher = patch('garden.http_cache._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.valve = Valve.objects.create(garden=self.garden, number=1, status='off', duration=300)
+        self.url = reverse('valve-status') + f'?garden_id={self.garden.id}'
+    
+    def _valve_queries(self, url, **headers):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, **headers)
+        valve_queries = [q for q in queries.captured_queries if 'garden_valve' in q['sql']]
+        return response, valve_queries
+    
+    def test_unchanged_poll_gets_not_modified(self):
+        """Test that a matching If-None-Match is answered without querying valves."""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        
+        response, valve_queries = self._valve_queries(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response['ETag'], etag)
+        self.assertEqual(valve_queries, [])
+    
+    def test_cached_body_is_served(self):
+        """Test that a repeated GET returns the cached body."""
+        first = self.client.get(self.url)
+        self.assertEqual(first['X-Cache'], 'MISS')
+        
+        second, valve_queries = self._valve_queries(self.url)
+        self.assertEqual(second.status_code, status.HTTP_200_OK)
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(json.loads(second.content), first.json())
+        self.assertEqual(valve_queries, [])
+    
+    def test_write_changes_the_etag(self):
+        """Test that saving a valve invalidates the cached response of its garden."""
+        etag = self.client.get(self.url)['ETag']
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            self.valve.status = 'on'
+            self.valve.save()
+        
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.json()[0]['status'], 'on')
+    
+    def test_bump_after_redis_lost_its_data_starts_from_the_clock(self):
+        """Test that a bumped counter never restarts at 1, where old ETags could match again."""
+        import time
+        from .http_cache import GARDEN_VERSION_KEY, bump_garden_version
+        
+        self.redis.data.clear()
+        before = int(time.time() * 1000)
+        bump_garden_version(self.garden.id)
+        self.assertGreater(int(self.redis.data[GARDEN_VERSION_KEY.format(self.garden.id)]), before)
+        self.assertGreater(int(self.redis.data[GARDEN_VERSION_KEY.format('all')]), before)
+    
+    def test_etag_depends_on_garden_access(self):
+        """Test that users with different access never share a cached response."""
+        etag = self.client.get(reverse('valve-list'))['ETag']
+        
+        other_garden = Garden.objects.create(name="Other Garden")
+        GardenAccess.objects.create(user=self.user, garden=other_garden, role='staff')
+        
+        response = self.client.get(reverse('valve-list'), HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_by_period_etag_changes_at_midnight(self):
+        """Test that the default by_period window is not served from yesterday's cache."""
+        url = reverse('waterusage-by-period')
+        today = timezone.localdate()
+        etag = self.client.get(url)['ETag']
+    
+        with patch('garden.views.timezone.localdate', return_value=today + timedelta(days=1)):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+    
+    def test_lagging_replica_response_is_not_cached(self):
+        """Test that a body read from a lagging replica gets no ETag and is not cached."""
+        from django.core.cache import cache
+        from core.db_router import ReplicaRouter, _use_replica, pin_to_primary
+        from .views import WaterUsageViewSet
+        
+        url = reverse('waterusage-by-period')
+        real_get_queryset = WaterUsageViewSet.get_queryset
+        
+        def lagging_get_queryset(view):
+            # The replica has not received the new usage yet
+            return WaterUsage.objects.none() if _use_replica.get() else real_get_queryset(view)
+        
+        with self.captureOnCommitCallbacks(execute=True):
+            WaterUsage.objects.create(garden=self.garden, valve=self.valve, bucket_start=timezone.now(), liters=10)
+        
+        self.addCleanup(cache.clear)
+        # Replica reads still query the test database, except for the lagging rows
+        with patch('core.db_router.replica_available', return_value=True), \
+                patch.object(ReplicaRouter, 'db_for_read', return_value=None), \
+                patch.object(WaterUsageViewSet, 'get_queryset', lagging_get_queryset):
+            stale = self.client.get(url)
+            self.assertEqual(stale.json(), [])
+            self.assertFalse(stale.has_header('ETag'))
+            
+            # The writer reads from the primary and must not get the stale body
+            pin_to_primary(self.user.pk)
+            fresh = self.client.get(url)
+        self.assertEqual(fresh['X-Cache'], 'MISS')
+        self.assertEqual(fresh.json()[-1]['total'], 10)
+    
+    def test_uncached_without_redis(self):
+        """Test that views still answer when Redis is unavailable."""
+        with patch('garden.http_cache._redis', side_effect=ConnectionError):
+            response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.has_header('ETag'))
+
+
+class ReplicaRoutingTest(AuthenticatedAPITestCase):
+    """Test cases for read-replica routing of the analytics endpoints."""
+    
+    def setUp(self):
+        super().setUp()
+        from django.core.cache import cache
+        from core.db_router import ReplicaRouter
+        
+        cache.clear()
+        patcher = patch('core.db_router.replica_available', return_value=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        # Record routing decisions but keep querying the test database
+        self.decisions = []
+        real_db_for_read = ReplicaRouter.db_for_read
+        
+        def spy(router, model, **hints):
+            self.decisions.append((model.__name__, real_db_for_read(router, model, **hints)))
+            return None
+        
+        patcher = patch.object(ReplicaRouter, 'db_for_read', spy)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_analytics_reads_use_replica(self):
+        """Test that analytics list endpoints read from the replica."""
+        valve = Valve.objects.create(garden=self.garden, number=1)
+        WaterUsage.objects.create(garden=self.garden, valve=valve, bucket_start=timezone.now(), liters=10)
+        self.decisions.clear()
+        
+        response = self.client.get(reverse('waterusage-by-period'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn(('WaterUsage', 'replica'), self.decisions)
+    
+    def test_control_reads_stay_on_primary(self):
+        """Test that endpoints without replica routing read from the primary."""
+        Valve.objects.create(garden=self.garden, number=1)
+        self.decisions.clear()
+        
+        self.client.get(reverse('valve-list'))
+        self.assertNotIn('replica', [db for _, db in self.decisions])
+    
+    def test_reads_stick_to_primary_after_write(self):
+        """Test that a user's reads go to the primary right after a write."""
+        response = self.client.post(reverse('schedule-list'), {
+            'startTime': '08:00 AM', 'duration': '30 minutes', 'target': 'Valve 1',
+            'repeat': 'Daily', 'isActive': True, 'garden': self.garden.id,
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.decisions.clear()
+        
+        self.client.get(reverse('systemlog-list'))
+        self.assertNotIn('replica', [db for _, db in self.decisions])
+    
+    def test_write_inside_replica_context_switches_to_primary(self):
+        """Test read-your-writes within a single replica context."""
+        from django.db import router
+        from core.db_router import replica_reads
+        
+        valve = Valve.objects.create(garden=self.garden, number=1)
+        with replica_reads():
+            router.db_for_read(WaterUsage)
+            WaterUsage.objects.create(garden=self.garden, valve=valve, bucket_start=timezone.now(), liters=5)
+            router.db_for_read(WaterUsage)
+        router.db_for_read(WaterUsage)
+        
+        self.assertEqual([db for _, db in self.decisions], ['replica', None, None])
+
+
+class PaginationTest(AuthenticatedAPITestCase):
+    """Test cases for the default API pagination."""
+    
+    def setUp(self):
+        super().setUp()
+        for number in range(1, 6):
+            Valve.objects.create(garden=self.garden, number=number)
+    
+    def test_page_size_is_capped(self):
+        """Test that clients can't ask for more than API_MAX_PAGE_SIZE rows."""
+        from django.test import override_settings
+        from prometheus_client import REGISTRY
+        
+        labels = {'view': 'ValveViewSet'}
+        clamped = REGISTRY.get_sample_value('api_page_size_clamped_total', labels) or 0
+        
+        with override_settings(API_MAX_PAGE_SIZE=2):
+            response = self.client.get(reverse('valve-list'), {'limit': 1000})
+        
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([valve['number'] for valve in response.data['results']], [1, 2])
+        self.assertEqual(response.data['count'], 5)
+        self.assertIn('offset=2', response.data['next'])
+        self.assertEqual(REGISTRY.get_sample_value('api_page_size_clamped_total', labels), clamped + 1)
+    
+    def test_count_is_lazy_and_capped(self):
+        """Test that a complete first page needs no count and big tables aren't fully counted."""
+        from django.db import connection
+        from django.test import override_settings
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('valve-list'))
+        self.assertEqual(response.data['count'], 5)
+        self.assertIsNone(response.data['next'])
+        self.assertFalse([query for query in queries.captured_queries if 'COUNT(' in query['sql']])
+        
+        with override_settings(API_COUNT_LIMIT=3):
+            response = self.client.get(reverse('valve-list'), {'limit': 2, 'offset': 2})
+        self.assertIsNone(response.data['count'])
+        self.assertEqual([valve['number'] for valve in response.data['results']], [3, 4])
+        self.assertIsNotNone(response.data['previous'])
+    
+    def test_time_series_use_keyset_pagination(self):
+        """Test walking log pages newest first through their cursors."""
+        now = timezone.now()
+        for i in range(5):
+            SystemLog.objects.create(
+                garden=self.garden, event=f"Event {i}", source="System",
+                timestamp=now - timedelta(minutes=i)
+            )
+        
+        events = []
+        url, params = reverse('systemlog-list'), {'limit': 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            self.assertLessEqual(len(response.data['results']), 2)
+            events += [log['event'] for log in response.data['results']]
+            url, params = response.data['next'], None
+        
+        self.assertEqual(events, [f"Event {i}" for i in range(5)])
+
+
+@override_settings(DEBUG=True)
+class APIBenchmarkCommandTest(TestCase):
+    """Test the API benchmark command on a tiny dataset through the test client."""
+    
+    def setUp(self):
+        import os
+        import tempfile
+        
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.baseline = os.path.join(directory.name, 'baseline.json')
+    
+    def _run(self, *args):
+        import io
+        from django.core.management import call_command
+        
+        out = io.StringIO()
+        call_command(
+            'benchmark_api', '--gardens', '2', '--valves', '2', '--logs', '5', '--usage-days', '2',
+            '--requests', '4', '--warmup', '1', '--modes', 'client', '--baseline', self.baseline,
+            '--no-test-database',
+            *args, stdout=out, stderr=io.StringIO()
+        )
+        return out.getvalue()
+    
+    def test_baseline_round_trip(self):
+        """Test that results are saved as a baseline and regressions fail the run."""
+        from django.core.management.base import CommandError
+        
+        output = self._run('--update-baseline')
+        self.assertIn('client valves/status', output)
+        self.assertFalse(Garden.objects.exists())
+        self.assertFalse(SystemLog.objects.exists())
+        
+        with open(self.baseline) as f:
+            baseline = json.load(f)
+        self.assertEqual(baseline['results']['client logs']['queries'], 2.0)
+        
+        baseline['results']['client logs']['queries'] = 1.0
+        with open(self.baseline, 'w') as f:
+            json.dump(baseline, f)
+        with self.assertRaisesMessage(CommandError, '1 regression(s)'):
+            self._run('--tolerance', '100')
+    
+    @override_settings(DEBUG=False)
+    def test_configured_database_needs_debug(self):
+        """Test that seeding the configured database is refused outside DEBUG."""
+        from django.core.management.base import CommandError
+        
+        with self.assertRaisesMessage(CommandError, 'refused unless DEBUG'):
+            self._run()
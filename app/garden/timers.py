@@ -0,0 +1,82 @@
+"""
+Valve auto-close timers.
+
+Opening a valve (or changing the duration of an open one) schedules a one-off
+``auto_close_valve`` task with a Celery ``eta`` of ``last_active + duration``.
+Timers are fenced rather than revoked: each task carries the deadline it was
+scheduled for and only closes the valve if it is still open with that same
+deadline. A manual close, a reopen or a duration change therefore cancels or
+supersedes the pending timer without tracking task ids, and nothing ever scans
+the Valve table.
+
+Note that eta tasks are held unacknowledged by the worker until they fire, so
+RabbitMQ's ``consumer_timeout`` must be larger than the longest valve duration.
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.utils.dateparse import parse_datetime
+
+from .log_sink import log_event
+from .models import Valve
+
+logger = logging.getLogger(__name__)
+
+
+def valve_deadline(valve: Valve) -> Optional[datetime]:
+    """Return when an open valve is due to close, or None if it is not running."""
+    if valve.status != 'on' or valve.last_active is None:
+        return None
+    return valve.last_active + timedelta(seconds=int(valve.duration))
+
+
+def schedule_valve_close(valve: Valve) -> Optional[datetime]:
+    """
+    Schedule the auto-close timer for an open valve once the transaction commits.
+
+    Returns:
+        The scheduled deadline, or None if no timer was needed
+    """
+    if not settings.VALVE_AUTO_CLOSE:
+        return None
+
+    deadline = valve_deadline(valve)
+    if deadline is None:
+        return None
+
+    from tasks.tasks import auto_close_valve
+
+    transaction.on_commit(lambda: auto_close_valve.apply_async(
+        args=[valve.pk, deadline.isoformat()],
+        eta=deadline,
+        queue='high_priority',
+    ))
+    return deadline
+
+
+def close_if_due(valve_id: int, deadline: str) -> bool:
+    """
+    Close a valve if its timer for ``deadline`` is still the current one.
+
+    Returns:
+        True if the valve was closed, False if the timer was stale
+    """
+    with transaction.atomic():
+        valve = Valve.objects.select_for_update().filter(pk=valve_id).first()
+        if valve is None or valve_deadline(valve) != parse_datetime(deadline):
+            logger.debug(f"Skipping stale auto-close timer for valve {valve_id} ({deadline})")
+            return False
+
+        valve.status = 'off'
+        valve.save(update_fields=['status'])
+
+    log_event(
+        valve.garden_id,
+        f"Valve {valve.number} turned off automatically after {int(valve.duration)} seconds",
+        'Automatic'
+    )
+    return True
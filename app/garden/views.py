@@ -1,10 +1,15 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated, AllowAny
+from django.db.models import Sum
+from django.db.models.functions import TruncDay, TruncMonth
 from django.utils import timezone
-from datetime import datetime
+from datetime import datetime, timedelta
 from drf_spectacular.utils import extend_schema, OpenApiParameter, OpenApiExample
+from core.db_router import ReplicaReadMixin
+from core.pagination import TimeSeriesCursorPagination
 from .models import (
     Garden, GardenAccess, Valve, Power, Pump, Schedule, SystemLog,
     WaterUsage, PowerConsumption
@@ -14,9 +19,15 @@ from .serializers import (
     ValveSerializer, PowerSerializer, PumpSerializer,
     SystemLogSerializer, ScheduleSerializer,
     WaterUsageSerializer, PowerConsumptionSerializer,
-    SystemStatusSerializer
+    SystemStatusSerializer,
+    ValveValuesSerializer, PowerValuesSerializer, PumpValuesSerializer,
+    SystemLogValuesSerializer, ScheduleValuesSerializer,
+    WaterUsageValuesSerializer, PowerConsumptionValuesSerializer
 )
-from .permissions import IsGardenAdmin, IsGardenManager, IsGardenStaff
+from .permissions import IsGardenAdmin, IsGardenManager, IsGardenStaff, accessible_garden_ids, garden_role
+from .log_sink import log_event
+from .http_cache import ConditionalGardenCacheMixin
+from . import controls
 
 
 # Add this function to check for mock mode
@@ -25,6 +36,11 @@ def is_mock_mode(request):
     return request.query_params.get('use_mock', 'false').lower() == 'true'
 
 
+def local_day_start(date):
+    """Aware datetime of local midnight at the start of ``date``."""
+    return timezone.make_aware(datetime.combine(date, datetime.min.time()))
+
+
 # Base ViewSet for mock-aware authentication
 class MockAwareViewSet(viewsets.ModelViewSet):
     """Base ViewSet that allows mock mode without authentication."""
@@ -38,7 +54,27 @@ class MockAwareViewSet(viewsets.ModelViewSet):
         return super().get_permissions()
 
 
-class GardenViewSet(MockAwareViewSet):
+class ValuesListMixin:
+    """
+    ViewSet mixin serving ``list`` with ``values_serializer_class``, a
+    read-only serializer over ``.values()`` rows (see ``ValuesSerializer``).
+    """
+    values_serializer_class = None
+    
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        return self.values_response(queryset)
+    
+    def values_response(self, queryset, paginate=True):
+        """Serialize a queryset through ``values_serializer_class``, paginated unless disabled."""
+        rows = self.values_serializer_class.values(queryset)
+        page = self.paginate_queryset(rows) if paginate else None
+        if page is not None:
+            return self.get_paginated_response(self.values_serializer_class(page).data)
+        return Response(self.values_serializer_class(rows).data)
+
+
+class GardenViewSet(ConditionalGardenCacheMixin, MockAwareViewSet):
     """API endpoint for gardens."""
     queryset = Garden.objects.all()
     serializer_class = GardenSerializer
@@ -53,7 +89,7 @@ class GardenViewSet(MockAwareViewSet):
             return Garden.objects.all()
             
         # Regular users can only see gardens they have access to
-        return Garden.objects.filter(user_accesses__user=user).distinct()
+        return Garden.objects.filter(id__in=accessible_garden_ids(user))
 
 
 class GardenAccessViewSet(MockAwareViewSet):
@@ -80,11 +116,13 @@ class GardenAccessViewSet(MockAwareViewSet):
 
 
 # Smart Garden System ViewSets
-class ValveViewSet(MockAwareViewSet):
+class ValveViewSet(ValuesListMixin, ConditionalGardenCacheMixin, MockAwareViewSet):
     """API endpoint for valves."""
     queryset = Valve.objects.all()
     serializer_class = ValveSerializer
+    values_serializer_class = ValveValuesSerializer
     permission_classes = [IsAuthenticated, IsGardenStaff]
+    cached_actions = ('list', 'retrieve', 'status')
     
     def get_queryset(self):
         """Filter valves based on user garden access."""
@@ -101,13 +139,12 @@ class ValveViewSet(MockAwareViewSet):
         # Filter by garden_id if provided in query params
         garden_id = self.request.query_params.get('garden_id')
         if garden_id:
-            if GardenAccess.objects.filter(user=user, garden_id=garden_id).exists():
+            if garden_role(user, garden_id) is not None:
                 return Valve.objects.filter(garden_id=garden_id)
             return Valve.objects.none()
             
         # Otherwise, return valves from all accessible gardens
-        accessible_gardens = Garden.objects.filter(user_accesses__user=user)
-        return Valve.objects.filter(garden__in=accessible_gardens)
+        return Valve.objects.filter(garden_id__in=accessible_garden_ids(user))
     
     @extend_schema(
         summary="Control a valve",
@@ -123,32 +160,14 @@ class ValveViewSet(MockAwareViewSet):
         duration = request.data.get('duration', valve.duration)
         
         if action == 'open':
-            valve.status = 'on'
-            valve.duration = duration
-            valve.last_active = timezone.now()
-            valve.save()
-            
-            # Log the event
-            SystemLog.objects.create(
-                garden=valve.garden,
-                event=f"Valve {valve.number} turned on",
-                source=request.data.get('source', 'Manual')
-            )
+            controls.open_valve(valve, duration, request.data.get('source', 'Manual'))
             
             return Response({
                 'success': True,
                 'valve': ValveSerializer(valve).data
             })
         elif action == 'close':
-            valve.status = 'off'
-            valve.save()
-            
-            # Log the event
-            SystemLog.objects.create(
-                garden=valve.garden,
-                event=f"Valve {valve.number} turned off",
-                source=request.data.get('source', 'Manual')
-            )
+            controls.close_valve(valve, request.data.get('source', 'Manual'))
             
             return Response({
                 'success': True,
@@ -196,16 +215,17 @@ class ValveViewSet(MockAwareViewSet):
     @action(detail=False)
     def status(self, request):
         """Get status of all valves."""
-        valves = self.get_queryset()
-        serializer = ValveSerializer(valves, many=True)
-        return Response(serializer.data)
+        # Polled as a whole by the dashboard; a garden has a handful of valves
+        return self.values_response(self.get_queryset(), paginate=False)
 
 
-class PowerViewSet(MockAwareViewSet):
+class PowerViewSet(ValuesListMixin, ConditionalGardenCacheMixin, MockAwareViewSet):
     """API endpoint for power management."""
     queryset = Power.objects.all()
     serializer_class = PowerSerializer
+    values_serializer_class = PowerValuesSerializer
     permission_classes = [IsAuthenticated, IsGardenStaff]
+    cached_actions = ('list', 'retrieve', 'status')
     
     def get_queryset(self):
         """Filter power records based on user garden access."""
@@ -222,13 +242,12 @@ class PowerViewSet(MockAwareViewSet):
         # Filter by garden_id if provided in query params
         garden_id = self.request.query_params.get('garden_id')
         if garden_id:
-            if GardenAccess.objects.filter(user=user, garden_id=garden_id).exists():
+            if garden_role(user, garden_id) is not None:
                 return Power.objects.filter(garden_id=garden_id)
             return Power.objects.none()
             
         # Otherwise, return power records from all accessible gardens
-        accessible_gardens = Garden.objects.filter(user_accesses__user=user)
-        return Power.objects.filter(garden__in=accessible_gardens)
+        return Power.objects.filter(garden_id__in=accessible_garden_ids(user))
     
     @extend_schema(
         parameters=[
@@ -250,7 +269,7 @@ class PowerViewSet(MockAwareViewSet):
             )
         
         # Check if user has access to this garden
-        if not request.user.is_superuser and not GardenAccess.objects.filter(user=request.user, garden_id=garden_id).exists():
+        if not request.user.is_superuser and garden_role(request.user, garden_id) is None:
             return Response(
                 {'error': 'Access denied to this garden'},
                 status=status.HTTP_403_FORBIDDEN
@@ -276,11 +295,13 @@ class PowerViewSet(MockAwareViewSet):
         })
 
 
-class PumpViewSet(MockAwareViewSet):
+class PumpViewSet(ValuesListMixin, ConditionalGardenCacheMixin, MockAwareViewSet):
     """API endpoint for pump control."""
     queryset = Pump.objects.all()
     serializer_class = PumpSerializer
+    values_serializer_class = PumpValuesSerializer
     permission_classes = [IsAuthenticated, IsGardenStaff]
+    cached_actions = ('list', 'retrieve', 'status')
     
     def get_queryset(self):
         """Filter pump records based on user garden access."""
@@ -297,13 +318,12 @@ class PumpViewSet(MockAwareViewSet):
         # Filter by garden_id if provided in query params
         garden_id = self.request.query_params.get('garden_id')
         if garden_id:
-            if GardenAccess.objects.filter(user=user, garden_id=garden_id).exists():
+            if garden_role(user, garden_id) is not None:
                 return Pump.objects.filter(garden_id=garden_id)
             return Pump.objects.none()
             
         # Otherwise, return pump records from all accessible gardens
-        accessible_gardens = Garden.objects.filter(user_accesses__user=user)
-        return Pump.objects.filter(garden__in=accessible_gardens)
+        return Pump.objects.filter(garden_id__in=accessible_garden_ids(user))
     
     @extend_schema(
         parameters=[
@@ -325,7 +345,7 @@ class PumpViewSet(MockAwareViewSet):
             )
         
         # Check if user has access to this garden
-        if not request.user.is_superuser and not GardenAccess.objects.filter(user=request.user, garden_id=garden_id).exists():
+        if not request.user.is_superuser and garden_role(request.user, garden_id) is None:
             return Response(
                 {'error': 'Access denied to this garden'},
                 status=status.HTTP_403_FORBIDDEN
@@ -367,7 +387,7 @@ class PumpViewSet(MockAwareViewSet):
             )
         
         # Check if user has access to this garden
-        if not request.user.is_superuser and not GardenAccess.objects.filter(user=request.user, garden_id=garden_id).exists():
+        if not request.user.is_superuser and garden_role(request.user, garden_id) is None:
             return Response(
                 {'error': 'Access denied to this garden'},
                 status=status.HTTP_403_FORBIDDEN
@@ -381,36 +401,10 @@ class PumpViewSet(MockAwareViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        pump, created = Pump.objects.get_or_create(
-            garden=garden,
-            defaults={'status': 'off'}
-        )
-        
         action = request.data.get('action', '')
         
-        if action == 'start':
-            pump.status = 'on'
-            pump.save()
-            
-            SystemLog.objects.create(
-                garden=garden,
-                event="Pump started",
-                source=request.data.get('source', 'Manual')
-            )
-            
-            return Response({
-                'success': True,
-                'pump': {'status': pump.status}
-            })
-        elif action == 'stop':
-            pump.status = 'off'
-            pump.save()
-            
-            SystemLog.objects.create(
-                garden=garden,
-                event="Pump stopped",
-                source=request.data.get('source', 'Manual')
-            )
+        if action in ('start', 'stop'):
+            pump = controls.set_pump(garden, action == 'start', request.data.get('source', 'Manual'))
             
             return Response({
                 'success': True,
@@ -423,33 +417,48 @@ class PumpViewSet(MockAwareViewSet):
             )
 
 
-class SystemLogViewSet(MockAwareViewSet):
+class SystemLogViewSet(ValuesListMixin, ReplicaReadMixin, MockAwareViewSet):
     """API endpoint for system logs."""
     queryset = SystemLog.objects.all()
     serializer_class = SystemLogSerializer
+    values_serializer_class = SystemLogValuesSerializer
+    pagination_class = TimeSeriesCursorPagination
+    cursor_ordering = '-timestamp'
     
     @extend_schema(
         parameters=[
-            OpenApiParameter(name="source", description="Filter logs by source (Manual/Automatic/System)", required=False, type=str)
+            OpenApiParameter(name="source", description="Filter logs by source (Manual/Automatic/System)", required=False, type=str),
+            OpenApiParameter(name="garden_id", description="Filter logs by garden ID", required=False, type=int)
         ],
         summary="Get system logs",
-        description="Returns system logs, optionally filtered by source"
+        description="Returns system logs, optionally filtered by source and garden"
     )
     def get_queryset(self):
         """Filter logs based on query parameters."""
-        queryset = SystemLog.objects.all()
+        queryset = SystemLog.objects.select_related('garden')
         source = self.request.query_params.get('source', None)
+        garden_id = self.request.query_params.get('garden_id', None)
         
         if source:
             queryset = queryset.filter(source=source)
         
+        # Served by the (garden, timestamp) index
+        if garden_id:
+            try:
+                garden_id = int(garden_id)
+            except ValueError:
+                raise ValidationError({'error': 'garden_id must be an integer.'})
+            queryset = queryset.filter(garden_id=garden_id)
+        
         return queryset
 
 
-class ScheduleViewSet(MockAwareViewSet):
+class ScheduleViewSet(ValuesListMixin, ConditionalGardenCacheMixin, MockAwareViewSet):
     """API endpoint for watering schedules."""
     queryset = Schedule.objects.all()
     serializer_class = ScheduleSerializer
+    values_serializer_class = ScheduleValuesSerializer
+    garden_scoped = False
     
     @extend_schema(
         summary="Toggle schedule",
@@ -476,60 +485,133 @@ class ScheduleViewSet(MockAwareViewSet):
         })
 
 
-class WaterUsageViewSet(MockAwareViewSet):
+class WaterUsageViewSet(ValuesListMixin, ReplicaReadMixin, ConditionalGardenCacheMixin, MockAwareViewSet):
     """API endpoint for water usage data."""
-    queryset = WaterUsage.objects.all()
+    queryset = WaterUsage.objects.select_related('garden', 'valve')
     serializer_class = WaterUsageSerializer
+    values_serializer_class = WaterUsageValuesSerializer
+    pagination_class = TimeSeriesCursorPagination
+    cursor_ordering = '-bucket_start'
+    cached_actions = ('list', 'retrieve', 'by_period')
+    replica_actions = ('list', 'retrieve', 'by_period')
+    garden_scoped = False
+    
+    # period -> (days covered when no date range is given, bucket truncation)
+    PERIOD_BUCKETS = {
+        'week': (7, TruncDay),
+        'month': (30, TruncDay),
+        'year': (365, TruncMonth),
+    }
+    
+    def get_cache_variant(self):
+        # The default by_period window moves at midnight without any write
+        return str(timezone.localdate())
     
     @extend_schema(
         parameters=[
             OpenApiParameter(name="period", description="Time period (week/month/year)", required=False, type=str),
+            OpenApiParameter(name="garden_id", description="Garden ID", required=False, type=int),
             OpenApiParameter(name="startDate", description="Start date (YYYY-MM-DD)", required=False, type=str),
             OpenApiParameter(name="endDate", description="End date (YYYY-MM-DD)", required=False, type=str)
         ],
         summary="Get water usage by period",
-        description="Returns water usage data filtered by time period and date range"
+        description="Returns water usage per day (per month for a year) and valve, filtered by time period and date range"
     )
     @action(detail=False)
     def by_period(self, request):
-        """Get water usage data by time period."""
+        """
+        Get water usage totals by time bucket and valve.
+        
+        The aggregation runs in the database (GROUP BY bucket, valve), so the
+        response size depends on the number of buckets, not of stored rows.
+        """
         period = request.query_params.get('period', 'week')
         start_date = request.query_params.get('startDate')
         end_date = request.query_params.get('endDate')
+        garden_id = request.query_params.get('garden_id')
+        days, trunc = self.PERIOD_BUCKETS.get(period, self.PERIOD_BUCKETS['week'])
         
-        # Filter by date range if provided
         queryset = self.get_queryset()
+        if garden_id:
+            try:
+                garden_id = int(garden_id)
+            except ValueError:
+                return Response(
+                    {'error': 'garden_id must be an integer.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(garden_id=garden_id)
+        
+        # Filter by date range if provided, otherwise by the period
         if start_date and end_date:
             try:
                 start = datetime.strptime(start_date, '%Y-%m-%d').date()
                 end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                queryset = queryset.filter(timestamp__date__gte=start, timestamp__date__lte=end)
+                queryset = queryset.filter(
+                    bucket_start__gte=local_day_start(start),
+                    bucket_start__lt=local_day_start(end + timedelta(days=1))
+                )
             except ValueError:
                 return Response(
                     {'error': 'Invalid date format. Use YYYY-MM-DD.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
+        else:
+            # Whole local days, so the window is the same all day long
+            queryset = queryset.filter(
+                bucket_start__gte=local_day_start(timezone.localdate() - timedelta(days=days))
+            )
         
-        # Limit results based on period
-        if period == 'week':
-            queryset = queryset.order_by('-timestamp')[:7]
-        elif period == 'month':
-            queryset = queryset.order_by('-timestamp')[:30]
-        elif period == 'year':
-            queryset = queryset.order_by('-timestamp')[:365]
+        rows = (
+            queryset
+            .annotate(bucket=trunc('bucket_start'))
+            .values('bucket', 'valve__number')
+            .annotate(liters=Sum('liters'))
+            .order_by('bucket', 'valve__number')
+        )
         
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+        buckets = {}
+        for row in rows:
+            bucket = buckets.setdefault(row['bucket'], {
+                'bucket_start': row['bucket'],
+                'total': 0,
+                'valves': {},
+            })
+            bucket['valves'][row['valve__number']] = row['liters']
+            bucket['total'] += row['liters']
+        
+        return Response(list(buckets.values()))
 
 
-class PowerConsumptionViewSet(MockAwareViewSet):
+class PowerConsumptionViewSet(ValuesListMixin, ReplicaReadMixin, ConditionalGardenCacheMixin, MockAwareViewSet):
     """API endpoint for power consumption data."""
-    queryset = PowerConsumption.objects.all()
+    queryset = PowerConsumption.objects.select_related('garden')
     serializer_class = PowerConsumptionSerializer
+    values_serializer_class = PowerConsumptionValuesSerializer
+    pagination_class = TimeSeriesCursorPagination
+    cached_actions = ('list', 'retrieve', 'history')
+    replica_actions = ('list', 'retrieve', 'history')
+    garden_scoped = False
+    
+    # period -> days covered; "day" is today since local midnight
+    HISTORY_DAYS = {
+        'week': 7,
+        'month': 30,
+    }
+    
+    @property
+    def cursor_ordering(self):
+        # History reads forward in time, the list newest first
+        return 'measured_at' if self.action == 'history' else '-measured_at'
+    
+    def get_cache_variant(self):
+        # The daily history changes at midnight without any write
+        return str(timezone.localdate())
     
     @extend_schema(
         parameters=[
             OpenApiParameter(name="period", description="Time period (day/week/month)", required=False, type=str),
+            OpenApiParameter(name="garden_id", description="Garden ID", required=False, type=int),
             OpenApiParameter(name="startDate", description="Start date (YYYY-MM-DD)", required=False, type=str),
             OpenApiParameter(name="endDate", description="End date (YYYY-MM-DD)", required=False, type=str)
         ],
@@ -538,37 +620,53 @@ class PowerConsumptionViewSet(MockAwareViewSet):
     )
     @action(detail=False)
     def history(self, request):
-        """Get power consumption history filtered by period and date range."""
+        """
+        Get power consumption history filtered by period and date range.
+        
+        Dates are turned into ``measured_at`` bounds (local midnights) instead
+        of ``__date`` lookups, so the ``(garden, measured_at)`` index serves
+        the range.
+        """
         period = request.query_params.get('period', 'day')
         start_date = request.query_params.get('startDate')
         end_date = request.query_params.get('endDate')
+        garden_id = request.query_params.get('garden_id')
         
-        # Filter by date range if provided
         queryset = self.get_queryset()
+        if garden_id:
+            try:
+                garden_id = int(garden_id)
+            except ValueError:
+                return Response(
+                    {'error': 'garden_id must be an integer.'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            queryset = queryset.filter(garden_id=garden_id)
+        
+        # Filter by date range if provided, otherwise by the period
         if start_date and end_date:
             try:
                 start = datetime.strptime(start_date, '%Y-%m-%d').date()
                 end = datetime.strptime(end_date, '%Y-%m-%d').date()
-                queryset = queryset.filter(date__gte=start, date__lte=end)
             except ValueError:
                 return Response(
                     {'error': 'Invalid date format. Use YYYY-MM-DD.'},
                     status=status.HTTP_400_BAD_REQUEST
                 )
-        
-        # Group or limit results based on period
-        if period == 'day':
+            queryset = queryset.filter(
+                measured_at__gte=local_day_start(start),
+                measured_at__lt=local_day_start(end + timedelta(days=1))
+            )
+        elif period in self.HISTORY_DAYS:
+            # Whole local days, so the window is the same all day long
+            queryset = queryset.filter(
+                measured_at__gte=local_day_start(timezone.localdate() - timedelta(days=self.HISTORY_DAYS[period]))
+            )
+        else:
             # Today's data with hourly samples
-            queryset = queryset.filter(date=timezone.now().date()).order_by('time')
-        elif period == 'week':
-            # Last 7 days aggregated data
-            queryset = queryset.order_by('-date')[:7]
-        elif period == 'month':
-            # Last 30 days aggregated data
-            queryset = queryset.order_by('-date')[:30]
-        
-        serializer = self.get_serializer(queryset, many=True)
-        return Response(serializer.data)
+            queryset = queryset.filter(measured_at__gte=local_day_start(timezone.localdate()))
+        
+        return self.values_response(queryset.order_by('measured_at'))
 
 
 class SystemControlViewSet(MockAwareViewSet):
@@ -584,33 +682,7 @@ class SystemControlViewSet(MockAwareViewSet):
     @action(detail=False, methods=['post'])
     def emergency_stop(self, request):
         """Emergency stop for all valves and pump."""
-        # Turn off all valves
-        valves = Valve.objects.all()
-        for valve in valves:
-            valve.status = 'off'
-            valve.save()
-            
-            # Log the event for each garden
-            SystemLog.objects.create(
-                garden=valve.garden,
-                event=f"Emergency stop - Valve {valve.number} turned off",
-                source="Manual"
-            )
-        
-        # Turn off pump
-        pump = Pump.objects.first()
-        if pump:
-            pump.status = 'off'
-            pump.save()
-        
-        # Log general emergency stop event in first available garden
-        first_garden = Garden.objects.first()
-        if first_garden:
-            SystemLog.objects.create(
-                garden=first_garden,
-                event="Emergency stop activated",
-                source="Manual"
-            )
+        controls.emergency_stop(source="Manual")
         
         return Response({'success': True})
     
@@ -631,10 +703,10 @@ class SystemControlViewSet(MockAwareViewSet):
         # Log the event in first available garden
         first_garden = Garden.objects.first()
         if first_garden:
-            SystemLog.objects.create(
-                garden=first_garden,
-                event="System reset performed",
-                source="Manual"
+            log_event(
+                first_garden.id,
+                "System reset performed",
+                "Manual"
             )
         
         return Response({'success': True})
@@ -664,7 +736,7 @@ class SystemControlViewSet(MockAwareViewSet):
             )
         
         # Check if user has access to this garden
-        if not request.user.is_superuser and not GardenAccess.objects.filter(user=request.user, garden_id=garden_id).exists():
+        if not request.user.is_superuser and garden_role(request.user, garden_id) is None:
             return Response(
                 {'error': 'Access denied to this garden'},
                 status=status.HTTP_403_FORBIDDEN
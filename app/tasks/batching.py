@@ -0,0 +1,184 @@
+"""
+Batched Celery tasks for high-frequency events.
+
+Instead of one task per event, callers ``add`` items to a Redis list per batch
+key (for example a garden id) and a single ``flush_batch`` task hands the
+handler up to ``flush_every`` items at once. A flush is sent as soon as a key
+collects ``flush_every`` items, or ``flush_interval`` seconds after an item
+arrived while no delayed flush was pending for the key. A pending-flush marker
+(``SET NX`` with a ``pending_timeout`` TTL) keeps that to one delayed flush per
+key at a time; it is cleared when the flush runs, or expires if the flush
+message is lost.
+
+Delivery is at-least-once: a flush reads items with LRANGE and only trims them
+from the list after the handler returned. If the handler raises or the worker
+dies (``CELERY_TASK_ACKS_LATE`` redelivers the flush message), the items stay
+queued and are handed over again, so handlers must tolerate duplicates. If a
+flush gives up after its retries, the items stay queued: the next ``add`` to
+the key schedules a flush again, and the periodic ``sweep_batches`` task
+schedules one for keys that get no more items. A per-key lock keeps two
+flushes from handling the same items.
+
+Batches are declared with the ``batched`` decorator in a module the workers
+import (``tasks/tasks.py``)::
+
+    @batched('system-logs', flush_every=100, flush_interval=0.5)
+    def write_system_log_batch(garden_id, events):
+        ...
+
+    write_system_log_batch.add(garden_id, {'event': ...})
+"""
+
+import json
+import logging
+from typing import Any, Callable, Dict, List
+
+from redis.exceptions import LockError
+
+logger = logging.getLogger(__name__)
+
+BatchHandler = Callable[[str, List[Any]], None]
+
+_batches: Dict[str, 'Batch'] = {}
+
+
+class Batch:
+    """A named batch buffer with its handler and flush policy."""
+
+    def __init__(
+        self,
+        name: str,
+        handler: BatchHandler,
+        flush_every: int = 100,
+        flush_interval: float = 5.0,
+        queue: str = 'low_priority',
+        lock_timeout: int = 300,
+        pending_timeout: int = 60
+    ):
+        self.name = name
+        self.handler = handler
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.queue = queue
+        self.lock_timeout = lock_timeout
+        self.pending_timeout = pending_timeout
+
+    def __call__(self, key, items: List[Any]):
+        return self.handler(key, items)
+
+    def buffer_key(self, key) -> str:
+        return f"batch:{self.name}:{key}"
+
+    def pending_key(self, key) -> str:
+        return f"{self.buffer_key(key)}:pending"
+
+    def add(self, key, item: Any) -> None:
+        """
+        Queue an item for the batch of ``key``.
+
+        If Redis is unavailable the handler runs inline with just this item,
+        so events are never dropped.
+        """
+        try:
+            pipe = _redis().pipeline(transaction=False)
+            pipe.rpush(self.buffer_key(key), json.dumps(item))
+            pipe.set(self.pending_key(key), 1, nx=True, ex=self.pending_timeout)
+            size, marked = pipe.execute()
+        except Exception as e:
+            logger.error(f"Batch '{self.name}' unavailable, handling item inline: {e}")
+            self.handler(key, [item])
+            return
+
+        if size % self.flush_every == 0:
+            self.schedule_flush(key)
+        elif marked:
+            self.schedule_flush(key, countdown=self.flush_interval)
+
+    def schedule_flush(self, key, countdown: float = 0) -> None:
+        from tasks.tasks import flush_batch
+
+        flush_batch.apply_async(args=[self.name, key], countdown=countdown, queue=self.queue)
+
+    def schedule_pending_flush(self, key) -> bool:
+        """Schedule a delayed flush of ``key`` unless one is already pending."""
+        if not _redis().set(self.pending_key(key), 1, nx=True, ex=self.pending_timeout):
+            return False
+        self.schedule_flush(key, countdown=self.flush_interval)
+        return True
+
+    def flush(self, key) -> int:
+        """
+        Hand the next ``flush_every`` items of ``key`` to the handler.
+
+        Returns:
+            The number of items handled (0 if another flush holds the key)
+        """
+        conn = _redis()
+        buffer_key = self.buffer_key(key)
+        lock = conn.lock(f"{buffer_key}:lock", timeout=self.lock_timeout)
+        if not lock.acquire(blocking=False):
+            # The current holder re-checks the list before releasing the lock
+            return 0
+
+        try:
+            # Items added from now on schedule a flush of their own
+            conn.delete(self.pending_key(key))
+            raw_items = conn.lrange(buffer_key, 0, self.flush_every - 1)
+            if raw_items:
+                self.handler(key, [json.loads(raw) for raw in raw_items])
+                conn.ltrim(buffer_key, len(raw_items), -1)
+
+            remaining = conn.llen(buffer_key)
+        finally:
+            try:
+                lock.release()
+            except LockError:
+                logger.warning(f"Lock for batch '{self.name}' ({key}) expired during flush")
+
+        if remaining >= self.flush_every:
+            self.schedule_flush(key)
+        elif remaining:
+            # Unconditional: a flush skipped while we held the lock left its marker set
+            self.schedule_flush(key, countdown=self.flush_interval)
+        return len(raw_items)
+
+    def sweep(self) -> int:
+        """
+        Schedule a flush for every key of this batch with queued items.
+
+        Keys read back from Redis are strings, whatever type ``add`` got.
+
+        Returns:
+            The number of flushes scheduled
+        """
+        prefix = self.buffer_key('')
+        scheduled = 0
+        for buffer_key in _redis().scan_iter(match=f"{prefix}*", _type='list'):
+            if self.schedule_pending_flush(buffer_key[len(prefix):]):
+                scheduled += 1
+        return scheduled
+
+
+def batched(name: str, **options) -> Callable[[BatchHandler], Batch]:
+    """Register a function as the handler of a named batch."""
+    def decorator(handler: BatchHandler) -> Batch:
+        batch = Batch(name, handler, **options)
+        _batches[name] = batch
+        return batch
+    return decorator
+
+
+def all_batches() -> List[Batch]:
+    return list(_batches.values())
+
+
+def get_batch(name: str) -> Batch:
+    try:
+        return _batches[name]
+    except KeyError:
+        raise ValueError(f"Unknown batch '{name}'")
+
+
+def _redis():
+    from core.clients.redis_client import RedisClient
+    return RedisClient().connection
@@ -0,0 +1,46 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from core.utils.benchmark import format_summary, summarize, timer
+from tasks.tasks import probe
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the round-trip latency of a high_priority task (the queue of '
+        'emergency_stop and device control) while the low_priority queue is '
+        'flooded. Uses the side-effect free probe task, so no device is '
+        'actuated. Needs running workers and a result backend.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--flood', type=int, default=1000,
+                            help='Number of low_priority tasks to enqueue first')
+        parser.add_argument('--flood-work-ms', type=int, default=50,
+                            help='Work time of each flooding task, in milliseconds')
+        parser.add_argument('--samples', type=int, default=20,
+                            help='Number of high_priority probes to time')
+        parser.add_argument('--timeout', type=float, default=30.0,
+                            help='Seconds to wait for each probe result')
+        parser.add_argument('--same-queue', action='store_true',
+                            help='Send the probes to low_priority as a baseline')
+
+    def handle(self, *args, **options):
+        queue = 'low_priority' if options['same_queue'] else 'high_priority'
+
+        self.stdout.write(
+            f"Flooding low_priority with {options['flood']} tasks of {options['flood_work_ms']}ms..."
+        )
+        for _ in range(options['flood']):
+            probe.apply_async(args=[options['flood_work_ms']], queue='low_priority')
+
+        samples = []
+        for _ in range(options['samples']):
+            try:
+                with timer(samples):
+                    probe.apply_async(queue=queue).get(timeout=options['timeout'])
+            except Exception as e:
+                raise CommandError(f"probe did not complete: {e}")
+
+        self.stdout.write(self.style.SUCCESS(
+            format_summary(f"probe via {queue}", summarize(samples))
+        ))
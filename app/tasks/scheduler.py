@@ -0,0 +1,262 @@
+"""
+Celery beat scheduler backed by an in-memory cache of garden schedules.
+
+``ScheduleCacheScheduler`` loads every active garden ``Schedule`` once at
+start-up and turns it into a beat entry next to the static ``beat_schedule``.
+Changes are pushed rather than polled: ``Schedule`` save/delete signals publish
+the schedule id on a Redis channel, and the scheduler reloads only that row on
+its next tick. No per-tick database query and no shelve file.
+
+As a safety net for missed messages (Redis restarts, updates that bypass the
+signals), all schedules are reloaded every ``reload_interval`` seconds, and the
+listener is restarted whenever it died.
+
+Every tick also refreshes the beat heartbeat key read by
+``core.utils.celery.check_beat_is_active``.
+
+Run beat with::
+
+    celery -A core beat -S tasks.scheduler:ScheduleCacheScheduler
+"""
+
+import json
+import logging
+import re
+import threading
+import time
+from typing import Callable, List, Optional, Set, Tuple
+
+from celery.beat import Scheduler
+from celery.schedules import crontab
+
+logger = logging.getLogger(__name__)
+
+SCHEDULE_CHANNEL = 'garden:schedule-changes'
+ENTRY_PREFIX = 'garden-schedule-'
+
+# In-process subscribers (schedulers running in this process)
+_local_listeners: List[Callable[[int], None]] = []
+
+_TIME_RE = re.compile(r'^\s*(\d{1,2}):(\d{2})\s*([AaPp][Mm])?\s*$')
+_DURATION_RE = re.compile(r'^\s*(\d+)\s*([a-zA-Z]*)\s*$')
+_TARGET_RE = re.compile(r'(\d+)')
+_DURATION_UNITS = {'s': 1, 'sec': 1, 'm': 60, 'min': 60, 'h': 3600, 'hour': 3600}
+
+
+def parse_start_time(value: str) -> Tuple[int, int]:
+    """Parse "08:00 AM" or "18:30" into (hour, minute)."""
+    match = _TIME_RE.match(value or '')
+    if not match:
+        raise ValueError(f"Invalid start time '{value}'")
+    hour, minute, meridiem = int(match.group(1)), int(match.group(2)), match.group(3)
+    if meridiem:
+        hour = hour % 12 + (12 if meridiem.lower() == 'pm' else 0)
+    if hour > 23 or minute > 59:
+        raise ValueError(f"Invalid start time '{value}'")
+    return hour, minute
+
+
+def parse_duration(value: str) -> int:
+    """Parse "30 minutes", "1 hour" or "90" (minutes) into seconds."""
+    match = _DURATION_RE.match(str(value or ''))
+    if not match:
+        raise ValueError(f"Invalid duration '{value}'")
+    amount, unit = int(match.group(1)), match.group(2).lower()
+    if not unit:
+        return amount * 60
+    for prefix in ('hour', 'min', 'sec', 'h', 'm', 's'):
+        if unit.startswith(prefix):
+            return amount * _DURATION_UNITS[prefix]
+    raise ValueError(f"Invalid duration unit '{unit}'")
+
+
+def parse_target(value: str) -> int:
+    """Parse "Valve 1" into the valve number."""
+    match = _TARGET_RE.search(value or '')
+    if not match:
+        raise ValueError(f"Invalid target '{value}'")
+    return int(match.group(1))
+
+
+def entry_name(schedule_id: int) -> str:
+    return f"{ENTRY_PREFIX}{schedule_id}"
+
+
+def schedule_entry(schedule) -> Optional[dict]:
+    """
+    Build the beat entry for a garden schedule.
+
+    Returns:
+        The entry definition, or None if the schedule should not run
+    """
+    if not schedule.isActive:
+        return None
+
+    hour, minute = parse_start_time(schedule.startTime)
+    if schedule.repeat == 'Weekly':
+        days = [day[:3].lower() for day in (schedule.days or [])]
+        if not days:
+            return None
+        run_every = crontab(minute=minute, hour=hour, day_of_week=','.join(days))
+    else:
+        # 'Once' runs at the next occurrence and is then deactivated by the task
+        run_every = crontab(minute=minute, hour=hour)
+
+    return {
+        'task': 'tasks.tasks.run_schedule',
+        'schedule': run_every,
+        'args': (schedule.id,),
+        'options': {'queue': 'high_priority'},
+    }
+
+
+def publish_schedule_change(schedule_id: int) -> None:
+    """Tell running schedulers that a garden schedule was saved or deleted."""
+    for listener in list(_local_listeners):
+        listener(schedule_id)
+
+    try:
+        from core.clients.redis_client import RedisClient
+        RedisClient().publish(SCHEDULE_CHANNEL, {'id': schedule_id})
+    except Exception as e:
+        logger.warning(f"Could not publish change for schedule {schedule_id}: {e}")
+
+
+class ScheduleCacheScheduler(Scheduler):
+    """Beat scheduler that keeps garden schedules in memory and applies pushed changes."""
+
+    # Ticks are cheap (no I/O unless a change is pending), so wake up often
+    # enough for pushed changes to take effect quickly.
+    max_interval = 5
+    # Minimum seconds between two heartbeat writes
+    heartbeat_interval = 5
+    # Seconds between two full reloads of the garden schedules
+    reload_interval = 300
+    # Minimum seconds between two attempts to (re)start the change listener
+    listener_retry_interval = 30
+
+    def setup_schedule(self):
+        super().setup_schedule()
+        self._pending: Set[int] = set()
+        self._pending_lock = threading.Lock()
+        self._pubsub_thread = None
+        self._last_heartbeat = 0.0
+        self._last_reload = 0.0
+        self._last_listener_start = 0.0
+        self._load_all()
+        _local_listeners.append(self.notify)
+        self._start_listener()
+
+    def notify(self, schedule_id: int) -> None:
+        """Queue a schedule for reload on the next tick."""
+        with self._pending_lock:
+            self._pending.add(int(schedule_id))
+
+    def tick(self, *args, **kwargs):
+        self._heartbeat()
+        self._ensure_listener()
+        if time.monotonic() - self._last_reload >= self.reload_interval:
+            self._load_all()
+        self._apply_pending()
+        return super().tick(*args, **kwargs)
+
+    def close(self):
+        if self.notify in _local_listeners:
+            _local_listeners.remove(self.notify)
+        if self._pubsub_thread is not None:
+            self._pubsub_thread.stop()
+        super().close()
+
+    @property
+    def info(self):
+        return f"    . garden schedules -> {len(self._garden_entries())} cached"
+
+    def _garden_entries(self):
+        return [name for name in self.schedule if name.startswith(ENTRY_PREFIX)]
+
+    def _load_all(self) -> None:
+        """Load every active schedule, and drop entries of schedules that are gone."""
+        from garden.models import Schedule
+
+        self._last_reload = time.monotonic()
+        loaded = set()
+        for schedule in Schedule.objects.filter(isActive=True):
+            self._apply(schedule.id, schedule)
+            loaded.add(entry_name(schedule.id))
+        for name in self._garden_entries():
+            if name not in loaded:
+                self.schedule.pop(name)
+        logger.info(f"Loaded {len(self._garden_entries())} garden schedules into beat")
+
+    def _heartbeat(self) -> None:
+        now = time.monotonic()
+        if now - self._last_heartbeat < self.heartbeat_interval:
+            return
+        self._last_heartbeat = now
+
+        from core.utils.celery import record_beat_heartbeat
+        record_beat_heartbeat()
+
+    def _apply_pending(self) -> None:
+        with self._pending_lock:
+            pending, self._pending = self._pending, set()
+        if not pending:
+            return
+
+        from garden.models import Schedule
+
+        schedules = Schedule.objects.in_bulk(pending)
+        for schedule_id in pending:
+            self._apply(schedule_id, schedules.get(schedule_id))
+
+    def _apply(self, schedule_id: int, schedule) -> None:
+        name = entry_name(schedule_id)
+        try:
+            entry = schedule_entry(schedule) if schedule is not None else None
+        except ValueError as e:
+            logger.warning(f"Skipping schedule {schedule_id}: {e}")
+            entry = None
+
+        current = self.schedule.get(name)
+        if entry is None:
+            self.schedule.pop(name, None)
+        elif current is None or (current.task, current.schedule, tuple(current.args)) != (
+            entry['task'], entry['schedule'], entry['args']
+        ):
+            # Replacing an unchanged entry would reset its last run, and could
+            # skip a run that is due but not yet sent
+            self.update_from_dict({name: entry})
+
+    def _ensure_listener(self) -> None:
+        if self._pubsub_thread is not None and self._pubsub_thread.is_alive():
+            return
+        now = time.monotonic()
+        if now - self._last_listener_start < self.listener_retry_interval:
+            return
+        self._start_listener()
+
+    def _start_listener(self) -> None:
+        self._last_listener_start = time.monotonic()
+        self._pubsub_thread = None
+        try:
+            from core.clients.redis_client import RedisClient
+            pubsub = RedisClient().connection.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{SCHEDULE_CHANNEL: self._on_message})
+            self._pubsub_thread = pubsub.run_in_thread(
+                sleep_time=1, daemon=True, exception_handler=self._on_listener_error
+            )
+        except Exception as e:
+            logger.error(f"Schedule change listener unavailable, retrying in {self.listener_retry_interval}s: {e}")
+
+    def _on_listener_error(self, error, pubsub, thread) -> None:
+        """Stop a failed listener; the next tick starts a new one and reloads everything."""
+        logger.error(f"Schedule change listener failed, restarting it: {error}")
+        thread.stop()
+        # Changes published while the listener was down were lost
+        self._last_reload = 0.0
+
+    def _on_message(self, message) -> None:
+        try:
+            self.notify(json.loads(message['data'])['id'])
+        except (KeyError, TypeError, ValueError) as e:
+            logger.error(f"Ignoring malformed schedule change message: {e}")
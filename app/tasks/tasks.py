@@ -8,9 +8,12 @@ from typing import Optional
 from celery import shared_task
 from django.db import connection
 from django.conf import settings
+from django.utils import timezone
 
 import logging
 
+from .batching import all_batches, batched, get_batch
+
 logger = logging.getLogger(__name__)
 
 @shared_task
@@ -27,4 +30,166 @@ def periodic_task():
     Periodic task example.
     """
     logger.info(f"Periodic task executed at {datetime.now()}")
-    return f"Periodic task completed at {datetime.now()}" 
\ No newline at end of file
+    return f"Periodic task completed at {datetime.now()}"
+
+@shared_task
+def write_system_logs(events):
+    """
+    Bulk insert SystemLog events batched by the 'celery' log sink.
+    """
+    from garden.log_sink import write_events
+
+    write_events(events)
+    return len(events)
+
+@batched(
+    'system-logs',
+    flush_every=settings.SYSTEM_LOG_BATCH_SIZE,
+    flush_interval=settings.SYSTEM_LOG_FLUSH_INTERVAL_MS / 1000
+)
+def write_system_log_batch(garden_id, events):
+    """
+    Bulk insert the SystemLog events collected for one garden by the 'batched' log sink.
+    """
+    from garden.log_sink import write_events
+
+    write_events(events)
+
+@shared_task(bind=True, max_retries=5)
+def flush_batch(self, name, key):
+    """
+    Hand the pending items of a batch key to its handler; items are kept until it succeeds.
+    """
+    batch = get_batch(name)
+    try:
+        return batch.flush(key)
+    except Exception as e:
+        raise self.retry(exc=e, countdown=batch.flush_interval)
+
+@shared_task
+def sweep_batches():
+    """
+    Schedule a flush for batch keys left with items, e.g. after a flush gave up retrying.
+    """
+    return sum(batch.sweep() for batch in all_batches())
+
+@shared_task
+def purge_system_logs():
+    """
+    Delete (and archive, if configured) SystemLog rows past their garden's retention.
+    """
+    from garden.retention import purge_expired_logs
+
+    purged = purge_expired_logs()
+    logger.info(f"Purged expired system logs: {purged}")
+    return purged
+
+@shared_task
+def purge_task_results():
+    """
+    Delete django-db task and group results older than CELERY_RESULT_EXPIRES, in batches.
+    """
+    from django_celery_results.models import GroupResult, TaskResult
+    from core.utils.db import delete_in_batches
+
+    cutoff = timezone.now() - timedelta(seconds=settings.CELERY_RESULT_EXPIRES)
+    purged = sum(
+        delete_in_batches(
+            model.objects.filter(date_done__lt=cutoff),
+            batch_size=settings.CELERY_RESULT_PURGE_BATCH_SIZE
+        )
+        for model in (TaskResult, GroupResult)
+    )
+    logger.info(f"Purged {purged} expired task results")
+    return purged
+
+@shared_task
+def auto_close_valve(valve_id, deadline):
+    """
+    Close a valve when its run time is over, unless the timer was superseded.
+    """
+    from garden.timers import close_if_due
+
+    return close_if_due(valve_id, deadline)
+
+@shared_task
+def run_schedule(schedule_id):
+    """
+    Open the valve targeted by a garden schedule for the scheduled duration.
+    """
+    from garden import controls
+    from garden.models import Schedule, Valve
+    from .scheduler import parse_duration, parse_target
+
+    schedule = Schedule.objects.filter(pk=schedule_id, isActive=True).first()
+    if schedule is None:
+        logger.info(f"Schedule {schedule_id} is gone or inactive, skipping")
+        return False
+
+    try:
+        number = parse_target(schedule.target)
+        duration = parse_duration(schedule.duration)
+    except ValueError as e:
+        logger.error(f"Schedule {schedule_id} cannot run: {e}")
+        return False
+
+    valve = Valve.objects.filter(garden_id=schedule.garden_id, number=number).first()
+    if valve is None:
+        logger.error(f"Schedule {schedule_id} targets missing valve {number}")
+        return False
+
+    controls.open_valve(valve, duration, 'Automatic')
+
+    if schedule.repeat == 'Once':
+        schedule.isActive = False
+        schedule.save(update_fields=['isActive'])
+    return True
+
+
+@shared_task
+def control_valve(valve_id, action, duration=None, source='Manual'):
+    """
+    Open or close a valve from a worker (routed to high_priority).
+    """
+    from garden import controls
+    from garden.models import Valve
+
+    valve = Valve.objects.get(pk=valve_id)
+    if action == 'open':
+        controls.open_valve(valve, duration, source)
+    elif action == 'close':
+        controls.close_valve(valve, source)
+    else:
+        raise ValueError(f"Invalid valve action '{action}'")
+    return valve.status
+
+@shared_task
+def control_pump(garden_id, action, source='Manual'):
+    """
+    Start or stop a garden's pump from a worker (routed to high_priority).
+    """
+    from garden import controls
+    from garden.models import Garden
+
+    if action not in ('start', 'stop'):
+        raise ValueError(f"Invalid pump action '{action}'")
+    pump = controls.set_pump(Garden.objects.get(pk=garden_id), action == 'start', source)
+    return pump.status
+
+@shared_task
+def emergency_stop(source='Manual'):
+    """
+    Turn off every valve and the pump (routed to high_priority).
+    """
+    from garden import controls
+
+    return controls.emergency_stop(source)
+
+@shared_task
+def probe(work_ms=0):
+    """
+    Side-effect free task for queue latency benchmarks; sleeps ``work_ms`` to stand in for real work.
+    """
+    if work_ms:
+        time.sleep(work_ms / 1000)
+    return work_ms
@@ -11,7 +11,7 @@ from celery import current_app
 from datetime import datetime, timedelta
 import re
 
-from .tasks import example_task, periodic_task
+from .tasks import example_task, periodic_task, write_system_logs
 from garden.models import Garden, Valve, Schedule, SystemLog
 
 User = get_user_model()
@@ -274,11 +274,40 @@ class TaskPriorityTest(CeleryTaskTest):
     
     def test_task_queue_routing(self):
         """Test task routing to appropriate queues."""
-        # This would test routing tasks to different queues
-        # based on task type and priority
+        from core.celery_client import app
         
-        # For now, verify the concept
-        self.assertTrue(True)  # Placeholder assertion
+        def queue_for(task_name):
+            return app.amqp.router.route({}, task_name)['queue'].name
+        
+        for task_name in ('control_valve', 'control_pump', 'emergency_stop',
+                          'auto_close_valve', 'run_schedule', 'probe'):
+            self.assertEqual(queue_for(f'tasks.tasks.{task_name}'), 'high_priority')
+        self.assertEqual(queue_for('tasks.tasks.write_system_logs'), 'low_priority')
+        self.assertEqual(queue_for('tasks.tasks.purge_system_logs'), 'low_priority')
+        self.assertEqual(queue_for('tasks.tasks.example_task'), 'default')
+    
+    def test_queue_worker_sizing(self):
+        """Test that a dedicated queue worker picks up its concurrency and prefetch."""
+        from core.celery_client import configure_queue_worker
+        
+        conf = MagicMock()
+        with patch.dict('os.environ', {'CELERY_WORKER_QUEUE': 'high_priority'}), \
+                self.settings(CELERY_QUEUE_WORKERS={
+                    'high_priority': {'concurrency': 8, 'prefetch_multiplier': 1},
+                }):
+            configure_queue_worker(conf=conf)
+        
+        self.assertEqual(conf.worker_concurrency, 8)
+        self.assertEqual(conf.worker_prefetch_multiplier, 1)
+    
+    def test_queue_worker_unknown_queue(self):
+        """Test that an unknown CELERY_WORKER_QUEUE names the valid queues."""
+        from django.core.exceptions import ImproperlyConfigured
+        from core.celery_client import configure_queue_worker
+        
+        with patch.dict('os.environ', {'CELERY_WORKER_QUEUE': 'urgent'}), \
+                self.assertRaisesMessage(ImproperlyConfigured, 'default, high_priority, low_priority'):
+            configure_queue_worker(conf=MagicMock())
 
 
 class TaskMonitoringTest(CeleryTaskTest):
@@ -390,6 +419,24 @@ class WateringScheduleExecutorTest(CeleryTaskTest):
         # Implementation should handle this conflict
 
 
+class WriteSystemLogsTaskTest(CeleryTaskTest):
+    """Test cases for the batched SystemLog writer task."""
+    
+    def test_write_system_logs_bulk_inserts(self):
+        """Test that a batch of serialized events is written in one task."""
+        timestamp = (timezone.now() - timedelta(minutes=1)).isoformat()
+        events = [
+            {'garden_id': self.garden.id, 'event': f"Event {i}", 'source': 'Manual', 'timestamp': timestamp}
+            for i in range(3)
+        ]
+        
+        result = write_system_logs.delay(events)
+        
+        self.assertTrue(result.successful())
+        self.assertEqual(result.result, 3)
+        self.assertEqual(SystemLog.objects.filter(garden=self.garden).count(), 3)
+
+
 class TaskIntegrationTest(CeleryTaskTest):
     """Integration tests for task interactions."""
     
@@ -442,4 +489,542 @@ class TaskConfigurationTest(TestCase):
         # Verify JSON serialization is configured
         self.assertEqual(getattr(settings, 'CELERY_TASK_SERIALIZER', None), 'json')
         self.assertEqual(getattr(settings, 'CELERY_RESULT_SERIALIZER', None), 'json')
-        self.assertEqual(getattr(settings, 'CELERY_ACCEPT_CONTENT', None), ['json']) 
\ No newline at end of file
+        self.assertEqual(getattr(settings, 'CELERY_ACCEPT_CONTENT', None), ['json'])
+    
+    def test_purge_task_is_scheduled(self):
+        """Test that the retention job is registered with Celery Beat."""
+        from core.celery_client import app
+        
+        entry = app.conf.beat_schedule['purge-system-logs']
+        self.assertEqual(entry['task'], 'tasks.tasks.purge_system_logs')
+        self.assertIn('tasks.tasks.purge_system_logs', app.tasks.keys())
+    
+    def test_result_policy(self):
+        """Test that fire-and-forget tasks skip the result backend."""
+        from core.celery_client import app
+        
+        self.assertTrue(app.tasks['tasks.tasks.write_system_logs'].ignore_result)
+        self.assertTrue(app.tasks['tasks.tasks.control_valve'].ignore_result)
+        self.assertFalse(app.tasks['tasks.tasks.emergency_stop'].ignore_result)
+        
+        # The batched purge replaces Celery's built-in result cleanup entry
+        entry = app.conf.beat_schedule['celery.backend_cleanup']
+        self.assertEqual(entry['task'], 'tasks.tasks.purge_task_results')
+    
+    @override_settings(CELERY_RESULT_EXPIRES=3600, CELERY_RESULT_PURGE_BATCH_SIZE=2)
+    def test_purge_task_results(self):
+        """Test that only expired database results are deleted."""
+        from django_celery_results.models import TaskResult
+        from .tasks import purge_task_results
+        
+        old = timezone.now() - timedelta(hours=2)
+        for n in range(5):
+            TaskResult.objects.create(task_id=f'old-{n}', status='SUCCESS', date_done=old)
+        TaskResult.objects.create(task_id='recent', status='SUCCESS')
+        TaskResult.objects.filter(task_id__startswith='old-').update(date_done=old)
+        
+        self.assertEqual(purge_task_results(), 5)
+        self.assertEqual(list(TaskResult.objects.values_list('task_id', flat=True)), ['recent'])
+    
+    @patch('core.utils.celery.check_task_status', return_value='SUCCESS')
+    @patch('core.celery_client.AsyncResult')
+    def test_task_state_falls_back_to_index(self, mock_result, mock_status):
+        """Test that results ignored by the backend are reported from the state index."""
+        from core.celery_client import get_task_state
+        
+        mock_result.return_value.state = 'PENDING'
+        mock_result.return_value.ready.return_value = False
+        
+        self.assertEqual(get_task_state('abc')['state'], 'SUCCESS')
+        mock_status.assert_called_once_with('abc')
+
+
+class ScheduleParsingTest(TestCase):
+    """Test cases for parsing garden schedule fields."""
+    
+    def test_parse_start_time(self):
+        """Test 12h and 24h start times."""
+        from .scheduler import parse_start_time
+        
+        self.assertEqual(parse_start_time("08:00 AM"), (8, 0))
+        self.assertEqual(parse_start_time("06:30 PM"), (18, 30))
+        self.assertEqual(parse_start_time("12:15 AM"), (0, 15))
+        self.assertEqual(parse_start_time("21:45"), (21, 45))
+        with self.assertRaises(ValueError):
+            parse_start_time("later")
+    
+    def test_parse_duration_and_target(self):
+        """Test duration units and valve targets."""
+        from .scheduler import parse_duration, parse_target
+        
+        self.assertEqual(parse_duration("30 minutes"), 1800)
+        self.assertEqual(parse_duration("1 hour"), 3600)
+        self.assertEqual(parse_duration("45"), 2700)
+        self.assertEqual(parse_target("Valve 3"), 3)
+        with self.assertRaises(ValueError):
+            parse_target("Pump")
+
+
+class ScheduleCacheSchedulerTest(CeleryTaskTest):
+    """Test cases for the in-memory garden schedule beat scheduler."""
+    
+    def setUp(self):
+        super().setUp()
+        self.daily = Schedule.objects.create(
+            garden=self.garden,
+            startTime="08:00 AM",
+            duration="30 minutes",
+            target="Valve 1",
+            repeat="Daily",
+            isActive=True
+        )
+        self.weekly = Schedule.objects.create(
+            garden=self.garden,
+            startTime="06:00 PM",
+            duration="20 minutes",
+            target="Valve 1",
+            repeat="Weekly",
+            days=["monday", "friday"],
+            isActive=True
+        )
+        self.inactive = Schedule.objects.create(
+            garden=self.garden,
+            startTime="09:00 AM",
+            duration="10 minutes",
+            target="Valve 1",
+            repeat="Daily",
+            isActive=False
+        )
+        
+        patcher = patch('tasks.scheduler.ScheduleCacheScheduler._start_listener')
+        self.start_listener = patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        from .scheduler import ScheduleCacheScheduler
+        self.scheduler = ScheduleCacheScheduler(app=current_app)
+        self.addCleanup(self.scheduler.close)
+    
+    def test_active_schedules_loaded_as_entries(self):
+        """Test that active schedules become crontab beat entries."""
+        from .scheduler import entry_name
+        
+        daily = self.scheduler.schedule[entry_name(self.daily.id)]
+        self.assertEqual(daily.task, 'tasks.tasks.run_schedule')
+        self.assertEqual(daily.args, (self.daily.id,))
+        self.assertEqual(daily.schedule.hour, {8})
+        self.assertEqual(daily.schedule.minute, {0})
+        
+        weekly = self.scheduler.schedule[entry_name(self.weekly.id)]
+        self.assertEqual(weekly.schedule.hour, {18})
+        self.assertEqual(weekly.schedule.day_of_week, {1, 5})
+        
+        self.assertNotIn(entry_name(self.inactive.id), self.scheduler.schedule)
+        self.assertIn('purge-system-logs', self.scheduler.schedule)
+    
+    def test_ticks_without_changes_do_not_query(self):
+        """Test that applying an empty change set costs no queries."""
+        with self.assertNumQueries(0):
+            self.scheduler._apply_pending()
+    
+    def test_pushed_changes_update_entries(self):
+        """Test that save/delete notifications update only the changed entries."""
+        from .scheduler import entry_name
+        
+        self.daily.isActive = False
+        self.daily.save()
+        self.inactive.isActive = True
+        self.inactive.save()
+        weekly_id = self.weekly.id
+        self.weekly.delete()
+        
+        self.scheduler.notify(self.daily.id)
+        self.scheduler.notify(self.inactive.id)
+        self.scheduler.notify(weekly_id)
+        with self.assertNumQueries(1):
+            self.scheduler._apply_pending()
+        
+        self.assertNotIn(entry_name(self.daily.id), self.scheduler.schedule)
+        self.assertNotIn(entry_name(weekly_id), self.scheduler.schedule)
+        self.assertIn(entry_name(self.inactive.id), self.scheduler.schedule)
+    
+    def test_signals_publish_on_commit(self):
+        """Test that schedule saves are pushed to local schedulers after commit."""
+        from .scheduler import entry_name
+        
+        with patch('core.clients.redis_client.RedisClient', side_effect=Exception("no redis")):
+            with self.captureOnCommitCallbacks(execute=True):
+                self.daily.startTime = "07:30 AM"
+                self.daily.save()
+        
+        self.scheduler._apply_pending()
+        self.assertEqual(self.scheduler.schedule[entry_name(self.daily.id)].schedule.hour, {7})
+    
+    @patch('celery.beat.Scheduler.tick', return_value=5)
+    @patch('core.utils.celery.record_beat_heartbeat')
+    def test_tick_reloads_missed_changes(self, mock_heartbeat, mock_tick):
+        """Test that a periodic full reload applies changes no message announced."""
+        from .scheduler import entry_name
+        
+        # Queryset updates send no signals
+        Schedule.objects.filter(pk=self.daily.pk).update(startTime="07:30 AM")
+        Schedule.objects.filter(pk=self.inactive.pk).update(isActive=True)
+        Schedule.objects.filter(pk=self.weekly.pk).update(isActive=False)
+        
+        self.scheduler.tick()
+        self.assertEqual(self.scheduler.schedule[entry_name(self.daily.id)].schedule.hour, {8})
+        
+        self.scheduler._last_reload -= self.scheduler.reload_interval
+        self.scheduler.tick()
+        self.assertEqual(self.scheduler.schedule[entry_name(self.daily.id)].schedule.hour, {7})
+        self.assertIn(entry_name(self.inactive.id), self.scheduler.schedule)
+        self.assertNotIn(entry_name(self.weekly.id), self.scheduler.schedule)
+    
+    def test_reload_keeps_unchanged_entries(self):
+        """Test that reloading does not reset the last run of unchanged entries."""
+        from .scheduler import entry_name
+        
+        daily = self.scheduler.schedule[entry_name(self.daily.id)]
+        self.scheduler._load_all()
+        self.assertIs(self.scheduler.schedule[entry_name(self.daily.id)], daily)
+    
+    @patch('celery.beat.Scheduler.tick', return_value=5)
+    @patch('core.utils.celery.record_beat_heartbeat')
+    def test_failed_listener_is_restarted(self, mock_heartbeat, mock_tick):
+        """Test that a listener error stops the thread and the next tick starts a new one."""
+        thread = MagicMock()
+        self.scheduler._pubsub_thread = thread
+        self.start_listener.reset_mock()
+        
+        self.scheduler._on_listener_error(ConnectionError("redis gone"), MagicMock(), thread)
+        thread.stop.assert_called_once_with()
+        
+        thread.is_alive.return_value = False
+        with patch.object(self.scheduler, '_load_all') as mock_load_all:
+            self.scheduler.tick()
+        self.start_listener.assert_called_once_with()
+        mock_load_all.assert_called_once_with()
+    
+    @patch('core.utils.celery.record_beat_heartbeat')
+    def test_tick_refreshes_beat_heartbeat(self, mock_heartbeat):
+        """Test that beat writes its heartbeat at most once per interval."""
+        self.scheduler._heartbeat()
+        self.scheduler._heartbeat()
+        mock_heartbeat.assert_called_once_with()
+
+
+class RunScheduleTaskTest(CeleryTaskTest):
+    """Test cases for the scheduled irrigation task."""
+    
+    def test_run_schedule_opens_target_valve(self):
+        """Test that a schedule opens its valve for the scheduled duration."""
+        from .tasks import run_schedule
+        
+        schedule = Schedule.objects.create(
+            garden=self.garden,
+            startTime="08:00 AM",
+            duration="30 minutes",
+            target="Valve 1",
+            repeat="Once",
+            isActive=True
+        )
+        
+        result = run_schedule.delay(schedule.id)
+        
+        self.assertTrue(result.result)
+        self.valve.refresh_from_db()
+        self.assertEqual(self.valve.status, 'on')
+        self.assertEqual(self.valve.duration, 1800)
+        self.assertTrue(SystemLog.objects.filter(garden=self.garden, source='Automatic').exists())
+        
+        # One-off schedules are deactivated after running
+        schedule.refresh_from_db()
+        self.assertFalse(schedule.isActive)
+
+
+class DeviceControlTaskTest(CeleryTaskTest):
+    """Test cases for the high-priority device control tasks."""
+    
+    def test_control_valve_opens_and_closes(self):
+        """Test opening and closing a valve from a worker."""
+        from .tasks import control_valve
+        
+        self.assertEqual(control_valve.delay(self.valve.id, 'open', 600).result, 'on')
+        self.valve.refresh_from_db()
+        self.assertEqual(self.valve.status, 'on')
+        self.assertEqual(self.valve.duration, 600)
+        
+        self.assertEqual(control_valve.delay(self.valve.id, 'close').result, 'off')
+        self.assertEqual(
+            SystemLog.objects.filter(garden=self.garden, event__startswith="Valve 1").count(), 2
+        )
+        
+        with self.assertRaises(ValueError):
+            control_valve.delay(self.valve.id, 'toggle')
+    
+    def test_control_pump(self):
+        """Test starting a pump that does not exist yet."""
+        from .tasks import control_pump
+        
+        self.assertEqual(control_pump.delay(self.garden.id, 'start').result, 'on')
+        self.assertEqual(self.garden.pumps.get().status, 'on')
+    
+    def test_emergency_stop(self):
+        """Test that emergency stop turns off every valve."""
+        from .tasks import emergency_stop
+        
+        self.valve.status = 'on'
+        self.valve.save()
+        
+        self.assertEqual(emergency_stop.delay().result, 1)
+        self.valve.refresh_from_db()
+        self.assertEqual(self.valve.status, 'off')
+        self.assertTrue(SystemLog.objects.filter(event="Emergency stop activated").exists())
+
+
+class TaskStatusIndexTest(TestCase):
+    """Test cases for the Redis task state index."""
+    
+    def setUp(self):
+        self.redis = MagicMock()
+        patcher = patch('core.utils.celery._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+    
+    def test_bulk_status_lookup_is_one_round_trip(self):
+        """Test that many task states are read with a single MGET."""
+        from core.utils.celery import check_task_status, check_task_statuses
+        
+        self.redis.mget.return_value = ['SUCCESS', None, 'STARTED']
+        
+        states = check_task_statuses(['a', 'b', 'c'])
+        
+        self.assertEqual(states, {'a': 'SUCCESS', 'b': 'NOTEXIST', 'c': 'STARTED'})
+        self.redis.mget.assert_called_once_with(
+            ['celery:task-state:a', 'celery:task-state:b', 'celery:task-state:c']
+        )
+        
+        self.redis.mget.return_value = ['FAILURE']
+        self.assertEqual(check_task_status('a'), 'FAILURE')
+        self.assertEqual(check_task_statuses([]), {})
+    
+    def test_status_lookup_survives_redis_errors(self):
+        """Test that an unavailable index reports tasks as unknown."""
+        from core.utils.celery import check_beat_is_active, check_task_statuses
+        
+        self.redis.mget.side_effect = ConnectionError("down")
+        self.redis.exists.side_effect = ConnectionError("down")
+        
+        self.assertEqual(check_task_statuses(['a']), {'a': 'NOTEXIST'})
+        self.assertFalse(check_beat_is_active())
+    
+    @override_settings(CELERY_TASK_STATE_TTL=120)
+    def test_signals_index_worker_states(self):
+        """Test that worker signals record states and eager runs are skipped."""
+        from core.celery_client import handle_task_published, handle_task_success
+        
+        handle_task_published(headers={'id': 'abc'})
+        self.redis.setex.assert_called_once_with('celery:task-state:abc', 120, 'PENDING')
+        
+        task = MagicMock()
+        task.request.id = 'abc'
+        task.request.is_eager = False
+        handle_task_success(sender=task)
+        self.redis.setex.assert_called_with('celery:task-state:abc', 120, 'SUCCESS')
+        
+        self.redis.setex.reset_mock()
+        task.request.is_eager = True
+        handle_task_success(sender=task)
+        self.redis.setex.assert_not_called()
+    
+    def test_beat_heartbeat(self):
+        """Test that beat is reported active only while its heartbeat key exists."""
+        from core.utils.celery import check_beat_is_active, record_beat_heartbeat
+        
+        record_beat_heartbeat()
+        self.assertEqual(self.redis.setex.call_args[0][0], 'celery:beat:heartbeat')
+        
+        self.redis.exists.return_value = 1
+        self.assertTrue(check_beat_is_active())
+        self.redis.exists.return_value = 0
+        self.assertFalse(check_beat_is_active())
+
+
+class FakeRedisLists:
+    """Minimal in-memory stand-in for the Redis list, marker and lock commands used by batches."""
+    
+    def __init__(self):
+        self.lists = {}
+        self.strings = {}
+        self.locked = set()
+    
+    def pipeline(self, transaction=True):
+        fake = self
+        
+        class Pipeline:
+            def __init__(self):
+                self.commands = []
+            
+            def __getattr__(self, name):
+                return lambda *args, **kwargs: self.commands.append((getattr(fake, name), args, kwargs))
+            
+            def execute(self):
+                return [command(*args, **kwargs) for command, args, kwargs in self.commands]
+        
+        return Pipeline()
+    
+    def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = str(value)
+        return True
+    
+    def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+            self.lists.pop(key, None)
+    
+    def scan_iter(self, match=None, _type=None):
+        prefix = match.rstrip('*')
+        return [key for key, items in self.lists.items() if key.startswith(prefix) and items]
+    
+    def rpush(self, key, value):
+        self.lists.setdefault(key, []).append(value)
+        return len(self.lists[key])
+    
+    def lrange(self, key, start, end):
+        return self.lists.get(key, [])[start:end + 1]
+    
+    def ltrim(self, key, start, end):
+        self.lists[key] = self.lists.get(key, [])[start:]
+    
+    def llen(self, key):
+        return len(self.lists.get(key, []))
+    
+    def lock(self, name, timeout=None):
+        fake = self
+        
+        class Lock:
+            def acquire(self, blocking=True):
+                if name in fake.locked:
+                    return False
+                fake.locked.add(name)
+                return True
+            
+            def release(self):
+                fake.locked.discard(name)
+        
+        return Lock()
+
+
+class BatchedTaskTest(TestCase):
+    """Test cases for the batched task primitive."""
+    
+    def setUp(self):
+        from .batching import Batch
+        
+        self.redis = FakeRedisLists()
+        patcher = patch('tasks.batching._redis', return_value=self.redis)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.handled = []
+        self.batch = Batch(
+            'test', lambda key, items: self.handled.append((key, items)),
+            flush_every=3, flush_interval=2
+        )
+    
+    @patch('tasks.tasks.flush_batch.apply_async')
+    def test_flushes_are_scheduled_per_batch_not_per_item(self, mock_apply):
+        """Test that only the first item and every full batch send a flush task."""
+        for n in range(7):
+            self.batch.add(1, {'n': n})
+        
+        self.assertEqual(
+            [c.kwargs['countdown'] for c in mock_apply.call_args_list], [2, 0, 0]
+        )
+        self.assertEqual(mock_apply.call_args.kwargs['args'], ['test', 1])
+        self.assertEqual(mock_apply.call_args.kwargs['queue'], 'low_priority')
+    
+    @patch('tasks.tasks.flush_batch.apply_async')
+    def test_flush_hands_over_a_list_and_trims_it(self, mock_apply):
+        """Test that a flush handles up to flush_every items and reschedules the rest."""
+        for n in range(4):
+            self.batch.add(1, {'n': n})
+        mock_apply.reset_mock()
+        
+        self.assertEqual(self.batch.flush(1), 3)
+        self.assertEqual(self.handled, [(1, [{'n': 0}, {'n': 1}, {'n': 2}])])
+        self.assertEqual(self.redis.llen('batch:test:1'), 1)
+        mock_apply.assert_called_once_with(args=['test', 1], countdown=2, queue='low_priority')
+    
+    @patch('tasks.tasks.flush_batch.apply_async')
+    def test_items_survive_handler_failure(self, mock_apply):
+        """Test at-least-once delivery: items are only trimmed after the handler succeeds."""
+        from .batching import Batch
+        
+        failing = Batch('test', MagicMock(side_effect=RuntimeError("db down")), flush_every=3)
+        failing.add(1, {'n': 0})
+        
+        with self.assertRaises(RuntimeError):
+            failing.flush(1)
+        self.assertEqual(self.redis.llen('batch:test:1'), 1)
+        self.assertEqual(self.redis.locked, set())
+        
+        self.assertEqual(self.batch.flush(1), 1)
+        self.assertEqual(self.handled, [(1, [{'n': 0}])])
+    
+    @patch('tasks.tasks.flush_batch.apply_async')
+    def test_failed_flush_is_rescheduled_by_the_next_item(self, mock_apply):
+        """Test that a flush which gave up does not leave its items without a pending flush."""
+        from .batching import Batch
+        
+        failing = Batch('test', MagicMock(side_effect=RuntimeError("db down")), flush_every=3, flush_interval=2)
+        failing.add(1, {'n': 0})
+        self.assertEqual(mock_apply.call_count, 1)
+        
+        with self.assertRaises(RuntimeError):
+            failing.flush(1)
+        failing.add(1, {'n': 1})
+        self.assertEqual(mock_apply.call_count, 2)
+        self.assertEqual(mock_apply.call_args.kwargs['countdown'], 2)
+    
+    @patch('tasks.tasks.flush_batch.apply_async')
+    def test_sweep_schedules_keys_left_with_items(self, mock_apply):
+        """Test that the sweep flushes idle keys once, and skips keys with a pending flush."""
+        self.redis.rpush('batch:test:1', '{"n": 0}')
+        self.batch.add(2, {'n': 0})
+        mock_apply.reset_mock()
+        
+        self.assertEqual(self.batch.sweep(), 1)
+        mock_apply.assert_called_once_with(args=['test', '1'], countdown=2, queue='low_priority')
+        self.assertEqual(self.batch.sweep(), 0)
+    
+    @patch('tasks.tasks.flush_batch.apply_async')
+    def test_concurrent_flush_is_skipped(self, mock_apply):
+        """Test that a flush does nothing while another one holds the key."""
+        self.batch.add(1, {'n': 0})
+        self.redis.locked.add('batch:test:1:lock')
+        
+        self.assertEqual(self.batch.flush(1), 0)
+        self.assertEqual(self.handled, [])
+    
+    def test_handles_inline_when_redis_is_down(self):
+        """Test that items are not dropped when Redis is unavailable."""
+        with patch('tasks.batching._redis', side_effect=ConnectionError("down")):
+            self.batch.add(1, {'n': 0})
+        self.assertEqual(self.handled, [(1, [{'n': 0}])])
+    
+    @patch('tasks.tasks.flush_batch.apply_async')
+    def test_batched_log_sink(self, mock_apply):
+        """Test that the 'batched' log sink writes each garden's events in one flush."""
+        from garden.log_sink import build_log_sink
+        from .tasks import flush_batch
+        
+        garden = Garden.objects.create(name="Batch Garden")
+        sink = build_log_sink('batched')
+        for n in range(3):
+            sink.emit(garden.id, f"Event {n}", "Automatic")
+        self.assertEqual(SystemLog.objects.count(), 0)
+        
+        self.assertEqual(flush_batch.run('system-logs', garden.id), 3)
+        self.assertEqual(SystemLog.objects.filter(garden=garden, source='Automatic').count(), 3)
@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.core.management.base import BaseCommand
+from django.test.utils import CaptureQueriesContext, override_settings
+from rest_framework.test import APIClient
+
+from core.utils.benchmark import format_summary, summarize, timer
+from garden.models import Garden, GardenAccess, Valve
+from users.models import User
+from users.tokens import ClaimsRefreshToken, get_auth_version
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare read request latency and query count of the database-backed JWT '
+        'user lookup against stateless claims. Runs in a rolled back transaction.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=500,
+                            help='Number of requests per mode')
+        parser.add_argument('--path', default='/api/garden/valves/?garden_id={garden_id}',
+                            help='Read endpoint to call')
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            user = User.objects.create_user(email='benchmark-auth@smartgarden.local', password=None)
+            garden = Garden.objects.create(name='Auth benchmark')
+            GardenAccess.objects.create(user=user, garden=garden, role='manager')
+            for number in range(1, 5):
+                Valve.objects.create(garden=garden, number=number)
+
+            if get_auth_version(user.pk) is None:
+                self.stdout.write(self.style.WARNING(
+                    'Redis is unavailable: the stateless mode will fall back to the database'
+                ))
+
+            path = options['path'].format(garden_id=garden.id)
+            with override_settings(JWT_STATELESS_USERS=True):
+                token = str(ClaimsRefreshToken.for_user(user).access_token)
+
+            for label, stateless in (('database user lookup', False), ('stateless claims', True)):
+                with override_settings(JWT_STATELESS_USERS=stateless):
+                    self._run(label, token, path, options['requests'])
+
+            transaction.set_rollback(True)
+
+    def _run(self, label, token, path, count):
+        client = APIClient(SERVER_NAME=settings.ALLOWED_HOSTS[0])
+        client.credentials(HTTP_AUTHORIZATION=f'JWT {token}')
+        client.get(path)  # warm up
+
+        samples = []
+        with CaptureQueriesContext(connection) as queries:
+            for _ in range(count):
+                with timer(samples):
+                    response = client.get(path)
+                if response.status_code != 200:
+                    self.stderr.write(f"{label}: HTTP {response.status_code}")
+                    return
+
+        self.stdout.write(
+            f"{format_summary(label, summarize(samples))} "
+            f"queries/request={len(queries) / count:.1f}"
+        )
@@ -58,6 +58,12 @@ class User(AbstractUser):
     def __str__(self):
         return self.email
     
+    def save(self, *args, **kwargs):
+        if getattr(self, 'from_token_claims', False):
+            # Built from JWT claims (users.tokens.user_from_claims): most fields are unset
+            raise RuntimeError("Users rebuilt from token claims are read-only; use users.tokens.load_user()")
+        super().save(*args, **kwargs)
+    
     @property
     def is_admin(self):
         return self.role == 'admin'
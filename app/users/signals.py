@@ -1,6 +1,27 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
+from garden.models import GardenAccess
 from .models import User
+from .tokens import bump_auth_version
  
 # This file can be used to handle post-save actions
-# For example, creating a user profile when a user is created 
\ No newline at end of file
+# For example, creating a user profile when a user is created
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def revoke_user_claims(sender, instance, update_fields=None, **kwargs):
+    """Outdate the token claims of a user whose role, status or profile changed."""
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    user_id = instance.pk
+    transaction.on_commit(lambda: bump_auth_version(user_id))
+
+
+@receiver(post_save, sender=GardenAccess)
+@receiver(post_delete, sender=GardenAccess)
+def revoke_garden_claims(sender, instance, **kwargs):
+    """Outdate the garden claims of a user whose garden access changed."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_auth_version(user_id))
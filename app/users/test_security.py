@@ -104,4 +104,106 @@ class JWTSecurityTest(APITestCase):
             )
             self.assertIn('user_id', decoded)
         except jwt.InvalidTokenError:
-            self.fail("Valid token should verify successfully") 
\ No newline at end of file
+            self.fail("Valid token should verify successfully") 
+
+class FakeVersionStore:
+    """In-memory stand-in for the Redis commands used by auth versions."""
+    
+    def __init__(self):
+        self.data = {}
+    
+    def get(self, key):
+        return self.data.get(key)
+    
+    def set(self, key, value, nx=False):
+        if nx and key in self.data:
+            return None
+        self.data[key] = str(value)
+        return True
+    
+    def setex(self, key, ttl, value):
+        return self.set(key, value)
+    
+    def exists(self, key):
+        return int(key in self.data)
+    
+    def incr(self, key):
+        self.data[key] = str(int(self.data.get(key, 0)) + 1)
+        return int(self.data[key])
+
+
+@override_settings(JWT_STATELESS_USERS=True)
+class StatelessJWTTest(APITestCase):
+    """Test cases for authenticating read requests from access token claims."""
+    
+    def setUp(self):
+        from unittest.mock import patch
+        from garden.models import Garden, GardenAccess, Valve
+        
+        self.store = FakeVersionStore()
+        patcher = patch('users.tokens._redis', return_value=self.store)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        
+        self.user = User.objects.create_user(email='claims@example.com', password='securepass123')
+        self.garden = Garden.objects.create(name="Claims Garden")
+        self.access = GardenAccess.objects.create(user=self.user, garden=self.garden, role='manager')
+        Valve.objects.create(garden=self.garden, number=1)
+        
+        response = self.client.post('/api/users/auth/jwt/create/', {
+            'email': 'claims@example.com',
+            'password': 'securepass123',
+        })
+        self.token = response.data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'JWT {self.token}')
+    
+    def test_access_token_carries_claims(self):
+        """Test that issued access tokens embed role and garden claims."""
+        decoded = jwt.decode(self.token, settings.SECRET_KEY, algorithms=['HS256'])
+        
+        self.assertEqual(decoded['role'], 'staff')
+        self.assertFalse(decoded['su'])
+        self.assertEqual(decoded['gardens'], {str(self.garden.id): 'manager'})
+        self.assertIn('ver', decoded)
+    
+    def test_reads_skip_user_and_access_queries(self):
+        """Test that a read request only queries the data it returns."""
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(f'/api/garden/valves/?garden_id={self.garden.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+        
+        tables = ' '.join(query['sql'] for query in queries.captured_queries)
+        self.assertNotIn('users_user', tables)
+        self.assertNotIn('garden_gardenaccess', tables)
+    
+    def test_revoked_access_falls_back_to_database(self):
+        """Test that changing a user's access outdates the claims in issued tokens."""
+        with self.captureOnCommitCallbacks(execute=True):
+            self.access.delete()
+        
+        response = self.client.get(f'/api/garden/valves/?garden_id={self.garden.id}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 0)
+    
+    def test_claims_user_is_read_only(self):
+        """Test that users rebuilt from claims cannot be saved by mistake."""
+        from rest_framework_simplejwt.tokens import AccessToken
+        from users.tokens import load_user, user_from_claims
+        
+        user = user_from_claims(AccessToken(self.token))
+        self.assertEqual(user.garden_roles, {self.garden.id: 'manager'})
+        with self.assertRaises(RuntimeError):
+            user.save()
+        self.assertEqual(load_user(user).email, 'claims@example.com')
+    
+    def test_writes_load_the_user(self):
+        """Test that unsafe methods keep the regular database lookup."""
+        from unittest.mock import patch
+        
+        with patch('users.tokens.user_from_claims') as mock_from_claims:
+            self.client.post('/api/garden/valves/', {})
+        mock_from_claims.assert_not_called()
@@ -0,0 +1,203 @@
+"""
+Access tokens that carry the user's authorization claims.
+
+With ``JWT_STATELESS_USERS`` enabled, access tokens embed the user's email,
+name, role, superuser flag and per-garden roles plus an authorization version.
+``core.authentication.StatelessJWTAuthentication`` rebuilds the user from these
+claims on read requests instead of loading the row, as long as the token's
+version still matches the user's current version in Redis.
+
+The version is bumped whenever something the claims depend on changes (user
+saves, garden access grants and revocations), so outdated tokens simply fall
+back to the regular database lookup until they are refreshed. The same
+version keys the cached claims used to authorize websocket connections
+(``core.ws_auth``), which therefore need no database hit while it is current.
+"""
+
+import json
+import logging
+import time
+from typing import Optional
+
+from django.conf import settings
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.utils.cache import TTLCache
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+AUTH_VERSION_KEY = 'auth:ver:{}'
+CLAIMS_CACHE_KEY = 'auth:claims:{}'
+
+# (user id, version) -> claims, in front of the Redis copy
+_claims_cache = TTLCache(maxsize=settings.AUTH_CLAIMS_LOCAL_CACHE_SIZE, ttl=settings.AUTH_CLAIMS_CACHE_TTL)
+
+
+def _redis():
+    from core.clients.redis_client import RedisClient
+    return RedisClient().connection
+
+
+def get_auth_version(user_id) -> Optional[int]:
+    """
+    Current authorization version of a user, or None if Redis is unavailable.
+
+    A missing key is initialised to the current time in milliseconds rather
+    than 0, so tokens issued before Redis lost its data can never match again.
+    """
+    try:
+        conn = _redis()
+        key = AUTH_VERSION_KEY.format(user_id)
+        version = conn.get(key)
+        if version is None:
+            conn.set(key, int(time.time() * 1000), nx=True)
+            version = conn.get(key)
+        return int(version)
+    except Exception as e:
+        logger.error(f"Auth version unavailable for user {user_id}: {e}")
+        return None
+
+
+def bump_auth_version(user_id) -> None:
+    """Invalidate the claims of every token issued to a user so far."""
+    try:
+        conn = _redis()
+        key = AUTH_VERSION_KEY.format(user_id)
+        if not conn.exists(key):
+            conn.set(key, int(time.time() * 1000), nx=True)
+        conn.incr(key)
+    except Exception as e:
+        logger.error(f"Could not bump auth version for user {user_id}: {e}")
+
+
+def user_claims(user_id) -> dict:
+    """
+    Authorization claims for a user; empty if the version can't be read.
+
+    The version is read before the rows it covers, so a change committed in
+    between leaves the token with an already outdated version, never the reverse.
+    """
+    version = get_auth_version(user_id)
+    if version is None:
+        return {}
+    user = User.objects.filter(pk=user_id, is_active=True).first()
+    if user is None:
+        return {}
+    return {
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'role': user.role,
+        'su': user.is_superuser,
+        'gardens': {
+            str(garden_id): role
+            for garden_id, role in user.garden_accesses.values_list('garden_id', 'role')
+        },
+        'ver': version,
+    }
+
+
+def cached_user_claims(user_id) -> dict:
+    """
+    ``user_claims()`` cached per process and in Redis until the version changes.
+
+    Entries are keyed by the current version, so any bump (see
+    ``users.signals``) makes the next lookup rebuild the claims from the
+    database. Returns an empty dict if Redis is unavailable or the user is
+    missing or inactive.
+    """
+    version = get_auth_version(user_id)
+    if version is None:
+        return {}
+
+    claims = _claims_cache.get((user_id, version))
+    if claims is not None:
+        return claims
+
+    key = CLAIMS_CACHE_KEY.format(user_id)
+    try:
+        cached = _redis().get(key)
+        claims = json.loads(cached) if cached else None
+    except Exception as e:
+        logger.error(f"Claims cache unavailable for user {user_id}: {e}")
+        claims = None
+
+    if claims is None or claims.get('ver') != version:
+        claims = user_claims(user_id)
+        if not claims:
+            return {}
+        try:
+            _redis().setex(key, settings.AUTH_CLAIMS_CACHE_TTL, json.dumps(claims))
+        except Exception as e:
+            logger.error(f"Claims cache unavailable for user {user_id}: {e}")
+
+    _claims_cache.set((user_id, claims['ver']), claims)
+    return claims
+
+
+def build_user(user_id, claims: dict) -> User:
+    """Build a read-only user from authorization claims (see ``user_claims``)."""
+    user = User(
+        id=user_id,
+        email=claims['email'],
+        first_name=claims['first_name'],
+        last_name=claims['last_name'],
+        role=claims['role'],
+        is_superuser=claims['su'],
+        is_active=True,
+    )
+    user._state.adding = False
+    user._state.db = 'default'
+    user.garden_roles = {int(garden_id): role for garden_id, role in claims['gardens'].items()}
+    user.from_token_claims = True
+    return user
+
+
+def user_from_claims(token) -> Optional[User]:
+    """
+    Rebuild a read-only user from a validated access token.
+
+    Returns:
+        The user, or None if the token has no claims or they are outdated
+    """
+    user_id = token[api_settings.USER_ID_CLAIM]
+    version = token.get('ver')
+    if version is None or version != get_auth_version(user_id):
+        return None
+    return build_user(user_id, token)
+
+
+def load_user(user: User) -> User:
+    """Return the full database row for a user built from token claims."""
+    if getattr(user, 'from_token_claims', False):
+        return User.objects.get(pk=user.pk)
+    return user
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """
+    Refresh token whose access tokens carry authorization claims.
+
+    Claims are read when each access token is issued (login and refresh), so
+    a refreshed access token always reflects the user's current access.
+    """
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        if settings.JWT_STATELESS_USERS:
+            for claim, value in user_claims(self.payload[api_settings.USER_ID_CLAIM]).items():
+                access[claim] = value
+        return access
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
@@ -3,10 +3,10 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from rest_framework_simplejwt.tokens import RefreshToken
 from .models import User
 from .serializers import CustomUserSerializer
 from .permissions import IsAdmin, IsManager
+from .tokens import ClaimsRefreshToken
 
 
 class UserViewSet(viewsets.ReadOnlyModelViewSet):
@@ -37,7 +37,7 @@ class UserViewSet(viewsets.ReadOnlyModelViewSet):
         """Login as guest user and get JWT token."""
         try:
             guest_user = User.objects.get(email='guest@smartgarden.com')
-            refresh = RefreshToken.for_user(guest_user)
+            refresh = ClaimsRefreshToken.for_user(guest_user)
             
             return Response({
                 'refresh': str(refresh),
@@ -28,10 +28,6 @@ echo "RabbitMQ is ready!"
 echo "Applying database migrations..."
 python manage.py migrate
 
-# Create cache table
-echo "Creating cache table..."
-python manage.py createcachetable
-
 # Collect static files (skip if already collected)
 echo "Collecting static files..."
 python manage.py collectstatic --noinput || echo "Static files already collected or permission issue, continuing..."